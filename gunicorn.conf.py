@@ -0,0 +1,41 @@
+"""Gunicorn configuration for the API (`gunicorn -c gunicorn.conf.py src.api.main:app`).
+
+With `PRELOAD_INDEX=true` the app is imported in the master and its backends
+(corpus, BM25 arrays, FAISS index, model weights) are built there once
+(`ServiceState.preload`) before workers are forked, so workers share those
+pages copy-on-write instead of each building a private copy. Check with
+`scripts/mem_report.py --pid <master pid>`.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+from src.config import settings
+
+if TYPE_CHECKING:
+    from gunicorn.arbiter import Arbiter
+    from gunicorn.workers.base import Worker
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 120
+preload_app = settings.PRELOAD_INDEX
+
+
+def when_ready(server: Arbiter) -> None:
+    """Master hook, after the preloaded app import and before the first fork."""
+    if preload_app:
+        from src.api.main import STATE
+
+        STATE.preload()
+
+
+def post_fork(server: Arbiter, worker: Worker) -> None:
+    """Worker hook, right after fork."""
+    if preload_app:
+        from src.api.main import STATE
+
+        STATE.after_fork()
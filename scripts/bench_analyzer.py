@@ -0,0 +1,69 @@
+"""Micro-benchmark: analyzer throughput (tokens/second).
+
+Scales the sample documents up by repetition and measures how fast each
+analyzer configuration tokenizes the corpus, next to the bare `str.split`
+baseline and a plain compiled-regex tokenizer for reference.
+
+Usage:
+  python scripts/bench_analyzer.py
+  python scripts/bench_analyzer.py --data-dir data/sample_docs --scale 5000 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import statistics as stats
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.pipelines.analysis import ENGLISH_STOPWORDS, Analyzer  # noqa: E402
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def _bench(name: str, fn: Callable[[str], List[str]], docs: List[str], repeat: int) -> None:
+    """Print median tokens/s and MB/s of `fn` over `docs`."""
+    n_bytes = sum(len(d.encode("utf-8")) for d in docs)
+    times: List[float] = []
+    n_tokens = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        n_tokens = sum(len(fn(d)) for d in docs)
+        times.append(time.perf_counter() - t0)
+    sec = stats.median(times)
+    print(f"{name:<28} {n_tokens / sec / 1e6:>8.2f} Mtok/s {n_bytes / sec / 1e6:>8.1f} MB/s")
+
+
+def main() -> int:
+    """Entry point."""
+    p = argparse.ArgumentParser(description="Benchmark lexical analyzers.")
+    p.add_argument("--data-dir", type=Path, default=Path("data/sample_docs"))
+    p.add_argument("--scale", type=int, default=2000, help="Copies of each sample doc")
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    base = [fp.read_text(encoding="utf-8") for fp in sorted(args.data_dir.glob("*.md"))]
+    if not base:
+        print(f"No .md files found in {args.data_dir}")
+        return 1
+    docs = base * args.scale
+    print(f"{len(docs)} docs, {sum(map(len, docs)) / 1e6:.1f} M chars")
+    _bench("str.split (baseline)", str.split, docs, args.repeat)
+    _bench("regex (lowercased)", lambda d: _WORD_RE.findall(d.lower()), docs, args.repeat)
+    _bench("Analyzer()", Analyzer(), docs, args.repeat)
+    _bench("Analyzer(stopwords)", Analyzer(stopwords=ENGLISH_STOPWORDS), docs, args.repeat)
+    _bench(
+        "Analyzer(stopwords, stem)",
+        Analyzer(stopwords=ENGLISH_STOPWORDS, stemmer="s"),
+        docs,
+        args.repeat,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,113 @@
+"""Recall@k vs. latency report for the dense index kinds.
+
+Builds every `IndexSpec` kind over the same vectors and compares it with the
+exact Flat index: recall@k (fraction of exact top-k IDs returned), per-query
+p50/p95 latency (one query per call, like `/query`), build time and
+serialized index size.
+
+Vectors come from `--emb-file` (e.g. the `embeddings.npy` written by
+`scripts/bootstrap_index.py`) or, by default, from a synthetic clustered
+corpus shaped like MiniLM embeddings (D=384).
+
+Usage:
+  python scripts/bench_ann.py
+  python scripts/bench_ann.py --n 1000000 --queries 1000 --k 10 --ef-search 32 64 128 --nprobe 8 32
+  python scripts/bench_ann.py --emb-file data/sample_docs/embeddings.npy
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.pipelines.ann import IndexSpec, build_index  # noqa: E402
+
+
+def _synthetic(n: int, dim: int, seed: int) -> np.ndarray:
+    """Gaussian-mixture vectors (unit norm), loosely mimicking text embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 500), dim)).astype(np.float32)
+    noise = 0.6 * rng.standard_normal((n, dim))
+    x = (centers[rng.integers(0, centers.shape[0], n)] + noise).astype(np.float32)
+    faiss.normalize_L2(x)
+    return x
+
+
+def _run(index: faiss.Index, queries: np.ndarray, k: int) -> Tuple[np.ndarray, List[float]]:
+    """Search queries one at a time; return IDs and per-query latencies (ms)."""
+    ids = np.empty((queries.shape[0], k), dtype=np.int64)
+    lat: List[float] = []
+    for i in range(queries.shape[0]):
+        t0 = time.perf_counter()
+        _, ids[i] = index.search(queries[i : i + 1], k)
+        lat.append((time.perf_counter() - t0) * 1000.0)
+    return ids, lat
+
+
+def main() -> int:
+    """Entry point."""
+    p = argparse.ArgumentParser(description="Recall/latency of ANN indexes vs. exact Flat.")
+    p.add_argument("--emb-file", type=Path, default=None)
+    p.add_argument("--n", type=int, default=100_000, help="Synthetic corpus size")
+    p.add_argument("--dim", type=int, default=384)
+    p.add_argument("--queries", type=int, default=300)
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--ef-search", nargs="+", type=int, default=[32, 128])
+    p.add_argument("--nprobe", nargs="+", type=int, default=[8, 32])
+    p.add_argument("--nlist", type=int, default=1024)
+    p.add_argument("--pq-m", type=int, default=48)
+    args = p.parse_args()
+
+    if args.emb_file is not None:
+        xb = np.ascontiguousarray(np.load(args.emb_file), dtype=np.float32)
+        faiss.normalize_L2(xb)
+    else:
+        xb = _synthetic(args.n, args.dim, seed=0)
+    rng = np.random.default_rng(1)
+    xq = xb[rng.choice(xb.shape[0], min(args.queries, xb.shape[0]), replace=False)]
+    xq = np.ascontiguousarray(xq + 0.05 * rng.standard_normal(xq.shape).astype(np.float32))
+    faiss.normalize_L2(xq)
+    k = min(args.k, xb.shape[0])
+
+    specs = [IndexSpec(kind="flat")]
+    specs += [IndexSpec(kind="hnsw", ef_search=ef) for ef in args.ef_search]
+    specs += [IndexSpec(kind="ivf", nlist=args.nlist, nprobe=np_) for np_ in args.nprobe]
+    specs += [
+        IndexSpec(kind="ivfpq", nlist=args.nlist, nprobe=np_, pq_m=args.pq_m) for np_ in args.nprobe
+    ]
+
+    print(f"N={xb.shape[0]} D={xb.shape[1]} queries={xq.shape[0]} k={k}")
+    print(f"{'index':<26} {'recall@k':>8} {'p50_ms':>8} {'p95_ms':>8} {'build_s':>8} {'MB':>8}")
+    exact = None
+    for spec in specs:
+        t0 = time.perf_counter()
+        index = build_index(spec, xb)
+        index.add(xb)
+        build_s = time.perf_counter() - t0
+        ids, lat = _run(index, xq, k)
+        if exact is None:
+            exact = ids
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(ids, exact, strict=True)])
+        size_mb = faiss.serialize_index(index).nbytes / 1e6
+        label = {
+            "flat": "flat",
+            "hnsw": f"hnsw(ef={spec.ef_search})",
+            "ivf": f"ivf(nprobe={spec.nprobe})",
+            "ivfpq": f"ivfpq(m={spec.pq_m},nprobe={spec.nprobe})",
+        }[spec.kind]
+        print(
+            f"{label:<26} {recall:>8.3f} {np.percentile(lat, 50):>8.3f} "
+            f"{np.percentile(lat, 95):>8.3f} {build_s:>8.1f} {size_mb:>8.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
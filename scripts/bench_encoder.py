@@ -0,0 +1,120 @@
+"""Latency/throughput of the query encoder backends (PyTorch vs. ONNX Runtime).
+
+For each backend it reports:
+  - single-query latency p50/p95 (one text per call, like `/query` variant B),
+  - batched throughput in texts/second (`--batch` texts per call),
+  - min/mean cosine similarity to the PyTorch reference vectors.
+
+The ONNX rows need an export directory from `scripts/export_onnx.py`
+(`--quantize` for the int8 row).
+
+Usage:
+  python scripts/bench_encoder.py --onnx-dir data/onnx/minilm
+  python scripts/bench_encoder.py --onnx-dir data/onnx/minilm --queries 500 --batch 64 --threads 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.pipelines.encoders import DEFAULT_ST_MODEL, Encoder, EncoderSpec  # noqa: E402
+
+_WORDS = [
+    "privacy",
+    "policy",
+    "retention",
+    "gdpr",
+    "consent",
+    "audit",
+    "trace",
+    "latency",
+    "graph",
+    "retrieval",
+    "dense",
+    "lexical",
+    "index",
+    "vector",
+    "answer",
+    "guardrail",
+    "masking",
+    "email",
+    "phone",
+    "tenant",
+    "region",
+    "model",
+]
+
+
+def _queries(n: int, seed: int) -> List[str]:
+    """Short synthetic questions (4-14 words), like typical /query inputs."""
+    rng = np.random.default_rng(seed)
+    return [
+        "what is the " + " ".join(rng.choice(_WORDS, rng.integers(4, 15))) + "?" for _ in range(n)
+    ]
+
+
+def _bench(enc: Encoder, queries: List[str], batch: int) -> tuple[np.ndarray, float, float, float]:
+    """Return (vectors, p50 ms, p95 ms, texts/s) for one encoder."""
+    enc.encode(queries[:8])  # warm-up
+    lat: List[float] = []
+    for q in queries:
+        t0 = time.perf_counter()
+        enc.encode([q])
+        lat.append((time.perf_counter() - t0) * 1000.0)
+    t0 = time.perf_counter()
+    vecs = np.concatenate(
+        [enc.encode(queries[i : i + batch]) for i in range(0, len(queries), batch)]
+    )
+    tput = len(queries) / (time.perf_counter() - t0)
+    return vecs, float(np.percentile(lat, 50)), float(np.percentile(lat, 95)), tput
+
+
+def main() -> int:
+    """Entry point."""
+    p = argparse.ArgumentParser(description="Query encoder latency: PyTorch vs ONNX Runtime.")
+    p.add_argument("--model", default=DEFAULT_ST_MODEL)
+    p.add_argument("--onnx-dir", type=Path, default=None)
+    p.add_argument("--queries", type=int, default=300)
+    p.add_argument("--batch", type=int, default=32)
+    p.add_argument("--threads", type=int, default=0, help="torch threads (0 = default)")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    if args.threads > 0:
+        import torch
+
+        torch.set_num_threads(args.threads)
+    queries = _queries(args.queries, args.seed)
+    specs = [EncoderSpec("torch", args.model, batch_size=args.batch)]
+    if args.onnx_dir is not None:
+        for quantized in (False, True):
+            specs.append(EncoderSpec("onnx", args.model, str(args.onnx_dir), quantized, args.batch))
+
+    print(f"{'encoder':<48}{'p50_ms':>9}{'p95_ms':>9}{'texts/s':>10}{'cos_min':>9}{'cos_mean':>10}")
+    ref: np.ndarray | None = None
+    for spec in specs:
+        try:
+            enc = spec.load()
+        except ValueError as exc:  # e.g. export without --quantize
+            print(f"{spec.name:<48}skipped: {exc}")
+            continue
+        vecs, p50, p95, tput = _bench(enc, queries, args.batch)
+        vecs = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+        ref = vecs if ref is None else ref
+        cos = (vecs * ref).sum(axis=1)
+        print(
+            f"{spec.name:<48}{p50:>9.2f}{p95:>9.2f}{tput:>10.0f}"
+            f"{cos.min():>9.4f}{cos.mean():>10.4f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
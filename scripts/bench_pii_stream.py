@@ -0,0 +1,125 @@
+"""Throughput of streaming PII masking (`StreamMasker`) vs. whole-text `mask_pii`.
+
+Builds a synthetic answer-like text with cards and emails sprinkled in, then
+reports MB/s for masking it in one `mask_pii` call and for streaming it
+through `StreamMasker` in chunks of each `--chunks` size (token-sized chunks
+are what `/query/stream` produces). Every streamed output is checked against
+`mask_pii` of the whole text; the held-back column is the largest number of
+characters the masker withheld at any point.
+
+Usage:
+  python scripts/bench_pii_stream.py
+  python scripts/bench_pii_stream.py --mb 16 --chunks 4 16 256 65536 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.guardrails.policy import StreamMasker, mask_pii  # noqa: E402
+
+_WORDS = [
+    "privacy",
+    "policy",
+    "retention",
+    "gdpr",
+    "consent",
+    "audit",
+    "trace",
+    "latency",
+    "graph",
+    "retrieval",
+    "answer",
+    "guardrail",
+    "masking",
+    "tenant",
+    "region",
+    "the",
+    "of",
+    "and",
+    "data",
+    "(see",
+    "section)",
+    "is",
+    "kept",
+    "for",
+    "days.",
+    "users,",
+]
+
+
+def _text(n_bytes: int, pii_rate: float, seed: int) -> str:
+    """ASCII prose of about `n_bytes` with a card or email every 1/`pii_rate` words."""
+    rng = random.Random(seed)
+    out: List[str] = []
+    size = 0
+    while size < n_bytes:
+        r = rng.random()
+        if r < pii_rate / 2:
+            word = "".join(rng.choice("0123456789") for _ in range(16))
+        elif r < pii_rate:
+            word = f"user{rng.randrange(10**6)}@example.com"
+        else:
+            word = rng.choice(_WORDS)
+        out.append(word)
+        size += len(word) + 1
+    return " ".join(out)
+
+
+def _best(fn: Callable[[], str], repeat: int) -> tuple[str, float]:
+    """Return (output, best wall time in seconds) over `repeat` runs."""
+    best = float("inf")
+    out = ""
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def main() -> int:
+    """Entry point."""
+    p = argparse.ArgumentParser(description="Streaming PII masking throughput (MB/s).")
+    p.add_argument("--mb", type=float, default=8.0, help="text size in MB")
+    p.add_argument("--chunks", type=int, nargs="+", default=[4, 16, 64, 1024, 65536])
+    p.add_argument("--pii-rate", type=float, default=0.01, help="share of words that are PII")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    text = _text(int(args.mb * 1e6), args.pii_rate, args.seed)
+    mb = len(text.encode("utf-8")) / 1e6
+    expected, secs = _best(lambda: mask_pii(text), args.repeat)
+    print(f"{'mode':<24}{'MB/s':>10}{'held_max':>10}")
+    print(f"{'mask_pii (whole)':<24}{mb / secs:>10.1f}{'-':>10}")
+
+    for size in args.chunks:
+        chunks = [text[i : i + size] for i in range(0, len(text), size)]
+        held_max = 0
+
+        def stream(chunks: List[str] = chunks) -> str:
+            nonlocal held_max
+            masker = StreamMasker()
+            parts = []
+            for chunk in chunks:
+                parts.append(masker.feed(chunk))
+                held_max = max(held_max, masker.pending)
+            parts.append(masker.flush())
+            return "".join(parts)
+
+        out, secs = _best(stream, args.repeat)
+        if out != expected:
+            print(f"chunk={size}: output differs from mask_pii", file=sys.stderr)
+            return 1
+        print(f"{f'stream chunk={size}':<24}{mb / secs:>10.1f}{held_max:>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
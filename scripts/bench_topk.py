@@ -0,0 +1,63 @@
+"""Micro-benchmark: full argsort vs. partition-based top-k selection.
+
+Compares the former retrieval idiom `np.argsort(scores)[-k:][::-1]` with
+`src.pipelines.topk.top_k_indices` on random score vectors, and prints the
+median wall time of each at several corpus sizes.
+
+Usage:
+  python scripts/bench_topk.py
+  python scripts/bench_topk.py --sizes 10000 100000 1000000 --k 6 100 --repeat 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics as stats
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.pipelines.topk import top_k_indices  # noqa: E402
+
+
+def _argsort_top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """The former idiom: full argsort, best `k` first."""
+    return np.argsort(scores)[-k:][::-1]
+
+
+def _median_ms(fn: Callable[[], object], repeat: int) -> float:
+    """Median wall time of `fn` in milliseconds over `repeat` runs."""
+    times: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000.0)
+    return stats.median(times)
+
+
+def main() -> int:
+    """Entry point."""
+    p = argparse.ArgumentParser(description="Benchmark argsort vs. argpartition top-k.")
+    p.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+    p.add_argument("--k", nargs="+", type=int, default=[6, 100])
+    p.add_argument("--repeat", type=int, default=15)
+    args = p.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'N':>10} {'k':>5} {'argsort_ms':>12} {'top_k_ms':>10} {'speedup':>8}")
+    for n in args.sizes:
+        scores = rng.random(n)
+        for k in args.k:
+            full = _median_ms(partial(_argsort_top_k, scores, k), args.repeat)
+            part = _median_ms(partial(top_k_indices, scores, k), args.repeat)
+            print(f"{n:>10} {k:>5} {full:>12.3f} {part:>10.3f} {full / part:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
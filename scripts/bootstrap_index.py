@@ -3,7 +3,23 @@
 This utility encodes all Markdown files in a directory using a
 Sentence-Transformers model and persists two artifacts:
   1) embeddings.npy  — NumPy array of shape (N, D)
-  2) ids.json        — List[str] of document identifiers ("doc_{i}")
+  2) ids.json        — List[str] of unit identifiers ("doc_{i}", or
+     "doc_{i}#<n>" passages with `--chunk-tokens`)
+  3) (optional) a BM25 index directory (`--bm25-dir`), memory-mapped by the
+     API at startup when `BM25_INDEX_DIR` points to it
+  4) (optional) a serialized FAISS vector store + manifest (`--faiss-dir`),
+     loaded by the API when `FAISS_INDEX_DIR` points to it and the manifest
+     (model, index kind, corpus hash) matches
+
+Raw embeddings are looked up in / added to a content-hash cache (`--cache-dir`,
+shared with the API's `EMBED_CACHE_DIR`), so rebuilds only encode documents
+whose text changed. `--encoder onnx --onnx-dir ... [--onnx-int8]` encodes with
+the ONNX Runtime backend (must match the API's `ENCODER_BACKEND` for the FAISS
+manifest and cache entries to be reused).
+
+With `--chunk-tokens N` (default 0, like the API's `CHUNK_TOKENS`) the
+indexed units are the passages produced by `src.pipelines.chunking`; use the
+same chunking values as the API, or it will rebuild both indexes at startup.
 
 Why:
   - Keeps an inspectable snapshot of vectors for debugging and QA.
@@ -19,18 +35,32 @@ Usage:
     --model sentence-transformers/all-MiniLM-L6-v2 \
     --emb-file data/sample_docs/embeddings.npy \
     --ids-file data/sample_docs/ids.json \
+    --bm25-dir data/sample_docs/bm25 \
+    --faiss-dir data/sample_docs/faiss --index-kind flat \
+    --cache-dir data/.emb_cache \
     --normalize
 """
+
 from __future__ import annotations
 
 import argparse
 import json
 import logging
+import sys
 from pathlib import Path
 from typing import List, Tuple
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.pipelines.analysis import Analyzer  # noqa: E402
+from src.pipelines.ann import INDEX_KINDS, IndexSpec  # noqa: E402
+from src.pipelines.artifacts import corpus_fingerprint  # noqa: E402
+from src.pipelines.bm25 import BM25Index  # noqa: E402
+from src.pipelines.chunking import ChunkSpec, chunk_corpus  # noqa: E402
+from src.pipelines.embed_cache import EmbeddingCache  # noqa: E402
+from src.pipelines.encoders import ENCODER_BACKENDS, EncoderSpec  # noqa: E402
+from src.pipelines.rag import VectorStore  # noqa: E402
 
 
 # -----------------------------------------------------------------------------
@@ -85,6 +115,8 @@ def embed_docs(
     docs: List[str],
     model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
     normalize: bool = False,
+    cache_dir: Path | None = None,
+    encoder_spec: EncoderSpec | None = None,
 ) -> np.ndarray:
     """Encode documents with a Sentence-Transformers model.
 
@@ -92,12 +124,22 @@ def embed_docs(
       docs: List of raw document strings to embed.
       model_name: Hugging Face model identifier.
       normalize: If True, L2-normalize embeddings in-place.
+      cache_dir: Optional embedding cache root; only uncached texts are encoded.
+        Raw vectors are cached (normalization is applied afterwards), so the
+        entries are shared with the API's `Retriever`.
+      encoder_spec: Encoder backend; defaults to PyTorch for `model_name`.
 
     Returns:
       NumPy array of shape (N, D) with dtype float32.
     """
-    model = SentenceTransformer(model_name)
-    embs: np.ndarray = model.encode(docs, convert_to_numpy=True)
+    spec = encoder_spec or EncoderSpec(model_name=model_name)
+    encoder = spec.load()
+    if cache_dir is not None:
+        cache = EmbeddingCache(cache_dir, spec.name, normalize=False)
+        embs = cache.encode(docs, encoder.encode)
+        logger.info("Embedding cache %s: %d vectors", cache_dir / cache.namespace, len(cache))
+    else:
+        embs = encoder.encode(docs)
     if normalize:
         # Safe in-place normalization (avoid div by zero).
         norms = np.linalg.norm(embs, axis=1, keepdims=True)
@@ -128,6 +170,66 @@ def save_artifacts(embs: np.ndarray, ids: List[str], emb_path: Path, ids_path: P
         json.dump(ids, f, ensure_ascii=False, indent=2)
 
 
+def save_bm25(
+    docs: List[str], ids: List[str], out_dir: Path, analyzer: Analyzer | None = None
+) -> BM25Index:
+    """Build the lexical index exactly like `Retriever` does and persist it.
+
+    Args:
+      docs: Corpus texts, in the same order as the runtime corpus (hashed into
+        the index metadata).
+      ids: Document identifiers.
+      out_dir: Target directory (see `BM25Index.save` for the layout).
+      analyzer: Tokenizer (must match the API's); defaults to `Analyzer()`.
+
+    Returns:
+      The built index.
+    """
+    analyzer = analyzer or Analyzer()
+    index = BM25Index([analyzer(d) for d in docs])
+    index.save(
+        out_dir,
+        analyzer_spec=analyzer.spec,
+        manifest={"corpus_sha256": corpus_fingerprint(docs, ids)},
+    )
+    return index
+
+
+def save_faiss(
+    embs: np.ndarray,
+    docs: List[str],
+    ids: List[str],
+    out_dir: Path,
+    model_name: str,
+    kind: str = "flat",
+) -> VectorStore:
+    """Build the runtime vector store from precomputed embeddings and persist it.
+
+    Args:
+      embs: Embedding matrix (N, D) aligned with `docs`/`ids` (copied, then
+        L2-normalized by the store).
+      docs: Corpus texts (hashed into the manifest).
+      ids: Document identifiers.
+      out_dir: Target directory (index, label table, manifest).
+      model_name: Encoder identity that produced `embs` (`EncoderSpec.name`; recorded
+        in the manifest).
+      kind: Dense index kind (see `src.pipelines.ann.INDEX_KINDS`).
+
+    Returns:
+      The built store.
+    """
+    vs = VectorStore(np.array(embs, dtype=np.float32), ids, spec=IndexSpec(kind=kind))
+    vs.save(
+        out_dir,
+        manifest={
+            "model": model_name,
+            "index_kind": kind,
+            "corpus_sha256": corpus_fingerprint(docs, ids),
+        },
+    )
+    return vs
+
+
 # -----------------------------------------------------------------------------
 # CLI entrypoint
 # -----------------------------------------------------------------------------
@@ -138,16 +240,89 @@ def parse_args() -> argparse.Namespace:
       argparse.Namespace with parsed arguments.
     """
     parser = argparse.ArgumentParser(description="Embed Markdown files into .npy + ids.json")
-    parser.add_argument("--data-dir", type=Path, default=Path("data/sample_docs"),
-                        help="Directory containing .md files (default: data/sample_docs)")
-    parser.add_argument("--model", type=str, default="sentence-transformers/all-MiniLM-L6-v2",
-                        help="Sentence-Transformers model name")
-    parser.add_argument("--emb-file", type=Path, default=Path("data/sample_docs/embeddings.npy"),
-                        help="Output path for embeddings (.npy)")
-    parser.add_argument("--ids-file", type=Path, default=Path("data/sample_docs/ids.json"),
-                        help="Output path for ids (.json)")
-    parser.add_argument("--normalize", action="store_true",
-                        help="L2-normalize embeddings (cosine-friendly)")
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=Path("data/sample_docs"),
+        help="Directory containing .md files (default: data/sample_docs)",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="sentence-transformers/all-MiniLM-L6-v2",
+        help="Sentence-Transformers model name",
+    )
+    parser.add_argument(
+        "--emb-file",
+        type=Path,
+        default=Path("data/sample_docs/embeddings.npy"),
+        help="Output path for embeddings (.npy)",
+    )
+    parser.add_argument(
+        "--ids-file",
+        type=Path,
+        default=Path("data/sample_docs/ids.json"),
+        help="Output path for ids (.json)",
+    )
+    parser.add_argument(
+        "--normalize", action="store_true", help="L2-normalize embeddings (cosine-friendly)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Content-hash embedding cache; only changed docs are encoded",
+    )
+    parser.add_argument(
+        "--encoder",
+        choices=ENCODER_BACKENDS,
+        default="torch",
+        help="Encoder backend (default: torch)",
+    )
+    parser.add_argument(
+        "--onnx-dir",
+        type=Path,
+        default=None,
+        help="ONNX export directory (scripts/export_onnx.py) for --encoder onnx",
+    )
+    parser.add_argument(
+        "--onnx-int8", action="store_true", help="Use the int8-quantized ONNX graph"
+    )
+    parser.add_argument(
+        "--bm25-dir",
+        type=Path,
+        default=None,
+        help="Also write a memory-mappable BM25 index to this directory",
+    )
+    parser.add_argument(
+        "--faiss-dir",
+        type=Path,
+        default=None,
+        help="Also write a serialized FAISS store + manifest to this directory",
+    )
+    parser.add_argument(
+        "--index-kind",
+        choices=INDEX_KINDS,
+        default="flat",
+        help="Dense index kind for --faiss-dir (default: flat)",
+    )
+    parser.add_argument(
+        "--chunk-tokens",
+        type=int,
+        default=0,
+        help="Words per indexed passage, e.g. 128; 0 indexes whole documents (default: 0)",
+    )
+    parser.add_argument(
+        "--chunk-overlap",
+        type=int,
+        default=32,
+        help="Words shared by consecutive passages (default: 32)",
+    )
+    parser.add_argument(
+        "--no-chunk-headings",
+        action="store_true",
+        help="Do not start passages at Markdown headings",
+    )
 
     return parser.parse_args()
 
@@ -157,13 +332,16 @@ def main() -> None:
 
     Steps:
       1) Discover `.md` files in `--data-dir`.
-      2) Load documents and create stable IDs.
+      2) Load documents and create stable IDs (chunk them into passages).
       3) Encode with Sentence-Transformers.
       4) (Optional) L2-normalize embeddings.
       5) Save `.npy` and `.json` artifacts.
+      6) (Optional) Build and save the BM25 index.
+      7) (Optional) Build and save the FAISS vector store with its manifest.
 
     Side Effects:
-      Writes files to `--emb-file` and `--ids-file`; creates parent directories.
+      Writes files to `--emb-file`, `--ids-file`, `--bm25-dir` and
+      `--faiss-dir`; creates parent directories.
 
     Raises:
       Exceptions bubbling up are logged and will cause a non-zero exit code.
@@ -177,16 +355,35 @@ def main() -> None:
 
     docs, ids = load_docs(files)
     logger.info("Loaded %d docs from %s", len(docs), args.data_dir)
-
-    embs = embed_docs(docs, model_name=args.model, normalize=args.normalize)
+    if args.chunk_tokens > 0:
+        chunk_spec = ChunkSpec(
+            max_tokens=args.chunk_tokens,
+            overlap=args.chunk_overlap,
+            headings=not args.no_chunk_headings,
+        ).validate()
+        docs, ids = chunk_corpus(docs, ids, chunk_spec)
+        logger.info("Chunked into %d passages (%s)", len(docs), chunk_spec)
+
+    spec = EncoderSpec(
+        backend=args.encoder,
+        model_name=args.model,
+        onnx_dir=str(args.onnx_dir) if args.onnx_dir else None,
+        quantized=args.onnx_int8,
+    )
+    embs = embed_docs(docs, normalize=args.normalize, cache_dir=args.cache_dir, encoder_spec=spec)
     logger.info("Embeddings shape: %s (normalized=%s)", embs.shape, args.normalize)
 
     save_artifacts(embs, ids, args.emb_file, args.ids_file)
     logger.info("Saved embeddings -> %s", args.emb_file)
     logger.info("Saved ids        -> %s", args.ids_file)
-    print(f"Embedded {len(docs)} docs → {embs.shape}. Saved {args.emb_file} & {args.ids_file}.")
+    if args.bm25_dir is not None:
+        bm25 = save_bm25(docs, ids, args.bm25_dir)
+        logger.info("Saved BM25 index -> %s (%d terms)", args.bm25_dir, len(bm25.vocab))
+    if args.faiss_dir is not None:
+        save_faiss(embs, docs, ids, args.faiss_dir, spec.name, kind=args.index_kind)
+        logger.info("Saved FAISS store -> %s (%s)", args.faiss_dir, args.index_kind)
+    print(f"Embedded {len(docs)} units → {embs.shape}. Saved {args.emb_file} & {args.ids_file}.")
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,61 @@
+"""Export the dense encoder to ONNX (optionally int8-quantized) for CPU serving.
+
+Writes the transformer graph, tokenizer and a manifest (pooling,
+normalization, max sequence length) that `OnnxEncoder` reads at startup, then
+checks cosine parity against the PyTorch encoder on a few probe sentences.
+
+Usage:
+  python scripts/export_onnx.py --out data/onnx/minilm --quantize
+  ENCODER_BACKEND=onnx ONNX_MODEL_DIR=data/onnx/minilm ONNX_INT8=true uvicorn src.api.main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.pipelines.encoders import (  # noqa: E402
+    DEFAULT_ST_MODEL,
+    OnnxEncoder,
+    TorchEncoder,
+    export_onnx,
+)
+
+_PROBES = [
+    "What are the privacy guarantees?",
+    "GraphRAG-Governor exposes A/B retrieval variants with OpenTelemetry traces.",
+    "PII such as emails and phone numbers is masked before generation.",
+]
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Row-wise cosine similarity."""
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def main() -> int:
+    """Entry point."""
+    p = argparse.ArgumentParser(description="Export a Sentence-Transformers model to ONNX.")
+    p.add_argument("--model", default=DEFAULT_ST_MODEL)
+    p.add_argument("--out", type=Path, required=True, help="Export directory")
+    p.add_argument("--quantize", action="store_true", help="Also write an int8 graph")
+    p.add_argument("--opset", type=int, default=17)
+    args = p.parse_args()
+
+    manifest = export_onnx(args.model, args.out, quantize=args.quantize, opset=args.opset)
+    print(f"Exported {args.model} -> {args.out} ({manifest})")
+    ref = TorchEncoder(args.model).encode(_PROBES)
+    for quantized in [False, True] if args.quantize else [False]:
+        cos = _cosine(ref, OnnxEncoder(args.out, args.model, quantized).encode(_PROBES))
+        print(f"{'int8' if quantized else 'fp32'} parity: min cosine {cos.min():.5f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,76 @@
+"""Per-worker memory report for a running gunicorn deployment.
+
+Reads RSS / PSS / private memory of the gunicorn master and each of its
+workers from `/proc` (see `src.obs.memory`). With `PRELOAD_INDEX=true` the
+corpus, BM25 arrays, FAISS index and model weights are loaded once in the
+master and shared copy-on-write (or through read-only mmaps), so each
+worker's private memory stays small and the PSS total grows by roughly that
+private amount per worker instead of by a full copy.
+
+Compare two runs (Linux only):
+  PRELOAD_INDEX=false gunicorn -c gunicorn.conf.py src.api.main:app &
+  python scripts/mem_report.py --pid $(pgrep -o -f "gunicorn -c")
+  PRELOAD_INDEX=true  gunicorn -c gunicorn.conf.py src.api.main:app &
+  python scripts/mem_report.py --pid $(pgrep -o -f "gunicorn -c")
+
+Wait until `GET /ready` reports "ready" before sampling.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from src.obs.memory import process_memory  # noqa: E402
+
+
+def children_of(pid: int) -> List[int]:
+    """PIDs whose parent is `pid` (scans /proc/*/stat)."""
+    kids: List[int] = []
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == pid:
+            kids.append(int(stat.parent.name))
+    return sorted(kids)
+
+
+def main() -> int:
+    """Entry point."""
+    p = argparse.ArgumentParser(description="RSS/PSS of a gunicorn master and its workers.")
+    p.add_argument("--pid", type=int, required=True, help="gunicorn master PID")
+    args = p.parse_args()
+
+    workers = children_of(args.pid)
+    rows = [("master", args.pid)] + [(f"worker{i}", w) for i, w in enumerate(workers)]
+    print(
+        f"{'process':<10}{'pid':>8}{'rss_mb':>10}{'pss_mb':>10}{'shared_mb':>11}{'private_mb':>12}"
+    )
+    total_rss = total_pss = 0
+    for name, pid in rows:
+        m = process_memory(pid)
+        if not m:
+            print(f"{name:<10}{pid:>8}  (no /proc/{pid}/smaps_rollup)")
+            continue
+        shared = m["shared_clean_kb"] + m["shared_dirty_kb"]
+        total_rss += m["rss_kb"]
+        total_pss += m["pss_kb"]
+        print(
+            f"{name:<10}{pid:>8}{m['rss_kb'] / 1024:>10.1f}{m['pss_kb'] / 1024:>10.1f}"
+            f"{shared / 1024:>11.1f}{m['private_kb'] / 1024:>12.1f}"
+        )
+    print(f"{'total':<18}{total_rss / 1024:>10.1f}{total_pss / 1024:>10.1f}")
+    print(
+        "RSS double-counts shared pages; the PSS total is the real footprint. "
+        f"Workers: {len(workers)}."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
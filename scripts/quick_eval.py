@@ -12,6 +12,10 @@ artifacts for credibility:
 It prefers server-reported `latency_ms` (when present) and falls back to client
 timing to ensure a result even if observability is misconfigured.
 
+With `--batch-size N` questions are sent N at a time to `/query/batch`; each
+item then reports the batch round trip as its client latency and its own
+server-side `latency_ms`.
+
 The goal is to provide a simple, reproducible *proof of execution* without
 pretending to be a full quality harness (see docs/EVALUATION.md for RAGAS).
 
@@ -21,6 +25,7 @@ Usage:
     --variants A B \
     --k 6 \
     --repeat 3 \
+    --batch-size 32 \
     --out-dir docs/artifacts
 
 Requirements:
@@ -90,7 +95,9 @@ def now_iso() -> str:
 def git_commit() -> Optional[str]:
     """Returns the short git commit hash if available, else None."""
     try:
-        out = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL)
+        out = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+        )
         return out.decode().strip()
     except Exception:
         return None
@@ -204,7 +211,9 @@ def request_with_retry(
             if attempt == max_retries:
                 raise
             sleep_for = backoff_sec * (2**attempt)
-            logging.warning("Request failed (%s). Retrying in %.2fs...", exc.__class__.__name__, sleep_for)
+            logging.warning(
+                "Request failed (%s). Retrying in %.2fs...", exc.__class__.__name__, sleep_for
+            )
             time.sleep(sleep_for)
             attempt += 1
     # Should not reach here; keep type checker happy.
@@ -259,7 +268,11 @@ def run_one_query(
         if ok:
             try:
                 raw = resp.json()
-                server_latency_ms = float(raw.get("latency_ms")) if isinstance(raw.get("latency_ms"), (int, float)) else None
+                server_latency_ms = (
+                    float(raw.get("latency_ms"))
+                    if isinstance(raw.get("latency_ms"), (int, float))
+                    else None
+                )
                 answer = raw.get("answer")
                 answer_len = len(answer) if isinstance(answer, str) else None
             except Exception as parse_exc:
@@ -298,6 +311,79 @@ def run_one_query(
         )
 
 
+def run_batch_query(
+    session: requests.Session,
+    base_url: str,
+    variant: str,
+    k: int,
+    questions: Sequence[str],
+    timeout: float,
+) -> List[RequestResult]:
+    """Runs one /query/batch call and captures one result per question.
+
+    Args:
+      session: Shared requests.Session.
+      base_url: Base API URL, e.g., http://localhost:8000
+      variant: 'A', 'B' or 'H'
+      k: Top-K docs.
+      questions: Natural-language questions sent together.
+      timeout: Request timeout in seconds.
+
+    Returns:
+      One RequestResult per question; all share the batch round trip as client
+      latency, while the server latency is per item.
+    """
+    url = f"{base_url.rstrip('/')}/query/batch"
+    body = {"items": [{"question": q, "variant": variant, "k": k} for q in questions]}
+
+    def failed(status_code: int, latency_ms: float, err: str) -> List[RequestResult]:
+        return [
+            RequestResult(
+                now_iso(), variant, k, q, status_code, False, latency_ms, None, None, err, None
+            )
+            for q in questions
+        ]
+
+    t0 = time.perf_counter()
+    try:
+        resp = request_with_retry(
+            session, "POST", url, json_body=body, timeout=timeout, max_retries=1
+        )
+    except Exception as exc:
+        latency_ms = (time.perf_counter() - t0) * 1000.0
+        return failed(-1, latency_ms, f"exception:{exc.__class__.__name__}")
+    client_latency_ms = (time.perf_counter() - t0) * 1000.0
+    if not 200 <= resp.status_code < 300:
+        return failed(resp.status_code, client_latency_ms, f"http_{resp.status_code}")
+    try:
+        items = resp.json()["results"]
+    except Exception as parse_exc:
+        return failed(resp.status_code, client_latency_ms, f"json_parse_error: {parse_exc}")
+    if len(items) != len(questions):
+        return failed(resp.status_code, client_latency_ms, f"result_count:{len(items)}")
+
+    results: List[RequestResult] = []
+    for q, raw in zip(questions, items, strict=True):
+        latency = raw.get("latency_ms")
+        answer = raw.get("answer")
+        results.append(
+            RequestResult(
+                ts_iso=now_iso(),
+                variant=variant,
+                k=k,
+                question=q,
+                status_code=resp.status_code,
+                ok=True,
+                client_latency_ms=float(client_latency_ms),
+                server_latency_ms=float(latency) if isinstance(latency, (int, float)) else None,
+                answer_len=len(answer) if isinstance(answer, str) else None,
+                error=None,
+                raw_response=raw,
+            )
+        )
+    return results
+
+
 def summarize_variant(results: Sequence[RequestResult], variant: str) -> VariantSummary:
     """Builds latency and success summary for a variant."""
     subset = [r for r in results if r.variant == variant]
@@ -306,9 +392,13 @@ def summarize_variant(results: Sequence[RequestResult], variant: str) -> Variant
     ok_rate = sum(1 for r in subset if r.ok) / len(subset)
 
     client_vals = [r.client_latency_ms for r in subset if r.ok]
-    client_mean, client_p50, client_p95 = robust_stats(client_vals) if client_vals else (0.0, 0.0, 0.0)
+    client_mean, client_p50, client_p95 = (
+        robust_stats(client_vals) if client_vals else (0.0, 0.0, 0.0)
+    )
 
-    server_vals = [r.server_latency_ms for r in subset if (r.ok and r.server_latency_ms is not None)]
+    server_vals = [
+        r.server_latency_ms for r in subset if (r.ok and r.server_latency_ms is not None)
+    ]
     if server_vals:
         srv_mean, srv_p50, srv_p95 = robust_stats([float(v) for v in server_vals])  # type: ignore[arg-type]
     else:
@@ -421,7 +511,9 @@ def write_artifacts(
                     "status_code": r.status_code,
                     "ok": r.ok,
                     "client_latency_ms": round(r.client_latency_ms, 2),
-                    "server_latency_ms": "" if r.server_latency_ms is None else round(r.server_latency_ms, 2),
+                    "server_latency_ms": ""
+                    if r.server_latency_ms is None
+                    else round(r.server_latency_ms, 2),
                     "answer_len": "" if r.answer_len is None else r.answer_len,
                     "error": r.error or "",
                 }
@@ -462,18 +554,48 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     p = argparse.ArgumentParser(
         description="Quick evaluation runner for GraphRAG-Governor (A/B latency)."
     )
-    p.add_argument("--base-url", default="http://localhost:8000", help="API base URL (default: %(default)s)")
-    p.add_argument("--variants", nargs="+", default=["A", "B"], help="Retrieval variants to test (space-separated, e.g., A B)")
-    p.add_argument("--k", type=int, default=6, help="Top-K documents to retrieve (default: %(default)s)")
-    p.add_argument("--repeat", type=int, default=3, help="Repeat each question N times per variant (default: %(default)s)")
+    p.add_argument(
+        "--base-url", default="http://localhost:8000", help="API base URL (default: %(default)s)"
+    )
+    p.add_argument(
+        "--variants",
+        nargs="+",
+        default=["A", "B"],
+        help="Retrieval variants to test (space-separated, e.g., A B)",
+    )
+    p.add_argument(
+        "--k", type=int, default=6, help="Top-K documents to retrieve (default: %(default)s)"
+    )
+    p.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Repeat each question N times per variant (default: %(default)s)",
+    )
     p.add_argument(
         "--questions-file",
         type=Path,
         default=None,
         help="Optional path to a text file with one question per line.",
     )
-    p.add_argument("--timeout", type=float, default=20.0, help="Per-request timeout in seconds (default: %(default)s)")
-    p.add_argument("--out-dir", type=Path, default=Path("docs/artifacts"), help="Directory for artifacts (default: %(default)s)")
+    p.add_argument(
+        "--batch-size",
+        type=int,
+        default=0,
+        help="Send questions N at a time to /query/batch (default: 0 = one /query call each).",
+    )
+    p.add_argument(
+        "--timeout",
+        type=float,
+        default=20.0,
+        help="Per-request timeout in seconds (default: %(default)s)",
+    )
+    p.add_argument(
+        "--out-dir",
+        type=Path,
+        default=Path("docs/artifacts"),
+        help="Directory for artifacts (default: %(default)s)",
+    )
     p.add_argument("--verbose", action="store_true", help="Enable info-level logging.")
     return p.parse_args(argv)
 
@@ -493,10 +615,32 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
     results: List[RequestResult] = []
     session = requests.Session()
 
-    logging.info("Starting quick eval | base_url=%s variants=%s k=%d repeat=%d", args.base_url, args.variants, args.k, args.repeat)
+    logging.info(
+        "Starting quick eval | base_url=%s variants=%s k=%d repeat=%d",
+        args.base_url,
+        args.variants,
+        args.k,
+        args.repeat,
+    )
 
     try:
         for variant in args.variants:
+            if args.batch_size > 0:
+                pending = [q for q in questions for _ in range(args.repeat)]
+                for start in range(0, len(pending), args.batch_size):
+                    chunk = run_batch_query(
+                        session=session,
+                        base_url=args.base_url,
+                        variant=variant,
+                        k=args.k,
+                        questions=pending[start : start + args.batch_size],
+                        timeout=args.timeout,
+                    )
+                    results.extend(chunk)
+                    sys.stdout.write("".join("." if r.ok else "x" for r in chunk))
+                    sys.stdout.flush()
+                sys.stdout.write(f" {variant}\n")
+                continue
             for q in questions:
                 for _ in range(args.repeat):
                     r = run_one_query(
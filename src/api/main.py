@@ -3,27 +3,68 @@
 Overview:
   Small, production-lean API exposing a demo GraphRAG pipeline.
 
+Startup:
+  Backends are built by a background warmup started from the app lifespan,
+  so the process answers `/health` immediately. With `WARMUP_BM25_FIRST`
+  the BM25 backend comes up first and variant "A" serves while the dense
+  model loads; requests for a backend that is not ready get 503.
+
+  With `PRELOAD_INDEX` (see `gunicorn.conf.py`) the backends are instead
+  built once in the gunicorn master and shared by the forked workers.
+
 Endpoints:
   - GET /health
       Liveness probe used by the Docker healthcheck.
+  - GET /ready
+      Readiness probe with per-variant status.
   - POST /query
-      Query endpoint with A/B retrieval switch and configurable top-k.
+      Query endpoint with A/B/H (BM25, dense, hybrid) retrieval switch,
+      configurable top-k and optional cross-encoder re-ranking. With
+      `CHUNK_TOKENS` > 0 hits are passages with source-document offsets.
+      Repeated questions are answered from the response cache (`RESPONSE_CACHE`).
+  - POST /query/stream
+      `/query` as Server-Sent Events: hits as soon as retrieval completes, then
+      the post-enforced answer chunk by chunk.
+  - POST /query/batch
+      Many questions (each with its own variant and k) in one call; encoding
+      and index search run once per variant for the whole batch.
 
 Usage:
   curl -s -X POST 'http://localhost:8000/query?variant=B&k=5' \
     -H 'Content-Type: application/json' \
     -d '{"question":"What are the privacy guarantees?"}'
 """
+
 from __future__ import annotations
 
+import gc
+import hashlib
+import json
 import logging
-from typing import List
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Dict, List, Tuple
 
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
-from src.pipelines.rag import RAGPipeline, Retriever
+from src.config import settings
+from src.obs.memory import process_memory
+from src.pipelines.analysis import Analyzer
+from src.pipelines.ann import IndexSpec
+from src.pipelines.artifacts import corpus_fingerprint, manifest_matches, read_manifest
+from src.pipelines.bm25 import BM25Index
+from src.pipelines.chunking import ChunkSpec, chunk_corpus
+from src.pipelines.embed_cache import EmbeddingCache
+from src.pipelines.encoders import DEFAULT_ST_MODEL, EncoderSpec
+from src.pipelines.fusion import FusionSpec
+from src.pipelines.rag import BackendNotReadyError, RAGPipeline, Retriever, VectorStore
+from src.pipelines.rerank import Reranker, RerankSpec
+from src.pipelines.response_cache import make_response_cache
 
 # -----------------------------------------------------------------------------
 # Logging
@@ -40,30 +81,263 @@ DOC_PATHS: List[str] = [
     "data/sample_docs/01_architecture.md",
     "data/sample_docs/02_privacy.md",
 ]
-DOCS: List[str] = []
-IDS: List[str] = []
 
-for i, fp in enumerate(DOC_PATHS):
-    try:
-        with open(fp, "r", encoding="utf-8") as f:
-            DOCS.append(f.read())
-            IDS.append(f"doc_{i}")
-    except FileNotFoundError:
-        # Continue; we will fall back to placeholders if none are found.
-        pass
-
-if not DOCS:
-    logger.warning("Sample docs not found — using placeholders")
-    DOCS = [
-        "Welcome to GraphRAG-Governor demo.",
-        "Architecture placeholder.",
-        "Privacy placeholder.",
-    ]
-    IDS = [f"doc_{i}" for i in range(len(DOCS))]
 
-# Build pipeline singletons
-retriever = Retriever(DOCS, IDS)
-pipeline = RAGPipeline(retriever)
+def load_corpus() -> Tuple[List[str], List[str]]:
+    """Read the demo documents, falling back to placeholders if none exist.
+
+    Returns:
+      A tuple (docs, ids) with stable identifiers ("doc_{i}").
+    """
+    docs: List[str] = []
+    ids: List[str] = []
+    for i, fp in enumerate(DOC_PATHS):
+        try:
+            with open(fp, "r", encoding="utf-8") as f:
+                docs.append(f.read())
+                ids.append(f"doc_{i}")
+        except FileNotFoundError:
+            # Continue; we will fall back to placeholders if none are found.
+            pass
+
+    if not docs:
+        logger.warning("Sample docs not found — using placeholders")
+        docs = [
+            "Welcome to GraphRAG-Governor demo.",
+            "Architecture placeholder.",
+            "Privacy placeholder.",
+        ]
+        ids = [f"doc_{i}" for i in range(len(docs))]
+    return docs, ids
+
+
+def build_retriever(docs: List[str], ids: List[str], defer_dense: bool) -> Retriever:
+    """Build the retriever from configured artifacts (prebuilt indexes when fresh).
+
+    Args:
+      docs: Corpus texts.
+      ids: Document identifiers aligned with `docs`.
+      defer_dense: Return after the BM25 backend is ready; the caller then
+        runs `Retriever.load_dense()`.
+
+    Returns:
+      The retriever (dense backend loaded unless deferred).
+
+    Notes:
+      Prebuilt artifacts must cover the same retrieval units (passages when
+      `CHUNK_TOKENS` > 0, see `scripts/bootstrap_index.py --chunk-tokens`).
+    """
+    analyzer = Analyzer()
+    chunk_spec = None
+    unit_docs, unit_ids = docs, ids
+    if settings.CHUNK_TOKENS > 0:
+        chunk_spec = ChunkSpec(
+            max_tokens=settings.CHUNK_TOKENS,
+            overlap=settings.CHUNK_OVERLAP,
+            headings=settings.CHUNK_HEADINGS,
+        )
+        unit_docs, unit_ids = chunk_corpus(docs, ids, chunk_spec)
+    fingerprint = corpus_fingerprint(unit_docs, unit_ids)
+    bm25 = None
+    if settings.BM25_INDEX_DIR and os.path.isdir(settings.BM25_INDEX_DIR):
+        bm25 = BM25Index.load(settings.BM25_INDEX_DIR)
+        if (
+            bm25.num_docs != len(unit_docs)
+            or bm25.analyzer_spec != analyzer.spec
+            or bm25.manifest.get("corpus_sha256") != fingerprint
+        ):
+            logger.warning("BM25 index at %s is stale — rebuilding", settings.BM25_INDEX_DIR)
+            bm25 = None
+    index_spec = IndexSpec(kind=settings.VECTOR_INDEX)
+    encoder_spec = EncoderSpec(
+        backend=settings.ENCODER_BACKEND,
+        model_name=DEFAULT_ST_MODEL,
+        onnx_dir=settings.ONNX_MODEL_DIR,
+        quantized=settings.ONNX_INT8,
+    )
+    vector_store = None
+    if settings.FAISS_INDEX_DIR and os.path.isdir(settings.FAISS_INDEX_DIR):
+        expected = {
+            "model": encoder_spec.name,
+            "corpus_sha256": fingerprint,
+            "index_kind": index_spec.kind,
+        }
+        if manifest_matches(read_manifest(settings.FAISS_INDEX_DIR), expected):
+            vector_store = VectorStore.load(settings.FAISS_INDEX_DIR, mmap=settings.FAISS_MMAP)
+        else:
+            logger.warning("FAISS index at %s is stale — re-encoding", settings.FAISS_INDEX_DIR)
+    embed_cache = None
+    if settings.EMBED_CACHE_DIR:
+        embed_cache = EmbeddingCache(settings.EMBED_CACHE_DIR, encoder_spec.name, normalize=False)
+    return Retriever(
+        docs,
+        ids,
+        bm25=bm25,
+        analyzer=analyzer,
+        index_spec=index_spec,
+        batch_max_size=settings.DENSE_BATCH_MAX_SIZE,
+        batch_max_wait_ms=settings.DENSE_BATCH_MAX_WAIT_MS,
+        vector_store=vector_store,
+        embedding_cache=embed_cache,
+        query_cache_size=settings.QUERY_CACHE_SIZE,
+        defer_dense=defer_dense,
+        encoder_spec=encoder_spec,
+        fusion_spec=FusionSpec(
+            method=settings.HYBRID_FUSION,
+            weights=settings.HYBRID_WEIGHTS,
+            depth=settings.HYBRID_DEPTH,
+        ),
+        chunk_spec=chunk_spec,
+        hybrid_workers=settings.HYBRID_WORKERS,
+    )
+
+
+def config_version() -> str:
+    """Hash of the settings that shape `/query` responses (part of response-cache keys).
+
+    Corpus changes are covered separately by `Retriever.corpus_version`.
+    """
+    shaping = {
+        name: getattr(settings, name)
+        for name in sorted(vars(settings))
+        if name.startswith(("VECTOR_", "ENCODER_", "ONNX_", "HYBRID_", "RERANK_", "CHUNK_"))
+        or name == "LLM_MODEL"
+    }
+    return hashlib.sha256(json.dumps(shaping, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+class ServiceState:
+    """Backends of the running service, initialized by a background warmup.
+
+    Attributes:
+      retriever: Set once the lexical backend is built (None before).
+      pipeline: `RAGPipeline` over `retriever` (None before).
+      error: Message of a failed warmup (None otherwise).
+    """
+
+    def __init__(self) -> None:
+        self.retriever: Retriever | None = None
+        self.pipeline: RAGPipeline | None = None
+        self.error: str | None = None
+        self._started = False
+        self._done = threading.Event()
+        # (torch, faiss) thread counts before preload; torch None when not installed
+        self._threads: Tuple[int | None, int] | None = None
+
+    def variants(self) -> Dict[str, bool]:
+        """Per-variant readiness ("A" = BM25, "B" = dense, "H" = hybrid)."""
+        r = self.retriever
+        dense = r is not None and r.dense_ready
+        return {"A": r is not None, "B": dense, "H": dense}
+
+    def start(self) -> None:
+        """Run `warmup()` on a daemon thread (once per state)."""
+        if not self._started:
+            self._started = True
+            threading.Thread(target=self.warmup, name="warmup", daemon=True).start()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until warmup has finished (or failed); False on timeout."""
+        return self._done.wait(timeout)
+
+    def warmup(self, defer_dense: bool | None = None, prime: bool = True) -> None:
+        """Build the backends (BM25 first if configured) and prime the dense path.
+
+        Args:
+          defer_dense: Publish the BM25 backend before loading the dense one;
+            defaults to `settings.WARMUP_BM25_FIRST`.
+          prime: Run one dense query to pay first-call model overhead.
+        """
+        if defer_dense is None:
+            defer_dense = settings.WARMUP_BM25_FIRST
+        try:
+            docs, ids = load_corpus()
+            retriever = build_retriever(docs, ids, defer_dense=defer_dense)
+            reranker = Reranker(
+                RerankSpec(
+                    model_name=settings.RERANK_MODEL,
+                    candidates=settings.RERANK_CANDIDATES,
+                    cache_size=settings.RERANK_CACHE_SIZE,
+                    budget_ms=settings.RERANK_BUDGET_MS,
+                )
+            )
+            cache = make_response_cache(
+                settings.RESPONSE_CACHE,
+                max_bytes=int(settings.RESPONSE_CACHE_MAX_MB * 1024 * 1024),
+                ttl_s=settings.RESPONSE_CACHE_TTL_S,
+                path=settings.RESPONSE_CACHE_PATH,
+            )
+            self.pipeline = RAGPipeline(
+                retriever,
+                reranker=reranker,
+                cache=cache,
+                config_version=config_version(),
+                coalesce=settings.QUERY_COALESCE,
+                cpu_workers=settings.PIPELINE_CPU_WORKERS,
+            )
+            self.retriever = retriever
+            logger.info("Lexical backend ready (%d docs)", len(ids))
+            retriever.load_dense()
+            if prime:
+                retriever.retrieve("warmup", k=1, variant="B")
+            logger.info("Dense backend ready (pid %d: %s)", os.getpid(), process_memory())
+        except Exception as exc:  # keep serving liveness; readiness reports the failure
+            logger.exception("Warmup failed")
+            self.error = f"{type(exc).__name__}: {exc}"
+        finally:
+            self._done.set()
+
+    def preload(self) -> None:
+        """Build every backend in the gunicorn master, before workers fork.
+
+        Workers then share the corpus, BM25 arrays, FAISS index and model
+        weights copy-on-write (and mmapped artifacts through the page cache).
+        Torch/FAISS run single-threaded here so no OpenMP pool exists at fork
+        time, no query is run, and `gc.freeze()` keeps the collector from
+        dirtying the shared pages; `after_fork()` restores the thread counts.
+        Torch is optional (torch-free images serve with `ENCODER_BACKEND=onnx`).
+        """
+        import faiss
+
+        try:
+            import torch
+        except ImportError:
+            torch_threads = None
+        else:
+            torch_threads = torch.get_num_threads()
+            torch.set_num_threads(1)
+        self._threads = (torch_threads, faiss.omp_get_max_threads())
+        faiss.omp_set_num_threads(1)
+        self._started = True
+        self.warmup(defer_dense=False, prime=False)
+        gc.freeze()
+        logger.info("Preloaded backends in master %d: %s", os.getpid(), process_memory())
+
+    def after_fork(self) -> None:
+        """Restore compute threads in a forked worker (no-op without `preload`)."""
+        if self._threads is None:
+            return
+        import faiss
+
+        torch_threads, faiss_threads = self._threads
+        if torch_threads is not None:  # torch was present at preload
+            import torch
+
+            torch.set_num_threads(torch_threads)
+        faiss.omp_set_num_threads(faiss_threads)
+
+
+STATE = ServiceState()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Start the background warmup (no-op after a preload); serve immediately."""
+    STATE.start()
+    if STATE.wait(0):
+        logger.info("Worker %d memory: %s", os.getpid(), process_memory())
+    yield
+
 
 # -----------------------------------------------------------------------------
 # FastAPI app
@@ -76,6 +350,7 @@ app = FastAPI(
         "A minimal API exposing a GraphRAG retrieval-and-generation pipeline "
         "with A/B retrieval variants and basic guardrails/observability."
     ),
+    lifespan=lifespan,
 )
 
 # Optional CORS for local UI testing (tighten for production)
@@ -98,9 +373,14 @@ class QueryIn(BaseModel):
 
 
 class Hit(BaseModel):
-    """Single retrieval hit."""
+    """Single retrieval hit (a document, or a passage of one)."""
 
-    doc_id: str = Field(..., description="Identifier of the matched document.")
+    doc_id: str = Field(..., description="Identifier of the matched (source) document.")
+    chunk_id: str | None = Field(
+        None, description='Matched passage ("<doc_id>#<n>"); null for whole-document hits.'
+    )
+    start: int = Field(..., description="Start character offset of the hit in the document.")
+    end: int = Field(..., description="End character offset (exclusive) in the document.")
     score: float = Field(..., description="Backend-specific relevance score.")
 
 
@@ -108,12 +388,46 @@ class QueryOut(BaseModel):
     """Structured response of /query."""
 
     answer: str = Field(..., description="Final answer after guardrails.")
-    variant: str = Field(..., description='Retrieval variant used: "A" (BM25) or "B" (Dense).')
+    variant: str = Field(
+        ..., description='Retrieval variant used: "A" (BM25), "B" (Dense) or "H" (Hybrid).'
+    )
     k: int = Field(..., description="Number of contexts considered.")
     hits: List[Hit] = Field(..., description="Top-k retrieval results.")
+    reranked: int = Field(
+        0, description="Candidates re-scored by the cross-encoder (0 without re-ranking)."
+    )
+    cached: bool = Field(False, description="Served from the response cache.")
     latency_ms: float = Field(..., description="End-to-end latency in milliseconds.")
 
 
+class BatchItem(BaseModel):
+    """One question of a /query/batch call."""
+
+    question: str = Field(..., description="User question to answer.")
+    variant: str = Field(
+        "A", pattern="^[ABH]$", description='Retrieval variant: "A", "B" or "H" (see /query).'
+    )
+    k: int = Field(6, ge=1, le=100, description="Top-k contexts (clamped to corpus size).")
+
+
+class BatchQueryIn(BaseModel):
+    """Input payload for /query/batch."""
+
+    items: List[BatchItem] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.QUERY_BATCH_MAX_ITEMS,
+        description="Questions to answer (at most QUERY_BATCH_MAX_ITEMS).",
+    )
+
+
+class BatchQueryOut(BaseModel):
+    """Structured response of /query/batch."""
+
+    results: List[QueryOut] = Field(..., description="One result per item, in input order.")
+    latency_ms: float = Field(..., description="End-to-end latency of the batch in milliseconds.")
+
+
 # -----------------------------------------------------------------------------
 # Endpoints
 # -----------------------------------------------------------------------------
@@ -127,13 +441,36 @@ def health() -> dict:
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready() -> JSONResponse:
+    """Readiness endpoint (separate from liveness).
+
+    Returns:
+      JSONResponse: 200 once at least variant "A" can serve ("ready" when both
+      variants are up, "partial" while the dense model is loading); 503 while
+      starting or after a failed warmup. The body lists per-variant readiness.
+    """
+    variants = STATE.variants()
+    if STATE.error is not None and not variants["B"]:
+        status = "failed"
+    elif all(variants.values()):
+        status = "ready"
+    elif any(variants.values()):
+        status = "partial"
+    else:
+        status = "starting"
+    code = 200 if any(variants.values()) else 503
+    body = {"status": status, "variants": variants, "error": STATE.error}
+    return JSONResponse(body, status_code=code)
+
+
 @app.post("/query", response_model=QueryOut)
-def query(
+async def query(
     q: QueryIn,
     variant: str = Query(
         "A",
-        pattern="^[AB]$",
-        description='Retrieval variant: "A"=BM25 or "B"=Dense vectors.',
+        pattern="^[ABH]$",
+        description='Retrieval variant: "A"=BM25, "B"=Dense vectors, "H"=Hybrid (fused A+B).',
     ),
     k: int = Query(
         6,
@@ -141,36 +478,215 @@ def query(
         le=100,
         description="Top-k contexts to retrieve (clamped to corpus size).",
     ),
+    rerank: bool = Query(
+        False,
+        description="Re-rank a larger candidate set with a cross-encoder before generation.",
+    ),
+    rerank_budget_ms: float | None = Query(
+        None,
+        ge=0,
+        le=10000,
+        description="Re-rank latency budget in ms (default RERANK_BUDGET_MS; 0 = unbounded).",
+    ),
 ) -> QueryOut:
     """Answer a question using the selected retrieval variant.
 
     The pipeline applies guardrails (pre/post), retrieves top-k contexts,
     generates a draft answer (placeholder), and reports observability metrics.
+    CPU-bound stages run on the pipeline's thread pool (`PIPELINE_CPU_WORKERS`)
+    and generation is awaited, so the event loop keeps accepting requests.
 
     Args:
       q: Input payload with the user question.
-      variant: Retrieval variant to use ("A" or "B").
+      variant: Retrieval variant to use ("A", "B" or "H").
       k: Number of contexts to retrieve (1..100; clamped to corpus size).
+      rerank: Re-score `RERANK_CANDIDATES` first-stage hits with the cross-encoder.
+      rerank_budget_ms: Re-rank latency budget; fewer candidates are re-scored
+        when the budget cannot cover all of them.
 
     Returns:
       QueryOut: Structured answer and execution metadata.
 
+    Raises:
+      HTTPException: 503 if the requested variant's backend is still loading.
+
     Notes:
-      - For production quality, add re-ranking and cite-span offsets.
-      - Scores are variant-specific and not cross-comparable.
+      - With chunking, hits are passages; `start`/`end` locate them in `doc_id`.
+      - Scores are variant-specific and not cross-comparable ("H" returns fused
+        scores; re-ranked hits carry cross-encoder scores).
     """
+    retriever, pipeline = STATE.retriever, STATE.pipeline
+    if retriever is None or pipeline is None:
+        raise HTTPException(503, "Retrieval backends are warming up", {"Retry-After": "5"})
     # Clamp k to the available corpus size to avoid empty padding.
-    k_eff = max(1, min(k, len(IDS)))
-    result = pipeline.run(q.question, variant=variant, k=k_eff)
+    k_eff = max(1, min(k, len(retriever.id2pos)))
+    try:
+        result = await pipeline.arun(
+            q.question,
+            variant=variant,
+            k=k_eff,
+            rerank=rerank,
+            rerank_budget_ms=rerank_budget_ms,
+        )
+    except BackendNotReadyError as exc:
+        raise HTTPException(503, str(exc), {"Retry-After": "5"}) from exc
+    return to_query_out(result, chunked=retriever.chunks is not None)
+
+
+@app.post("/query/stream", response_class=StreamingResponse)
+async def query_stream(
+    q: QueryIn,
+    variant: str = Query("A", pattern="^[ABH]$", description="Retrieval variant (see /query)."),
+    k: int = Query(6, ge=1, le=100, description="Top-k contexts (clamped to corpus size)."),
+    rerank: bool = Query(False, description="Re-rank with the cross-encoder (see /query)."),
+    rerank_budget_ms: float | None = Query(
+        None, ge=0, le=10000, description="Re-rank latency budget in ms (see /query)."
+    ),
+) -> StreamingResponse:
+    """Stream the answer to a question as Server-Sent Events.
+
+    Events (each `data` is one JSON object):
+      - `hits`: variant, k, hits (as in /query), reranked, cached; sent as soon
+        as retrieval (and re-ranking) completes.
+      - `token`: `{"text": ...}`, the next chunk of the post-enforced answer;
+        chunks concatenate to the `/query` answer.
+      - `done`: cached, latency_ms (end to end).
+
+    Args:
+      q: Input payload with the user question.
+      variant: Retrieval variant to use ("A", "B" or "H").
+      k: Number of contexts to retrieve (1..100; clamped to corpus size).
+      rerank: Re-score `RERANK_CANDIDATES` first-stage hits with the cross-encoder.
+      rerank_budget_ms: Re-rank latency budget.
 
-    # Convert tuple hits -> structured list for response_model fidelity.
-    hits_struct = [Hit(doc_id=doc_id, score=score) for doc_id, score in result["hits"]]
+    Returns:
+      StreamingResponse: `text/event-stream` body.
 
+    Raises:
+      HTTPException: 503 if the requested variant's backend is still loading
+        (before any event is sent).
+    """
+    retriever, pipeline = STATE.retriever, STATE.pipeline
+    if retriever is None or pipeline is None:
+        raise HTTPException(503, "Retrieval backends are warming up", {"Retry-After": "5"})
+    k_eff = max(1, min(k, len(retriever.id2pos)))
+    events: AsyncGenerator[Dict, None] = pipeline.astream(
+        q.question, variant=variant, k=k_eff, rerank=rerank, rerank_budget_ms=rerank_budget_ms
+    )
+    try:
+        first = await anext(events)  # retrieval errors still map to a status code
+    except BackendNotReadyError as exc:
+        raise HTTPException(503, str(exc), {"Retry-After": "5"}) from exc
+    chunked = retriever.chunks is not None
+
+    def sse(event: Dict) -> str:
+        name = event.pop("event")
+        if name == "hits":
+            event["hits"] = [h.model_dump() for h in to_hits(event, chunked)]
+            del event["spans"]
+        return f"event: {name}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    async def body() -> AsyncIterator[str]:
+        try:
+            yield sse(first)
+            async for event in events:
+                yield sse(event)
+        finally:  # client gone: end the generation (and its spans) now
+            await events.aclose()
+
+    # no-cache / X-Accel-Buffering: keep proxies from buffering the stream
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(body(), media_type="text/event-stream", headers=headers)
+
+
+@app.post("/query/batch", response_model=BatchQueryOut)
+def query_batch(
+    q: BatchQueryIn,
+    rerank: bool = Query(
+        False,
+        description="Re-rank every item with the cross-encoder (see /query).",
+    ),
+    rerank_budget_ms: float | None = Query(
+        None,
+        ge=0,
+        le=10000,
+        description="Re-rank latency budget per item in ms (default RERANK_BUDGET_MS).",
+    ),
+) -> BatchQueryOut:
+    """Answer many questions in one call with batched pipeline stages.
+
+    Guardrails, the response cache, retrieval, re-ranking and generation run
+    once per stage for the whole batch: dense items of one variant share a
+    single encoder forward pass and index search. Duplicate questions are
+    answered once. The handler is synchronous, so FastAPI runs it in its
+    thread pool and the event loop keeps serving `/query` meanwhile.
+
+    Args:
+      q: Items with per-item question, variant and k.
+      rerank: Re-score `RERANK_CANDIDATES` first-stage hits of every item.
+      rerank_budget_ms: Re-rank latency budget per item.
+
+    Returns:
+      BatchQueryOut: Per-item results (each with its own `latency_ms`, the time
+      until that item was ready) and the batch latency.
+
+    Raises:
+      HTTPException: 503 if a requested variant's backend is still loading.
+    """
+    retriever, pipeline = STATE.retriever, STATE.pipeline
+    if retriever is None or pipeline is None:
+        raise HTTPException(503, "Retrieval backends are warming up", {"Retry-After": "5"})
+    n_units = len(retriever.id2pos)
+    queries = [(it.question, it.variant, max(1, min(it.k, n_units))) for it in q.items]
+    t0 = time.perf_counter()
+    try:
+        results = pipeline.run_batch(queries, rerank=rerank, rerank_budget_ms=rerank_budget_ms)
+    except BackendNotReadyError as exc:
+        raise HTTPException(503, str(exc), {"Retry-After": "5"}) from exc
+    chunked = retriever.chunks is not None
+    return BatchQueryOut(
+        results=[to_query_out(result, chunked=chunked) for result in results],
+        latency_ms=round((time.perf_counter() - t0) * 1000.0, 1),
+    )
+
+
+def to_hits(result: Dict, chunked: bool) -> List[Hit]:
+    """Zip a pipeline result's tuple hits and spans into `Hit` models.
+
+    The pipeline resolves hits and spans together and drops hits whose unit
+    was deleted after retrieval, so the two lists always have the same length.
+
+    Args:
+      result: Pipeline result or "hits" stream event (with "hits" and "spans").
+      chunked: Whether hits are passages (set `chunk_id`) or whole documents.
+
+    Returns:
+      List[Hit]: Structured hits, best first.
+    """
+    return [
+        Hit(doc_id=doc_id, chunk_id=unit_id if chunked else None, start=start, end=end, score=score)
+        for (unit_id, score), (doc_id, start, end) in zip(
+            result["hits"], result["spans"], strict=True
+        )
+    ]
+
+
+def to_query_out(result: Dict, chunked: bool) -> QueryOut:
+    """Convert a pipeline result (tuple hits + spans) into the response model.
+
+    Args:
+      result: Dict returned by `RAGPipeline.run` / `arun` / `run_batch`.
+      chunked: Whether hits are passages (set `chunk_id`) or whole documents.
+
+    Returns:
+      QueryOut: Structured response.
+    """
     return QueryOut(
         answer=result["answer"],
         variant=result["variant"],
         k=result["k"],
-        hits=hits_struct,
+        hits=to_hits(result, chunked),
+        reranked=result["reranked"],
+        cached=result["cached"],
         latency_ms=result["latency_ms"],
     )
-
@@ -14,10 +14,12 @@ Example:
   from src.config import settings
   uri = settings.NEO4J_URI
 """
+
 from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+from typing import Tuple
 
 
 @dataclass(frozen=True)
@@ -38,6 +40,46 @@ class Settings:
       NEO4J_PASSWORD: Neo4j password.
 
       MLFLOW_TRACKING_URI: MLflow tracking server URI.
+
+      BM25_INDEX_DIR: Directory of a prebuilt BM25 index (optional; built from
+        the corpus at startup when unset or missing).
+      FAISS_INDEX_DIR: Directory of a prebuilt vector store (optional; loaded
+        when its manifest matches the model, index kind and corpus).
+      FAISS_MMAP: Memory-map the prebuilt FAISS index read-only.
+      VECTOR_INDEX: Dense index kind: "flat" (exact), "hnsw", "ivf" or "ivfpq".
+      DENSE_BATCH_MAX_SIZE: Max concurrent dense queries per micro-batch (1, the
+        default, disables). Batches are fed by the `PIPELINE_CPU_WORKERS` threads,
+        so they must be sized together: at most `PIPELINE_CPU_WORKERS`.
+      DENSE_BATCH_MAX_WAIT_MS: Max time a dense query waits for its batch to fill.
+      EMBED_CACHE_DIR: Root of the persistent document-embedding cache
+        (optional; documents are always encoded when unset).
+      QUERY_CACHE_SIZE: Capacity of the in-memory query-embedding LRU (0 disables).
+      WARMUP_BM25_FIRST: Serve variant "A" while the dense model is still loading.
+      PRELOAD_INDEX: Build backends once in the gunicorn master and share them
+        with forked workers (see `gunicorn.conf.py`).
+      ENCODER_BACKEND: Dense encoder runtime: "torch" or "onnx".
+      ONNX_MODEL_DIR: Export directory of `scripts/export_onnx.py` (for "onnx").
+      ONNX_INT8: Use the dynamically int8-quantized ONNX graph.
+      HYBRID_FUSION: Variant "H" fusion: "rrf" or "weighted" (min-max normalized).
+      HYBRID_WEIGHTS: (lexical, dense) fusion weights, from "w_lex,w_dense".
+      HYBRID_DEPTH: Candidates fetched per branch before fusion.
+      HYBRID_WORKERS: Threads per worker running the dense branch of variant "H".
+      RERANK_MODEL: Cross-encoder used by `/query?rerank=true` (loaded on first use).
+      RERANK_CANDIDATES: First-stage hits re-scored by the cross-encoder.
+      RERANK_BUDGET_MS: Default latency budget of the re-rank stage (0 = unbounded).
+      RERANK_CACHE_SIZE: Capacity of the in-memory (query, passage) score cache.
+      CHUNK_TOKENS: Words per indexed passage (0 indexes whole documents).
+      CHUNK_OVERLAP: Words shared by consecutive passages of a long section.
+      CHUNK_HEADINGS: Start passages at Markdown headings.
+      RESPONSE_CACHE: Full-response cache backend: "off", "memory" (per process)
+        or "sqlite" (shared by the workers on a host).
+      RESPONSE_CACHE_MAX_MB: Size bound of the response cache.
+      RESPONSE_CACHE_TTL_S: Lifetime of cached responses in seconds (0 = no TTL).
+      RESPONSE_CACHE_PATH: Database file of the "sqlite" response cache.
+      QUERY_COALESCE: Run concurrent identical `/query` requests once (single-flight).
+      PIPELINE_CPU_WORKERS: Threads per worker running the CPU-bound stages
+        (encoding, search, re-ranking) of async `/query` requests.
+      QUERY_BATCH_MAX_ITEMS: Largest number of questions accepted by `/query/batch`.
     """
 
     # LLM (optional)
@@ -58,6 +100,39 @@ class Settings:
     # MLflow
     MLFLOW_TRACKING_URI: str
 
+    # Retrieval artifacts (optional)
+    BM25_INDEX_DIR: str | None
+    FAISS_INDEX_DIR: str | None
+    FAISS_MMAP: bool
+    VECTOR_INDEX: str
+    DENSE_BATCH_MAX_SIZE: int
+    DENSE_BATCH_MAX_WAIT_MS: float
+    EMBED_CACHE_DIR: str | None
+    QUERY_CACHE_SIZE: int
+    WARMUP_BM25_FIRST: bool
+    PRELOAD_INDEX: bool
+    ENCODER_BACKEND: str
+    ONNX_MODEL_DIR: str | None
+    ONNX_INT8: bool
+    HYBRID_FUSION: str
+    HYBRID_WEIGHTS: Tuple[float, float]
+    HYBRID_DEPTH: int
+    HYBRID_WORKERS: int
+    RERANK_MODEL: str
+    RERANK_CANDIDATES: int
+    RERANK_BUDGET_MS: float
+    RERANK_CACHE_SIZE: int
+    CHUNK_TOKENS: int
+    CHUNK_OVERLAP: int
+    CHUNK_HEADINGS: bool
+    RESPONSE_CACHE: str
+    RESPONSE_CACHE_MAX_MB: float
+    RESPONSE_CACHE_TTL_S: float
+    RESPONSE_CACHE_PATH: str
+    QUERY_COALESCE: bool
+    PIPELINE_CPU_WORKERS: int
+    QUERY_BATCH_MAX_ITEMS: int
+
     def validate(self) -> "Settings":
         """Perform lightweight validation to catch common misconfigurations.
 
@@ -67,12 +142,42 @@ class Settings:
         Raises:
           ValueError: If `LOG_LEVEL` is not one of {"DEBUG","INFO","WARN","ERROR"}.
           ValueError: If `NEO4J_URI` does not start with "bolt://" or "neo4j://".
+          ValueError: If `VECTOR_INDEX` is not a known index kind.
+          ValueError: If `ENCODER_BACKEND` is unknown, or "onnx" without `ONNX_MODEL_DIR`.
+          ValueError: If `HYBRID_FUSION` is unknown or `HYBRID_WEIGHTS` is not two floats.
+          ValueError: If `RERANK_CANDIDATES` < 1 or `RERANK_BUDGET_MS` < 0.
+          ValueError: If `CHUNK_OVERLAP` is not in [0, CHUNK_TOKENS) when chunking.
+          ValueError: If `RESPONSE_CACHE` is not one of {"off","memory","sqlite"}.
+          ValueError: If `DENSE_BATCH_MAX_SIZE` exceeds `PIPELINE_CPU_WORKERS` (a
+            batch that large could never fill, yet every query would wait for it).
         """
         lvl = self.LOG_LEVEL.upper()
         if lvl not in {"DEBUG", "INFO", "WARN", "ERROR"}:
             raise ValueError(f"Invalid LOG_LEVEL: {self.LOG_LEVEL}")
         if not self.NEO4J_URI.startswith(("bolt://", "neo4j://")):
             raise ValueError("NEO4J_URI must start with bolt:// or neo4j://")
+        if self.VECTOR_INDEX not in {"flat", "hnsw", "ivf", "ivfpq"}:
+            raise ValueError(f"Invalid VECTOR_INDEX: {self.VECTOR_INDEX}")
+        if self.ENCODER_BACKEND not in {"torch", "onnx"}:
+            raise ValueError(f"Invalid ENCODER_BACKEND: {self.ENCODER_BACKEND}")
+        if self.ENCODER_BACKEND == "onnx" and not self.ONNX_MODEL_DIR:
+            raise ValueError("ENCODER_BACKEND=onnx requires ONNX_MODEL_DIR")
+        if self.HYBRID_FUSION not in {"rrf", "weighted"}:
+            raise ValueError(f"Invalid HYBRID_FUSION: {self.HYBRID_FUSION}")
+        if len(self.HYBRID_WEIGHTS) != 2:
+            raise ValueError("HYBRID_WEIGHTS must be two comma-separated floats")
+        if self.RERANK_CANDIDATES < 1 or self.RERANK_BUDGET_MS < 0:
+            raise ValueError("RERANK_CANDIDATES must be >= 1 and RERANK_BUDGET_MS >= 0")
+        if self.CHUNK_TOKENS > 0 and not 0 <= self.CHUNK_OVERLAP < self.CHUNK_TOKENS:
+            raise ValueError("CHUNK_OVERLAP must be >= 0 and < CHUNK_TOKENS")
+        if self.RESPONSE_CACHE not in {"off", "memory", "sqlite"}:
+            raise ValueError(f"Invalid RESPONSE_CACHE: {self.RESPONSE_CACHE}")
+        if self.HYBRID_WORKERS < 1 or self.PIPELINE_CPU_WORKERS < 1:
+            raise ValueError("HYBRID_WORKERS and PIPELINE_CPU_WORKERS must be >= 1")
+        if self.DENSE_BATCH_MAX_SIZE > self.PIPELINE_CPU_WORKERS:
+            raise ValueError("DENSE_BATCH_MAX_SIZE must be <= PIPELINE_CPU_WORKERS")
+        if self.QUERY_BATCH_MAX_ITEMS < 1:
+            raise ValueError("QUERY_BATCH_MAX_ITEMS must be >= 1")
         return self
 
 
@@ -85,7 +190,14 @@ def load_settings() -> Settings:
 
     Returns:
       Settings: A validated `Settings` instance loaded from the environment.
+
+    Raises:
+      ValueError: If `HYBRID_WEIGHTS` is not two comma-separated floats.
     """
+    weights = os.getenv("HYBRID_WEIGHTS", "1,1").split(",")
+    if len(weights) != 2:
+        raise ValueError("HYBRID_WEIGHTS must be two comma-separated floats")
+    w_lex, w_dense = float(weights[0]), float(weights[1])
     return Settings(
         LLM_MODEL=os.getenv("LLM_MODEL"),
         LLM_API_BASE=os.getenv("LLM_API_BASE"),
@@ -97,6 +209,37 @@ def load_settings() -> Settings:
         NEO4J_USER=os.getenv("NEO4J_USER", "neo4j"),
         NEO4J_PASSWORD=os.getenv("NEO4J_PASSWORD", "test"),
         MLFLOW_TRACKING_URI=os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000"),
+        BM25_INDEX_DIR=os.getenv("BM25_INDEX_DIR"),
+        FAISS_INDEX_DIR=os.getenv("FAISS_INDEX_DIR"),
+        FAISS_MMAP=os.getenv("FAISS_MMAP", "false").lower() in {"1", "true", "yes"},
+        VECTOR_INDEX=os.getenv("VECTOR_INDEX", "flat"),
+        DENSE_BATCH_MAX_SIZE=int(os.getenv("DENSE_BATCH_MAX_SIZE", "1")),
+        DENSE_BATCH_MAX_WAIT_MS=float(os.getenv("DENSE_BATCH_MAX_WAIT_MS", "2")),
+        EMBED_CACHE_DIR=os.getenv("EMBED_CACHE_DIR") or None,
+        QUERY_CACHE_SIZE=int(os.getenv("QUERY_CACHE_SIZE", "1024")),
+        WARMUP_BM25_FIRST=os.getenv("WARMUP_BM25_FIRST", "true").lower() in {"1", "true", "yes"},
+        PRELOAD_INDEX=os.getenv("PRELOAD_INDEX", "false").lower() in {"1", "true", "yes"},
+        ENCODER_BACKEND=os.getenv("ENCODER_BACKEND", "torch"),
+        ONNX_MODEL_DIR=os.getenv("ONNX_MODEL_DIR") or None,
+        ONNX_INT8=os.getenv("ONNX_INT8", "false").lower() in {"1", "true", "yes"},
+        HYBRID_FUSION=os.getenv("HYBRID_FUSION", "rrf"),
+        HYBRID_WEIGHTS=(w_lex, w_dense),
+        HYBRID_DEPTH=int(os.getenv("HYBRID_DEPTH", "50")),
+        HYBRID_WORKERS=int(os.getenv("HYBRID_WORKERS", "4")),
+        RERANK_MODEL=os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+        RERANK_CANDIDATES=int(os.getenv("RERANK_CANDIDATES", "30")),
+        RERANK_BUDGET_MS=float(os.getenv("RERANK_BUDGET_MS", "0")),
+        RERANK_CACHE_SIZE=int(os.getenv("RERANK_CACHE_SIZE", "8192")),
+        CHUNK_TOKENS=int(os.getenv("CHUNK_TOKENS", "0")),
+        CHUNK_OVERLAP=int(os.getenv("CHUNK_OVERLAP", "32")),
+        CHUNK_HEADINGS=os.getenv("CHUNK_HEADINGS", "true").lower() in {"1", "true", "yes"},
+        RESPONSE_CACHE=os.getenv("RESPONSE_CACHE", "memory"),
+        RESPONSE_CACHE_MAX_MB=float(os.getenv("RESPONSE_CACHE_MAX_MB", "64")),
+        RESPONSE_CACHE_TTL_S=float(os.getenv("RESPONSE_CACHE_TTL_S", "300")),
+        RESPONSE_CACHE_PATH=os.getenv("RESPONSE_CACHE_PATH", "data/.response_cache.sqlite"),
+        QUERY_COALESCE=os.getenv("QUERY_COALESCE", "true").lower() in {"1", "true", "yes"},
+        PIPELINE_CPU_WORKERS=int(os.getenv("PIPELINE_CPU_WORKERS", "4")),
+        QUERY_BATCH_MAX_ITEMS=int(os.getenv("QUERY_BATCH_MAX_ITEMS", "256")),
     ).validate()
 
 
@@ -1,13 +1,38 @@
-"""Guardrail policy utilities for minimal PII masking.
+r"""Guardrail policy utilities for minimal PII masking.
 
 This module provides a conservative, dependency-free PII masking helper and a
 small policy engine with pre-/post-processing hooks. It is intentionally
 limited to avoid over-matching and breaking answers. For production, prefer
-explicit allow-lists and audited regexes, and extend patterns (e.g., IBAN,
-phone) only after evaluation on real data.
+explicit allow-lists and audited regexes, and extend detectors (e.g., phone)
+only after evaluation on real data.
+
+Strategy:
+  `PiiEngine` merges every category pattern into one alternation of named
+  groups, so a text is scanned once however many categories are enabled
+  (sequential `re.sub` calls cost one full pass per pattern). The matching
+  group names the category, which selects its replacement token. Where
+  categories overlap at one position, the earlier category wins; replaced
+  text is never rescanned.
+
+  PII values are whole tokens: a match starts at the beginning of the text
+  or right after a non-word character. The combined pattern therefore opens
+  with that non-word character (`\W`), which lets the regex engine skip
+  from one non-word character to the next instead of trying every
+  alternative at every position inside words.
+
+  Each category is a `Detector` with three stages of increasing cost:
+    1. prefilter: literals every match contains (`"@"`, any ASCII digit),
+       found by substring search at memchr speed. Categories whose prefilter
+       fails are left out of the combined pattern (compiled once per
+       combination), and a text no prefilter accepts is not scanned at all,
+       so PII-free text costs a few substring searches;
+    2. the combined regex, which yields candidates;
+    3. validator: a checksum on each candidate (Luhn for cards, mod-97 for
+       IBANs). Rejected candidates, such as order ids of card length, stay
+       unmasked.
 
 Example:
-  from src.guardrails.policy import PolicyEngine
+  from src.guardrails.policy import PiiEngine, PolicyEngine
 
   engine = PolicyEngine()
   safe_q = engine.pre_enforce("Email me at alice@example.com")
@@ -15,33 +40,305 @@ Example:
 
   safe_a = engine.post_enforce("Contact: 4111111111111111")
   # -> "Contact: [REDACTED]"
+
+  masker = engine.post_enforcer()  # incremental, for streamed answers
+  out = masker.feed("Card: 4111") + masker.feed("111111111111, ok") + masker.flush()
+  # -> "Card: [REDACTED], ok" ("Card: " is released before the number completes)
+
+  pii = PiiEngine(replacements={"email": "[EMAIL]"})
+  pii.mask("bob@example.com / 4111111111111111")  # -> "[EMAIL] / [REDACTED]"
+  pii.mask("IBAN DE89370400440532013000, order 1234567890123456")
+  # -> "IBAN [REDACTED], order 1234567890123456" (fails the Luhn check)
+  pii.scan("bob@example.com")  # -> [PiiMatch(category='email', start=0, end=15)]
 """
+
 from __future__ import annotations
 
 import re
-from typing import Iterable
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Tuple
+
+# Luhn: value of a doubled digit (digit sums of 0, 2, ..., 18).
+_LUHN_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+
+def luhn_valid(number: str) -> bool:
+    """Whether a digit string passes the Luhn checksum (payment card numbers)."""
+    odd = sum(int(c) for c in number[-1::-2])
+    even = sum(_LUHN_DOUBLED[int(c)] for c in number[-2::-2])
+    return (odd + even) % 10 == 0
+
+
+def iban_valid(iban: str) -> bool:
+    """Whether a compact IBAN passes the ISO 13616 mod-97 check."""
+    rotated = iban[4:] + iban[:4]
+    return int("".join(str(int(c, 36)) for c in rotated)) % 97 == 1
+
+
+@dataclass(frozen=True)
+class Detector:
+    r"""One PII category: prefilter, regex candidates, then a validator.
+
+    Attributes:
+      category: Category name (a valid regex group name).
+      pattern: Candidate pattern (source or compiled); must not define named
+        groups of its own.
+      prefilter: Cheap necessary condition for any match in a text: a literal
+        substring (`"@"`), a tuple of literals of which one must occur, or a
+        pattern searched in it. When it fails, the category is left out of
+        the scan. None = always scan. Literals are searched at memchr
+        speed; a pattern search costs about as much as the scan itself.
+      validator: Check on the matched text (e.g. a checksum); candidates it
+        rejects stay unmasked. None = every candidate is PII.
+    """
+
+    category: str
+    pattern: str | re.Pattern[str]
+    prefilter: str | Tuple[str, ...] | re.Pattern[str] | None = None
+    validator: Callable[[str], bool] | None = None
+
+    def validate(self) -> None:
+        """Raise ValueError if the detector cannot be compiled into an engine."""
+        if not self.category.isidentifier():
+            raise ValueError(f"Invalid PII category name: {self.category!r}")
+        if not _source(self.pattern):
+            raise ValueError(f"Empty pattern for PII category {self.category!r}")
+        literals = self.prefilter if isinstance(self.prefilter, tuple) else (self.prefilter,)
+        if self.prefilter is not None and not all(isinstance(p, re.Pattern) or p for p in literals):
+            raise ValueError(f"Empty prefilter for PII category {self.category!r}")
+
+
+# Prefilter of categories that contain a digit.
+ASCII_DIGITS: Tuple[str, ...] = tuple("0123456789")
+
+# Default detectors, in priority order. Patterns stay conservative; numbers
+# and IBANs are only reported when their checksum holds.
+PII_DETECTORS: Tuple[Detector, ...] = (
+    Detector("email", r"\b\w+@\w+\.[A-Za-z]{2,}\b", prefilter="@"),
+    Detector(
+        "iban",
+        r"\b[A-Z]{2}[0-9]{2}[A-Z0-9]{11,30}\b",
+        prefilter=ASCII_DIGITS,
+        validator=iban_valid,
+    ),
+    Detector(
+        "card",
+        r"\b[0-9]{13,19}\b",  # ISO/IEC 7812 card number lengths
+        prefilter=ASCII_DIGITS,
+        validator=luhn_valid,
+    ),
+)
+
+# Category -> candidate pattern of the default detectors.
+PII_CATEGORIES: Dict[str, str | re.Pattern[str]] = {d.category: d.pattern for d in PII_DETECTORS}
+
+# The same patterns, compiled one by one (kept for callers of `mask_pii`).
+# They carry no validators: `mask_pii` maps this exact list back to the
+# default detectors, so `mask_pii(t, PII_PATTERNS) == mask_pii(t)`.
+PII_PATTERNS: list[re.Pattern[str]] = [re.compile(src) for src in PII_CATEGORIES.values()]
+
+# One character that no PII match can contain (keep in sync when adding
+# categories). Streamed text before such a character is final.
+PII_STREAM_BOUNDARY: re.Pattern[str] = re.compile(r"[^\w@.]")
+
+DEFAULT_TOKEN = "[REDACTED]"
+
+_INLINE_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x"))
+
+
+class PiiMatch(NamedTuple):
+    """One PII occurrence: category and [start, end) character offsets."""
+
+    category: str
+    start: int
+    end: int
+
+
+def _source(pattern: str | re.Pattern[str]) -> str:
+    """Regex source of `pattern`, with its flags scoped inline (for alternation)."""
+    if isinstance(pattern, str):
+        return pattern
+    flags = "".join(c for flag, c in _INLINE_FLAGS if pattern.flags & flag)
+    return f"(?{flags}:{pattern.pattern})" if flags else pattern.pattern
+
+
+def _has_literal(literal: str, text: str) -> bool:
+    """Literal prefilter: `literal` occurs in `text`."""
+    return literal in text
+
+
+def _has_any_literal(literals: Tuple[str, ...], text: str) -> bool:
+    """Literal-set prefilter: one of `literals` occurs in `text`."""
+    return any(literal in text for literal in literals)
 
 
-# Minimal patterns (intentionally conservative; avoid over-matching)
-PII_PATTERNS: list[re.Pattern[str]] = [
-    re.compile(r"\b\d{13,16}\b"),                 # simplistic card-like numbers
-    re.compile(r"\b\w+@\w+\.[A-Za-z]{2,}\b"),     # basic emails
-]
+class PiiEngine:
+    r"""Single-pass PII detector and masker over prefiltered, validated detectors.
 
+    Only matches that start at the beginning of the text or right after a
+    non-word character are found (patterns starting with `\b\w` or a
+    non-word literal such as `\+` already behave this way). Patterns should
+    also end on a word character, so that the next token can start a match.
 
-def mask_pii(text: str, patterns: Iterable[re.Pattern[str]] = PII_PATTERNS) -> str:
+    A candidate rejected by its validator is left as is; lower-priority
+    categories are not retried at its position.
+
+    Args:
+      detectors: Detectors in priority order, or a mapping category name ->
+        pattern (source or compiled) for detectors without prefilter and
+        validator.
+      replacements: Category -> replacement token; others use `default_token`.
+      default_token: Replacement for categories without their own token.
+      boundary: Single non-word character that no match can contain (used by
+        `StreamMasker`).
+
+    Raises:
+      ValueError: If no detector is given or a detector is invalid.
+    """
+
+    def __init__(
+        self,
+        detectors: Iterable[Detector] | Mapping[str, str | re.Pattern[str]] = PII_DETECTORS,
+        replacements: Mapping[str, str] | None = None,
+        default_token: str = DEFAULT_TOKEN,
+        boundary: re.Pattern[str] = PII_STREAM_BOUNDARY,
+    ) -> None:
+        if isinstance(detectors, Mapping):
+            detectors = [Detector(name, p) for name, p in detectors.items()]
+        self.detectors = list(detectors)
+        if not self.detectors:
+            raise ValueError("PiiEngine needs at least one detector")
+        for detector in self.detectors:
+            detector.validate()
+        self.categories = [d.category for d in self.detectors]
+        self.boundary = boundary
+        self.tokens = dict.fromkeys(self.categories, default_token)
+        self.tokens.update(replacements or {})
+        self._validators = {d.category: d.validator for d in self.detectors if d.validator}
+        # Bit i stands for detector i; categories without a prefilter are
+        # always scanned.
+        self._always = 0
+        self._prefilters: List[Tuple[int, Callable[[str], object]]] = []
+        for i, d in enumerate(self.detectors):
+            if d.prefilter is None:
+                self._always |= 1 << i
+            elif isinstance(d.prefilter, str):
+                self._prefilters.append((1 << i, partial(_has_literal, d.prefilter)))
+            elif isinstance(d.prefilter, tuple):
+                self._prefilters.append((1 << i, partial(_has_any_literal, d.prefilter)))
+            else:
+                self._prefilters.append((1 << i, d.prefilter.search))
+        self._regexes: Dict[int, re.Pattern[str]] = {}
+        self.regex = self._compile((1 << len(self.detectors)) - 1)
+
+    def _compile(self, active: int) -> re.Pattern[str]:
+        """Combined pattern over the detectors whose bit is set in `active`."""
+        alternation = "|".join(
+            f"(?P<{d.category}>{_source(d.pattern)})"
+            for i, d in enumerate(self.detectors)
+            if active >> i & 1
+        )
+        # Group 1 is the non-word character before the match (a leading " " is
+        # added to the text for matches at its start); the category group
+        # closes last, so `lastgroup` names the category.
+        regex = re.compile(rf"(\W)(?:{alternation})")
+        self._regexes[active] = regex
+        return regex
+
+    def _regex_for(self, text: str) -> re.Pattern[str] | None:
+        """Combined pattern of the detectors whose prefilter passes (None: no scan)."""
+        active = self._always
+        for bit, prefilter in self._prefilters:
+            if prefilter(text):
+                active |= bit
+        if not active:
+            return None
+        return self._regexes.get(active) or self._compile(active)
+
+    @staticmethod
+    def _category(match: re.Match[str]) -> str:
+        """Category of a combined-pattern match (the last group to close)."""
+        category = match.lastgroup
+        assert category is not None  # every alternative is a named group
+        return category
+
+    def _accept(self, match: re.Match[str]) -> bool:
+        """Whether a candidate passes its category's validator."""
+        category = self._category(match)
+        validator = self._validators.get(category)
+        return validator is None or validator(match.group(category))
+
+    def _token(self, match: re.Match[str]) -> str:
+        """The lead character and the category's token (the match itself if rejected)."""
+        category = self._category(match)
+        validator = self._validators.get(category)
+        if validator is not None and not validator(match.group(category)):
+            return match.group(0)
+        return match.group(1) + self.tokens[category]
+
+    def mask(self, text: str) -> str:
+        """Replace every validated match with its category's token (one scan)."""
+        regex = self._regex_for(text)
+        if regex is None:
+            return text
+        return regex.sub(self._token, " " + text)[1:]
+
+    def scan(self, text: str) -> List[PiiMatch]:
+        """All validated matches, left to right, with their category."""
+        regex = self._regex_for(text)
+        if regex is None:
+            return []
+        out = []
+        for m in regex.finditer(" " + text):
+            if self._accept(m):
+                category = self._category(m)
+                out.append(PiiMatch(category, m.start(category) - 1, m.end() - 1))
+        return out
+
+    def mask_and_count(self, text: str) -> Tuple[str, Dict[str, int]]:
+        """Masked text and the number of matches per category (for audit logs)."""
+        counts: Dict[str, int] = {}
+        regex = self._regex_for(text)
+        if regex is None:
+            return text, counts
+
+        def repl(match: re.Match[str]) -> str:
+            if not self._accept(match):
+                return match.group(0)
+            category = self._category(match)
+            counts[category] = counts.get(category, 0) + 1
+            return match.group(1) + self.tokens[category]
+
+        return regex.sub(repl, " " + text)[1:], counts
+
+
+DEFAULT_PII_ENGINE = PiiEngine()
+
+
+@lru_cache(maxsize=32)
+def _engine_for(patterns: Tuple[re.Pattern[str] | Detector, ...]) -> PiiEngine:
+    """Combined engine for an explicit pattern list (bare patterns become p0, p1, ...)."""
+    return PiiEngine(
+        [p if isinstance(p, Detector) else Detector(f"p{i}", p) for i, p in enumerate(patterns)]
+    )
+
+
+def mask_pii(text: str, patterns: Iterable[re.Pattern[str] | Detector] = PII_PATTERNS) -> str:
     """Mask known PII occurrences within a string.
 
-    Applies each regex pattern sequentially and replaces matches with
-    the placeholder "[REDACTED]". Designed to be conservative and fast.
+    Scans the text once with `DEFAULT_PII_ENGINE` (or a combined engine built
+    from `patterns`) and replaces matches with the placeholder "[REDACTED]".
 
     Args:
       text: Input text possibly containing PII.
-      patterns: Iterable of compiled regex patterns to apply. Defaults to
-        `PII_PATTERNS`.
+      patterns: Compiled regex patterns (every match is PII) or `Detector`s
+        (prefilters and validators apply); earlier entries win where matches
+        overlap. Defaults to `PII_PATTERNS`, which stands for the default
+        detectors, validators included.
 
     Returns:
-      The input text with all pattern matches replaced by "[REDACTED]".
+      The input text with all matches replaced by "[REDACTED]".
 
     Examples:
       >>> mask_pii("Card: 4111111111111111")
@@ -49,10 +346,55 @@ def mask_pii(text: str, patterns: Iterable[re.Pattern[str]] = PII_PATTERNS) -> s
       >>> mask_pii("alice@example.com")
       '[REDACTED]'
     """
-    out = text
-    for p in patterns:
-        out = p.sub("[REDACTED]", out)
-    return out
+    if patterns is PII_PATTERNS or patterns is PII_DETECTORS:
+        return DEFAULT_PII_ENGINE.mask(text)
+    return _engine_for(tuple(patterns)).mask(text)
+
+
+class StreamMasker:
+    r"""Incremental `PiiEngine.mask` for text that arrives in chunks.
+
+    A match can only continue into the next chunk through the trailing run
+    of characters a match may contain (`[\w@.]` for the default categories,
+    e.g. a partial card number or email). Everything up to the last `boundary`
+    character is final: it is masked and released at once, and only that
+    trailing run is held back until more text (or `flush()`) arrives. The
+    concatenated output equals `engine.mask` of the concatenated input.
+
+    Each chunk is scanned once (the held run never contains a boundary), so
+    the cost is linear in the stream length. A stream without any boundary
+    character is held entirely until `flush()`.
+
+    Args:
+      engine: Masking engine; its `boundary` must match only non-word
+        characters that no match can contain (so `\b` and matches behave the
+        same on both sides of the cut).
+    """
+
+    def __init__(self, engine: PiiEngine = DEFAULT_PII_ENGINE) -> None:
+        self.engine = engine
+        self.boundary = engine.boundary
+        self._held = ""
+
+    @property
+    def pending(self) -> int:
+        """Number of characters held back."""
+        return len(self._held)
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk; return the masked text that can no longer change (may be "")."""
+        last = self.boundary.search(chunk[::-1])  # first from the end
+        if last is None:
+            self._held += chunk
+            return ""
+        cut = len(chunk) - last.start()
+        ready, self._held = self._held + chunk[:cut], chunk[cut:]
+        return self.engine.mask(ready)
+
+    def flush(self) -> str:
+        """End of stream: mask and return the held-back tail."""
+        tail, self._held = self._held, ""
+        return self.engine.mask(tail)
 
 
 class PolicyEngine:
@@ -68,17 +410,21 @@ class PolicyEngine:
     Attributes:
       allow_llm_judge: Whether an upstream LLM-as-judge step would be allowed
         (placeholder flag; not used in this demo policy).
+      pii: PII engine used to mask questions and answers.
 
     """
 
-    def __init__(self, allow_llm_judge: bool = True) -> None:
+    def __init__(self, allow_llm_judge: bool = True, pii: PiiEngine | None = None) -> None:
         """Initialize the policy engine.
 
         Args:
           allow_llm_judge: Enables/disables optional LLM-as-judge logic
             (not implemented in this minimal demo).
+          pii: PII engine (categories, replacement tokens); defaults to
+            `DEFAULT_PII_ENGINE`.
         """
         self.allow_llm_judge = allow_llm_judge
+        self.pii = pii or DEFAULT_PII_ENGINE
 
     def pre_enforce(self, question: str) -> str:
         """Apply policies before retrieval/generation.
@@ -96,7 +442,7 @@ class PolicyEngine:
           >>> PolicyEngine().pre_enforce("Mail me: bob@example.com")
           'Mail me: [REDACTED]'
         """
-        return mask_pii(question)
+        return self.pii.mask(question)
 
     def post_enforce(self, answer: str) -> str:
         """Apply policies after generation.
@@ -114,5 +460,12 @@ class PolicyEngine:
           >>> PolicyEngine().post_enforce("Card: 5555555555554444")
           'Card: [REDACTED]'
         """
-        return mask_pii(answer)
+        return self.pii.mask(answer)
+
+    def post_enforcer(self) -> StreamMasker:
+        """Incremental `post_enforce` for one streamed answer.
 
+        Returns:
+          A fresh `StreamMasker`; feed it answer chunks, then flush it.
+        """
+        return StreamMasker(self.pii)
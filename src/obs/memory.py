@@ -0,0 +1,49 @@
+"""Per-process memory accounting (Linux `/proc`).
+
+Design:
+- RSS counts every resident page a process maps, so pages shared with the
+  gunicorn master (copy-on-write heap, mmapped index files, model weights)
+  are counted once per worker and RSS sums overstate real usage.
+- PSS (proportional set size) splits each shared page between its sharers;
+  the sum of PSS over master + workers is the real footprint. `private` is
+  what a worker costs on its own (USS).
+- Fails soft: returns an empty dict where `/proc/<pid>/smaps_rollup` is missing.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict
+
+# smaps_rollup field -> reported key (values in KiB)
+_FIELDS = {
+    "Rss": "rss_kb",
+    "Pss": "pss_kb",
+    "Shared_Clean": "shared_clean_kb",
+    "Shared_Dirty": "shared_dirty_kb",
+    "Private_Clean": "private_clean_kb",
+    "Private_Dirty": "private_dirty_kb",
+}
+
+
+def process_memory(pid: int | str = "self") -> Dict[str, int]:
+    """Resident memory breakdown of a process.
+
+    Args:
+      pid: Process ID (defaults to the calling process).
+
+    Returns:
+      Dict with rss_kb, pss_kb, shared_*_kb, private_*_kb and private_kb
+      (clean + dirty); empty if the kernel does not expose smaps_rollup.
+    """
+    try:
+        text = Path(f"/proc/{pid}/smaps_rollup").read_text()
+    except OSError:
+        return {}
+    out: Dict[str, int] = {}
+    for line in text.splitlines():
+        name, _, rest = line.partition(":")
+        if name in _FIELDS:
+            out[_FIELDS[name]] = int(rest.split()[0])
+    out["private_kb"] = out.get("private_clean_kb", 0) + out.get("private_dirty_kb", 0)
+    return out
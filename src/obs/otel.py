@@ -5,6 +5,7 @@ Design:
 - Emit Prometheus-scrapeable metrics via the Collector (rag_requests_total, rag_latency_ms).
 - Fail OPEN: if the collector is unreachable, keep the app running with no-op providers.
 """
+
 from __future__ import annotations
 from opentelemetry import trace, metrics
 from opentelemetry.sdk.resources import Resource
@@ -46,3 +47,24 @@ except Exception:
 rag_requests_total = meter.create_counter("rag_requests_total")
 rag_latency_ms = meter.create_histogram("rag_latency_ms")
 
+# Micro-batching (see src/pipelines/batching.py), tagged with the batcher name
+batch_size = meter.create_histogram("rag_batch_size")
+batch_queue_delay_ms = meter.create_histogram("rag_batch_queue_delay_ms")
+
+# Embedding caches (see src/pipelines/embed_cache.py), tagged cache="docs" | "query"
+embedding_cache_hits_total = meter.create_counter("rag_embedding_cache_hits_total")
+embedding_cache_misses_total = meter.create_counter("rag_embedding_cache_misses_total")
+
+# Cross-encoder re-ranking (see src/pipelines/rerank.py), pairs tagged source="cache" | "model"
+rerank_pairs_total = meter.create_counter("rag_rerank_pairs_total")
+rerank_candidates = meter.create_histogram("rag_rerank_candidates")
+
+# Full-response cache (see src/pipelines/response_cache.py), tagged with the backend name
+response_cache_hits_total = meter.create_counter("rag_response_cache_hits_total")
+response_cache_misses_total = meter.create_counter("rag_response_cache_misses_total")
+
+# Single-flight (see src/pipelines/singleflight.py): callers that shared an in-flight execution
+coalesced_requests_total = meter.create_counter("rag_coalesced_requests_total")
+
+# Streaming answers (see RAGPipeline.astream): request start -> hits event sent
+stream_time_to_hits_ms = meter.create_histogram("rag_stream_time_to_hits_ms")
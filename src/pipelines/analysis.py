@@ -0,0 +1,167 @@
+"""Text analysis (tokenization) shared by lexical indexing and querying.
+
+Overview:
+  BM25 quality depends on index-time and query-time tokens agreeing exactly.
+  `Analyzer` is the single place that turns text into tokens; `Retriever`
+  uses the same instance to build the index and to analyze queries.
+
+Strategy:
+  - Tokens are maximal runs of Unicode letters/digits (punctuation, symbols
+    and underscores separate tokens).
+  - Fast path: ASCII text (the common case) goes through one `bytes.translate`
+    pass that folds case and maps separators to spaces, then C-level
+    `str.split`. Other text uses one compiled-regex `findall`. No per-token
+    Python work unless stopwords or stemming are enabled.
+  - Stopwords: optional frozenset filter.
+  - Stemming: optional `str -> str` callable (`s_stem`, a light English
+    plural stripper, is provided; plug in Snowball/Porter if needed).
+  - Query tokens are memoized in a per-instance (per-process) LRU cache,
+    since production traffic repeats the same questions.
+  - `spec` is a JSON-able description persisted with on-disk indexes so a
+    stale index built with different analysis settings can be detected.
+
+Example:
+  analyzer = Analyzer(stopwords=ENGLISH_STOPWORDS)
+  analyzer("What's the GDPR policy?")  # ['s', 'gdpr', 'policy']
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+from typing import Any, Callable, Dict, FrozenSet, List, Tuple
+
+# Small, conservative English stopword list (articles, pronouns, auxiliaries).
+# fmt: off
+ENGLISH_STOPWORDS: FrozenSet[str] = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "has", "have",
+    "how", "i", "in", "is", "it", "its", "of", "on", "or", "so", "that", "the", "their",
+    "there", "these", "this", "to", "was", "we", "were", "what", "when", "where", "which",
+    "who", "why", "will", "with", "you", "your",
+])
+# fmt: on
+
+# Token pattern for non-ASCII text: runs of letters/digits (no underscore).
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# ASCII fast-path byte tables: alphanumerics kept (optionally lowercased),
+# everything else becomes a space. Equivalent to `_TOKEN_RE` on ASCII input.
+_ASCII_KEEP = bytes(c if chr(c).isalnum() else 0x20 for c in range(128)) + b" " * 128
+_ASCII_FOLD = _ASCII_KEEP.lower()
+
+
+def s_stem(token: str) -> str:
+    """Harman's "S" stemmer: strip common English plural suffixes.
+
+    Args:
+      token: Lowercased token.
+
+    Returns:
+      The stemmed token (e.g. "policies" -> "policy", "guarantees" -> "guarantee").
+    """
+    if len(token) > 3 and token.endswith("ies") and not token.endswith(("eies", "aies")):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("es") and not token.endswith(("aes", "ees", "oes")):
+        return token[:-1]
+    if len(token) > 2 and token.endswith("s") and not token.endswith(("us", "ss")):
+        return token[:-1]
+    return token
+
+
+_STEMMERS: Dict[str, Callable[[str], str]] = {"s": s_stem}
+
+
+class Analyzer:
+    """Configurable text -> tokens pipeline.
+
+    Attributes:
+      lowercase: Fold case before tokenizing.
+      strip_punct: Keep only letter/digit runs (punctuation, symbols and
+        underscores separate tokens); if False, split on whitespace only.
+      stopwords: Tokens dropped after normalization (empty = keep all).
+      stemmer: Name of a registered stemmer ("s") or None.
+
+    Args:
+      lowercase: See attributes.
+      strip_punct: See attributes.
+      stopwords: Iterable of stopwords (already lowercased), or None.
+      stemmer: Registered stemmer name, or None to disable stemming.
+      cache_size: Max number of distinct queries memoized by `query_tokens`
+        (0 disables the cache).
+
+    Raises:
+      ValueError: If `stemmer` is not a registered name.
+    """
+
+    def __init__(
+        self,
+        lowercase: bool = True,
+        strip_punct: bool = True,
+        stopwords: FrozenSet[str] | None = None,
+        stemmer: str | None = None,
+        cache_size: int = 4096,
+    ) -> None:
+        if stemmer is not None and stemmer not in _STEMMERS:
+            raise ValueError(f"Unknown stemmer: {stemmer}")
+        self.lowercase = lowercase
+        self.strip_punct = strip_punct
+        self.stopwords: FrozenSet[str] = frozenset(stopwords or ())
+        self.stemmer = stemmer
+        self._stem = _STEMMERS[stemmer] if stemmer else None
+        self._cached = functools.lru_cache(maxsize=cache_size)(self._analyze_tuple)
+
+    @classmethod
+    def whitespace(cls) -> Analyzer:
+        """Bare `str.split` analyzer (the historical BM25 tokenization)."""
+        return cls(lowercase=False, strip_punct=False)
+
+    @property
+    def spec(self) -> Dict[str, Any]:
+        """JSON-able settings; equal specs produce identical tokens."""
+        return {
+            "lowercase": self.lowercase,
+            "strip_punct": self.strip_punct,
+            "stopwords": sorted(self.stopwords),
+            "stemmer": self.stemmer,
+        }
+
+    def __call__(self, text: str) -> List[str]:
+        """Analyze a document (uncached; use for index-time text).
+
+        Args:
+          text: Raw text.
+
+        Returns:
+          List of tokens in order of appearance.
+        """
+        if not self.strip_punct:
+            tokens = (text.lower() if self.lowercase else text).split()
+        elif text.isascii():
+            table = _ASCII_FOLD if self.lowercase else _ASCII_KEEP
+            tokens = text.encode("ascii").translate(table).decode("ascii").split()
+        else:
+            tokens = _TOKEN_RE.findall(text.lower() if self.lowercase else text)
+        if self.stopwords:
+            tokens = [t for t in tokens if t not in self.stopwords]
+        if self._stem is not None:
+            tokens = [self._stem(t) for t in tokens]
+        return tokens
+
+    def _analyze_tuple(self, text: str) -> Tuple[str, ...]:
+        """Immutable variant of `__call__` (safe to share from the cache)."""
+        return tuple(self(text))
+
+    def query_tokens(self, text: str) -> Tuple[str, ...]:
+        """Analyze a query, memoized in the per-process LRU cache.
+
+        Args:
+          text: Raw query text.
+
+        Returns:
+          Tuple of tokens (identical to `__call__` on the same text).
+        """
+        return self._cached(text)
+
+    def cache_info(self) -> functools._CacheInfo:
+        """Hit/miss statistics of the query-token cache (`functools` format)."""
+        return self._cached.cache_info()
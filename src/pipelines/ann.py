@@ -0,0 +1,138 @@
+"""FAISS index factory for the dense retrieval variant ("B").
+
+Overview:
+  `VectorStore` defaults to an exact `IndexFlatIP` scan, which is O(N) per
+  query. For large corpora an approximate index trades a little recall for
+  much lower latency and memory. This module maps a small, declarative
+  `IndexSpec` to a trained FAISS index.
+
+Index kinds:
+  - "flat":  exact inner-product scan (reference quality, O(N·D) per query).
+  - "hnsw":  graph index; `ef_search` trades recall for latency. No training.
+             FAISS cannot delete from HNSW, so `VectorStore` tombstones instead
+             and rebuilds the graph once tombstones exceed `compact_ratio`.
+  - "ivf":   inverted lists over `nlist` k-means centroids; `nprobe` lists
+             scanned per query. Trained on a sample of the corpus.
+  - "ivfpq": IVF with product-quantized residuals (`pq_m` bytes per vector at
+             8 bits), for memory-bound corpora. Trained on a sample.
+
+Training:
+  IVF/PQ quantizers are trained on at most `train_size` vectors sampled
+  uniformly at build time. `nlist` is clamped so every centroid sees at least
+  39 training points (FAISS' own guideline); if the corpus is too small for
+  the requested kind (e.g. PQ needs 2**pq_bits points), a flat index is used.
+
+Example:
+  spec = IndexSpec(kind="hnsw", ef_search=128)
+  index = build_index(spec, embeddings)  # embeddings already L2-normalized
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger("graphrag-gov")
+
+INDEX_KINDS = ("flat", "hnsw", "ivf", "ivfpq")
+
+# FAISS warns below ~39 training points per k-means centroid.
+_MIN_POINTS_PER_CENTROID = 39
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Declarative dense-index configuration.
+
+    Attributes:
+      kind: One of `INDEX_KINDS`.
+      hnsw_m: HNSW graph degree.
+      ef_construction: HNSW build-time beam width.
+      ef_search: HNSW query-time beam width (recall/latency knob).
+      nlist: IVF centroid count (clamped to the training sample size).
+      nprobe: IVF lists scanned per query (recall/latency knob).
+      pq_m: PQ sub-quantizers (must divide the embedding dimension).
+      pq_bits: Bits per PQ code.
+      train_size: Max vectors sampled for IVF/PQ training.
+      seed: RNG seed of the training sample.
+    """
+
+    kind: str = "flat"
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    ef_search: int = 64
+    nlist: int = 1024
+    nprobe: int = 16
+    pq_m: int = 16
+    pq_bits: int = 8
+    train_size: int = 100_000
+    seed: int = 0
+
+    def validate(self) -> IndexSpec:
+        """Catch unknown kinds early.
+
+        Returns:
+          IndexSpec: The same spec if validation succeeds.
+
+        Raises:
+          ValueError: If `kind` is not one of `INDEX_KINDS`.
+        """
+        if self.kind not in INDEX_KINDS:
+            raise ValueError(f"Invalid vector index kind: {self.kind}")
+        return self
+
+
+def build_index(spec: IndexSpec, embeddings: np.ndarray) -> faiss.Index:
+    """Create (and train, if needed) an empty inner-product index.
+
+    Vectors are not added; callers add them (with IDs) afterwards.
+
+    Args:
+      spec: Index configuration.
+      embeddings: L2-normalized float32 matrix (N, D) used for training.
+
+    Returns:
+      A trained FAISS index using inner-product similarity.
+    """
+    spec.validate()
+    n, dim = embeddings.shape
+    if spec.kind == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, spec.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efConstruction = spec.ef_construction
+        hnsw.hnsw.efSearch = spec.ef_search
+        return hnsw
+    if spec.kind in ("ivf", "ivfpq"):
+        sample = _training_sample(embeddings, spec)
+        nlist = min(spec.nlist, sample.shape[0] // _MIN_POINTS_PER_CENTROID)
+        pq_ok = dim % spec.pq_m == 0 and sample.shape[0] >= 2**spec.pq_bits
+        if nlist >= 1 and (spec.kind == "ivf" or pq_ok):
+            quantizer = faiss.IndexFlatIP(dim)
+            ivf: faiss.IndexIVF
+            if spec.kind == "ivf":
+                ivf = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            else:
+                ivf = faiss.IndexIVFPQ(
+                    quantizer, dim, nlist, spec.pq_m, spec.pq_bits, faiss.METRIC_INNER_PRODUCT
+                )
+            ivf.train(sample)
+            ivf.nprobe = min(spec.nprobe, nlist)
+            return ivf
+        logger.warning("Corpus too small for %s index (n=%d) — using flat", spec.kind, n)
+    return faiss.IndexFlatIP(dim)
+
+
+def supports_removal(index: faiss.Index) -> bool:
+    """Whether `remove_ids` is implemented for this index family."""
+    return not isinstance(index, faiss.IndexHNSW)
+
+
+def _training_sample(embeddings: np.ndarray, spec: IndexSpec) -> np.ndarray:
+    """Uniform sample of at most `spec.train_size` rows (contiguous float32)."""
+    if embeddings.shape[0] <= spec.train_size:
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    rng = np.random.default_rng(spec.seed)
+    rows = np.sort(rng.choice(embeddings.shape[0], spec.train_size, replace=False))
+    return np.ascontiguousarray(embeddings[rows], dtype=np.float32)
@@ -0,0 +1,63 @@
+"""Manifests for prebuilt retrieval artifacts.
+
+Overview:
+  Offline builds (`scripts/bootstrap_index.py`) write index artifacts that the
+  API loads at startup instead of re-encoding the corpus. A loaded artifact is
+  only safe if it was built from the same corpus with the same model and
+  settings; a small JSON manifest next to the artifact records those inputs
+  and is compared with the runtime configuration before loading.
+
+Example:
+  expected = {"model": DEFAULT_ST_MODEL, "corpus_sha256": corpus_fingerprint(docs, ids)}
+  if manifest_matches(read_manifest(path), expected):
+      vs = VectorStore.load(path)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Mapping, Sequence
+
+MANIFEST_FILE = "manifest.json"
+
+
+def corpus_fingerprint(docs: Sequence[str], ids: Sequence[str]) -> str:
+    """SHA-256 over the ordered (id, text) pairs of a corpus.
+
+    Args:
+      docs: Document texts.
+      ids: Document IDs aligned with `docs`.
+
+    Returns:
+      Hex digest; changes if any text, ID or their order changes.
+    """
+    h = hashlib.sha256()
+    for d_id, text in zip(ids, docs, strict=True):
+        data = text.encode("utf-8")
+        h.update(f"{d_id}\0{len(data)}\0".encode())
+        h.update(data)
+    return h.hexdigest()
+
+
+def write_manifest(path: str | Path, manifest: Mapping[str, Any]) -> None:
+    """Write `manifest.json` into an artifact directory (created if missing)."""
+    root = Path(path)
+    root.mkdir(parents=True, exist_ok=True)
+    with (root / MANIFEST_FILE).open("w", encoding="utf-8") as f:
+        json.dump(dict(manifest), f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def read_manifest(path: str | Path) -> Dict[str, Any] | None:
+    """Read an artifact manifest, or None if the directory has none."""
+    fp = Path(path) / MANIFEST_FILE
+    if not fp.is_file():
+        return None
+    with fp.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def manifest_matches(manifest: Mapping[str, Any] | None, expected: Mapping[str, Any]) -> bool:
+    """True if every expected key is present in `manifest` with an equal value."""
+    return manifest is not None and all(manifest.get(k) == v for k, v in expected.items())
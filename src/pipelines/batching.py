@@ -0,0 +1,171 @@
+"""Micro-batching scheduler for concurrent single-item requests.
+
+Overview:
+  `/query` handlers run on a thread pool, so under load many threads each
+  call `model.encode([query])` with a batch of one. `MicroBatcher` sits in
+  front of a batched function: callers submit one item and block on a
+  future, while a single worker thread groups items that arrive within a few
+  milliseconds (or until `max_batch_size`) and runs one batched call.
+
+Strategy:
+  - The worker blocks until a first item arrives, then keeps collecting until
+    the batch is full or `max_wait_ms` has elapsed since that first item.
+  - The batched function receives the items in arrival order and must return
+    one result per item; each caller's future is resolved with its own
+    result. An exception fails every future of the batch.
+  - Metrics: batch size and per-item queueing delay (enqueue -> batch start)
+    are recorded on OTel histograms, tagged with the batcher name.
+  - Fork safety: threads do not survive `fork()`, so the worker is started
+    lazily on the first submit of each process. A batcher created in a
+    preloading gunicorn master works in every forked worker.
+
+Example:
+  batcher = MicroBatcher(lambda qs: model.encode(qs), max_batch_size=32, max_wait_ms=2)
+  vec = batcher.submit("what is gdpr?").result()
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Generic, List, Sequence, Tuple, TypeVar
+
+from src.obs.otel import batch_queue_delay_ms, batch_size
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Queue entry: (item, future, enqueue time from `time.perf_counter()`).
+_Entry = Tuple[T, "Future[R]", float]
+
+
+class MicroBatcher(Generic[T, R]):
+    """Group concurrent submissions into batched calls on a worker thread.
+
+    Attributes:
+      name: Label attached to the batch metrics.
+      max_batch_size: Upper bound on items per batched call.
+      max_wait_ms: Max time the first item of a batch waits for company.
+
+    Args:
+      fn: Batched function mapping a list of items to a list of results.
+      max_batch_size: See attributes (>= 1).
+      max_wait_ms: See attributes (>= 0).
+      name: See attributes.
+
+    Raises:
+      ValueError: If `max_batch_size` < 1 or `max_wait_ms` < 0.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[List[T]], Sequence[R]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+        name: str = "batcher",
+    ) -> None:
+        if max_batch_size < 1 or max_wait_ms < 0:
+            raise ValueError("max_batch_size must be >= 1 and max_wait_ms >= 0")
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._fn = fn
+        self._queue: queue.SimpleQueue[_Entry | None] = queue.SimpleQueue()
+        self._closed = False
+        self._worker: threading.Thread | None = None
+        self._pid: int | None = None  # process owning `_worker`
+        self._start_lock = threading.Lock()
+
+    def submit(self, item: T) -> Future[R]:
+        """Enqueue one item.
+
+        Args:
+          item: Input for the batched function.
+
+        Returns:
+          Future resolved with this item's result (or the batch's exception).
+
+        Raises:
+          RuntimeError: If the batcher has been closed.
+        """
+        if self._closed:
+            raise RuntimeError(f"MicroBatcher '{self.name}' is closed")
+        if self._pid != os.getpid():
+            self._start_worker()
+        fut: Future[R] = Future()
+        self._queue.put((item, fut, time.perf_counter()))
+        return fut
+
+    def __call__(self, item: T) -> R:
+        """Submit `item` and block until its result is available."""
+        return self.submit(item).result()
+
+    def close(self) -> None:
+        """Stop the worker after the already-queued items are processed."""
+        if not self._closed:
+            self._closed = True
+            if self._pid == os.getpid() and self._worker is not None:
+                self._queue.put(None)
+                self._worker.join()
+
+    def _start_worker(self) -> None:
+        """Start the worker thread for this process (fresh queue after a fork)."""
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.SimpleQueue()
+            self._worker = threading.Thread(
+                target=self._run, name=f"{self.name}-batcher", daemon=True
+            )
+            self._worker.start()
+            self._pid = os.getpid()
+
+    def _run(self) -> None:
+        """Worker loop: collect a batch, run it, resolve the futures."""
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch: List[_Entry] = [first]
+            deadline = first[2] + self.max_wait_ms / 1000.0
+            stop = False
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    if timeout > 0:
+                        entry = self._queue.get(timeout=timeout)
+                    else:
+                        entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+            self._execute(batch)
+            if stop:
+                return
+
+    def _execute(self, batch: List[_Entry]) -> None:
+        """Run the batched function once and fan results out to the futures."""
+        start = time.perf_counter()
+        attrs = {"batcher": self.name}
+        batch_size.record(len(batch), attrs)
+        for _, _, t_enq in batch:
+            batch_queue_delay_ms.record((start - t_enq) * 1000.0, attrs)
+        live = [(item, fut) for item, fut, _ in batch if fut.set_running_or_notify_cancel()]
+        if not live:
+            return
+        try:
+            results = self._fn([item for item, _ in live])
+            if len(results) != len(live):
+                raise RuntimeError("Batched function must return one result per item")
+        except Exception as exc:  # propagate to every caller of the batch
+            for _, fut in live:
+                fut.set_exception(exc)
+            return
+        for (_, fut), res in zip(live, results, strict=True):
+            fut.set_result(res)
@@ -0,0 +1,596 @@
+"""Inverted-index BM25 engine for the lexical retrieval variant ("A").
+
+Overview:
+  A postings-list implementation of Okapi BM25 that only touches documents
+  containing at least one query term, instead of scoring the whole corpus for
+  every query like `rank_bm25.BM25Okapi.get_scores`.
+
+Strategy:
+  - Vocabulary maps term -> term id (ids assigned in first-appearance order).
+  - Postings are stored CSR-style in compact NumPy arrays:
+      offsets[t] : offsets[t + 1]  ->  slice of `doc_ids` / `tfs` for term t
+  - Document lengths and IDF values are precomputed once at build time.
+  - Scoring accumulates per-term contributions over candidate documents only.
+  - Final selection uses `src.pipelines.topk.top_k_indices` (partition, then a
+    k-sized sort) instead of sorting every candidate.
+  - Optional dynamic pruning (`top_k(..., prune=True)`): MaxScore, the
+    term-partitioned sibling of WAND. Per-term score upper bounds are
+    precomputed at build time; documents whose bound cannot beat the current
+    k-th best score are never scored. Results are identical to exhaustive
+    scoring.
+  - Persistence (`save` / `load`): the index is a directory of `.npy` arrays
+    plus a small JSON header. `load(..., mmap=True)` opens the arrays as
+    read-only memory maps, so worker processes share pages via the OS cache
+    and startup no longer tokenizes the corpus.
+  - Incremental updates: `add` inverts only the new documents and merges their
+    postings; `delete` tombstones positions (filtered at query time) and
+    `compact` later drops them. Statistics (N, avgdl, IDF) always reflect the
+    live documents only.
+
+Compatibility:
+  Scores are bit-for-bit identical to `BM25Okapi` (same k1/b/epsilon defaults,
+  same IDF floor, same floating-point operation order), so A/B history recorded
+  with the previous backend stays comparable. Documents that contain no query
+  term score exactly 0.0, as they do in `BM25Okapi`.
+
+Example:
+  index = BM25Index([d.split() for d in docs])
+  for pos, score in index.top_k("privacy policy".split(), k=5):
+      print(ids[pos], score)
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from src.pipelines.topk import top_k_indices
+
+# Type alias for readability: (document_position, score)
+ScoredDoc = Tuple[int, float]
+
+# Relative slack applied to pruning bounds/thresholds. Bounds are summed in a
+# different order than document scores; the slack absorbs last-ulp rounding so a
+# document is never pruned when its exact score would tie or beat the threshold.
+_UB_SLACK = 1e-9
+
+# On-disk layout (see `BM25Index.save`). Bump the version on any format change.
+_FORMAT_VERSION = 2
+_META_FILE = "meta.json"
+_ARRAYS = ("offsets", "doc_ids", "tfs", "doc_len", "live", "idf", "upper_bounds", "_norm")
+
+
+class BM25Index:
+    """Okapi BM25 over a CSR postings inverted index.
+
+    Attributes:
+      k1: Term-frequency saturation parameter.
+      b: Length normalization parameter.
+      epsilon: IDF floor factor applied to negative IDFs (`epsilon * average_idf`).
+      vocab: Mapping term -> term id.
+      offsets: int64 array of shape (V + 1,); postings boundaries per term.
+      doc_ids: int32 array of document positions, grouped by term, ascending.
+      tfs: int32 array of term frequencies aligned with `doc_ids`.
+      doc_len: int32 array of document lengths (in tokens).
+      live: bool array; False marks a deleted (tombstoned) position.
+      idf: float64 array of per-term IDF values (after the epsilon floor).
+      upper_bounds: float64 array; max BM25 contribution of each term over its
+        postings (used by dynamic pruning).
+      avgdl: Average document length.
+      average_idf: Mean raw IDF over the vocabulary (drives the epsilon floor).
+      analyzer_spec: Tokenizer description restored by `load` (None otherwise).
+      manifest: Provenance passed to `save` (e.g. the corpus hash), restored by
+        `load` (empty otherwise).
+
+    Args:
+      corpus: Tokenized documents (one token sequence per document, non-empty).
+      k1: BM25 k1 parameter (default mirrors `BM25Okapi`).
+      b: BM25 b parameter (default mirrors `BM25Okapi`).
+      epsilon: IDF floor factor (default mirrors `BM25Okapi`).
+
+    Raises:
+      ValueError: If `corpus` is empty.
+    """
+
+    def __init__(
+        self,
+        corpus: Sequence[Sequence[str]],
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+    ) -> None:
+        if not corpus:
+            raise ValueError("Empty corpus: provide at least 1 document")
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.analyzer_spec: Dict[str, Any] | None = None
+        self.manifest: Dict[str, Any] = {}
+        self._build(corpus)
+
+    # ------------------------------------------------------------------
+    # Build
+    # ------------------------------------------------------------------
+    def _build(self, corpus: Sequence[Sequence[str]]) -> None:
+        """Build vocabulary, postings arrays and collection statistics."""
+        self.vocab: Dict[str, int] = {}
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.empty(0, dtype=np.int32)
+        self.tfs = np.empty(0, dtype=np.int32)
+        self.doc_len = np.empty(0, dtype=np.int32)
+        self.live = np.empty(0, dtype=bool)
+        self._append(corpus)
+        self._refresh_stats()
+
+    def _append(self, corpus: Sequence[Sequence[str]]) -> None:
+        """Invert `corpus` as new trailing positions and merge its postings.
+
+        Only the new documents are tokenized in Python; merging with existing
+        postings is a vectorized stable sort by term id (new positions are
+        larger than all existing ones, so postings stay ascending).
+        """
+        vocab = self.vocab
+        first = self.doc_len.shape[0]
+        post_docs: Dict[int, List[int]] = {}
+        post_tfs: Dict[int, List[int]] = {}
+        doc_len: List[int] = []
+
+        for pos, tokens in enumerate(corpus, start=first):
+            doc_len.append(len(tokens))
+            freqs: Dict[str, int] = {}
+            for tok in tokens:
+                freqs[tok] = freqs.get(tok, 0) + 1
+            for tok, tf in freqs.items():
+                tid = vocab.get(tok)
+                if tid is None:
+                    tid = vocab[tok] = len(vocab)
+                if tid not in post_docs:
+                    post_docs[tid] = []
+                    post_tfs[tid] = []
+                post_docs[tid].append(pos)
+                post_tfs[tid].append(tf)
+
+        tids = sorted(post_docs)
+        df = np.fromiter((len(post_docs[t]) for t in tids), dtype=np.int64, count=len(tids))
+        nnz = int(df.sum())
+        new_tids = np.repeat(np.asarray(tids, dtype=np.int64), df)
+        new_docs = np.fromiter((d for t in tids for d in post_docs[t]), dtype=np.int32, count=nnz)
+        new_tfs = np.fromiter((f for t in tids for f in post_tfs[t]), dtype=np.int32, count=nnz)
+
+        if self.doc_ids.shape[0]:
+            all_tids = np.concatenate([self._posting_tids(), new_tids])
+            order = np.argsort(all_tids, kind="stable")
+            self.doc_ids = np.concatenate([self.doc_ids, new_docs])[order]
+            self.tfs = np.concatenate([self.tfs, new_tfs])[order]
+            new_tids = all_tids
+        else:
+            self.doc_ids, self.tfs = new_docs, new_tfs
+        self.offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(new_tids, minlength=len(vocab)), out=self.offsets[1:])
+        self.doc_len = np.concatenate([self.doc_len, np.asarray(doc_len, dtype=np.int32)])
+        self.live = np.concatenate([self.live, np.ones(len(doc_len), dtype=bool)])
+
+    def _posting_tids(self) -> np.ndarray:
+        """Term id of every posting (aligned with `doc_ids`)."""
+        return np.repeat(np.arange(len(self.offsets) - 1), np.diff(self.offsets))
+
+    def _refresh_stats(self) -> None:
+        """Recompute N, avgdl, IDF, length norms and bounds over live documents."""
+        self._n_live = int(np.count_nonzero(self.live))
+        if self._n_live == self.live.shape[0]:
+            df = np.diff(self.offsets)
+            total_len = int(self.doc_len.sum(dtype=np.int64))
+        else:
+            live_postings = self.live[self.doc_ids]
+            df = np.bincount(self._posting_tids()[live_postings], minlength=len(self.vocab))
+            total_len = int(self.doc_len[self.live].sum(dtype=np.int64))
+        self.avgdl = total_len / self._n_live
+        self.idf = self._compute_idf(df, self._n_live)
+        # Per-document length normalization, identical for every term.
+        self._norm = self.k1 * (1 - self.b + self.b * self.doc_len / self.avgdl)
+        self.upper_bounds = self._compute_upper_bounds()
+
+    # ------------------------------------------------------------------
+    # Incremental updates
+    # ------------------------------------------------------------------
+    def add(self, corpus: Sequence[Sequence[str]]) -> np.ndarray:
+        """Append documents without re-inverting the existing corpus.
+
+        Collection statistics are refreshed, so scores equal those of an index
+        rebuilt from scratch over the same live documents (bit-for-bit when no
+        document was ever deleted).
+
+        Args:
+          corpus: Tokenized documents to append.
+
+        Returns:
+          int64 array with the positions assigned to the new documents.
+        """
+        first = self.doc_len.shape[0]
+        if corpus:
+            self._append(corpus)
+            self._refresh_stats()
+        return np.arange(first, self.doc_len.shape[0], dtype=np.int64)
+
+    def delete(self, positions: Sequence[int] | np.ndarray) -> None:
+        """Tombstone documents: they stop matching and leave the statistics.
+
+        Postings are kept until `compact`; positions of other documents do not
+        change.
+
+        Args:
+          positions: Document positions to delete (already-deleted ones are ignored).
+
+        Raises:
+          ValueError: If the deletion would leave no live document.
+        """
+        live = np.array(self.live, dtype=bool)  # private, writable copy (mmap-safe)
+        live[np.asarray(positions, dtype=np.int64)] = False
+        if not live.any():
+            raise ValueError("Empty corpus: cannot delete every document")
+        self.live = live
+        self._refresh_stats()
+
+    @property
+    def num_deleted(self) -> int:
+        """Number of tombstoned positions awaiting `compact`."""
+        return int(self.live.shape[0]) - self._n_live
+
+    def compact(self) -> np.ndarray:
+        """Drop tombstoned documents and renumber positions densely.
+
+        Returns:
+          int64 array `kept` of old positions in new order: the document now at
+          position `i` was previously at `kept[i]`.
+        """
+        kept = np.flatnonzero(self.live)
+        if kept.shape[0] == self.live.shape[0]:
+            return kept
+        remap = np.full(self.live.shape[0], -1, dtype=np.int64)
+        remap[kept] = np.arange(kept.shape[0])
+        mask = self.live[self.doc_ids]
+        tids = self._posting_tids()[mask]
+        self.doc_ids = remap[self.doc_ids[mask]].astype(np.int32)
+        self.tfs = np.asarray(self.tfs[mask])
+        self.offsets = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(tids, minlength=len(self.vocab)), out=self.offsets[1:])
+        self.doc_len = np.asarray(self.doc_len[kept])
+        self.live = np.ones(kept.shape[0], dtype=bool)
+        self._refresh_stats()
+        return kept
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(
+        self,
+        path: str | Path,
+        analyzer_spec: Dict[str, Any] | None = None,
+        manifest: Mapping[str, Any] | None = None,
+    ) -> None:
+        """Write the index to a directory (created if missing).
+
+        Layout: one `<name>.npy` file per array (postings, lengths, tombstones,
+        IDF, upper bounds, length norms) and `meta.json` with the parameters and the
+        vocabulary in term-id order.
+
+        Args:
+          path: Target directory; existing index files are overwritten.
+          analyzer_spec: Optional description of the tokenizer used to build
+            the corpus tokens (see `Analyzer.spec`), restored by `load`.
+          manifest: Optional provenance (e.g. `corpus_sha256`, see
+            `src.pipelines.artifacts.corpus_fingerprint`) stored in `meta.json`
+            and restored by `load`, so callers can detect edited corpora.
+        """
+        root = Path(path)
+        root.mkdir(parents=True, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(root / f"{name.lstrip('_')}.npy", np.ascontiguousarray(getattr(self, name)))
+        meta = {
+            "format_version": _FORMAT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "epsilon": self.epsilon,
+            "avgdl": self.avgdl,
+            "average_idf": self.average_idf,
+            "num_docs": self.num_docs,
+            "analyzer": analyzer_spec,
+            "manifest": dict(manifest or {}),
+            "vocab": sorted(self.vocab, key=self.vocab.__getitem__),
+        }
+        with (root / _META_FILE).open("w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str | Path, mmap: bool = True) -> BM25Index:
+        """Open an index written by `save`.
+
+        Args:
+          path: Index directory.
+          mmap: If True, arrays are read-only `np.memmap` views (pages are
+            loaded lazily and shared between processes); otherwise they are
+            read fully into private memory.
+
+        Returns:
+          A `BM25Index` scoring exactly like the one that was saved, with
+          `analyzer_spec` and `manifest` set to the values passed to `save`.
+
+        Raises:
+          FileNotFoundError: If the directory or one of its files is missing.
+          ValueError: If the format version is not supported.
+        """
+        root = Path(path)
+        with (root / _META_FILE).open("r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported BM25 index format: {meta.get('format_version')}")
+        self = cls.__new__(cls)
+        self.k1, self.b, self.epsilon = meta["k1"], meta["b"], meta["epsilon"]
+        self.avgdl, self.average_idf = meta["avgdl"], meta["average_idf"]
+        self.vocab = {term: tid for tid, term in enumerate(meta["vocab"])}
+        self.analyzer_spec = meta.get("analyzer")
+        self.manifest = meta.get("manifest") or {}
+        for name in _ARRAYS:
+            arr = np.load(root / f"{name.lstrip('_')}.npy", mmap_mode="r" if mmap else None)
+            setattr(self, name, arr)
+        self._n_live = int(np.count_nonzero(self.live))
+        return self
+
+    def _compute_upper_bounds(self) -> np.ndarray:
+        """Max per-term contribution over each postings list (one vectorized pass).
+
+        Returns:
+          float64 array of shape (V,) indexed by term id.
+        """
+        df = np.diff(self.offsets)
+        bounds = np.zeros(df.shape[0], dtype=np.float64)
+        nonempty = df > 0
+        if not nonempty.any():
+            return bounds
+        tids = np.repeat(np.arange(df.shape[0]), df)
+        tfs = self.tfs
+        contrib = self.idf[tids] * (tfs * (self.k1 + 1) / (tfs + self._norm[self.doc_ids]))
+        # Empty lists (possible after `compact`) are skipped: reduceat needs non-empty segments.
+        bounds[nonempty] = np.maximum.reduceat(contrib, self.offsets[:-1][nonempty])
+        return bounds
+
+    def _compute_idf(self, df: np.ndarray, n_docs: int) -> np.ndarray:
+        """Compute IDF values with the `BM25Okapi` epsilon floor.
+
+        The loop intentionally mirrors `BM25Okapi._calc_idf` (term order,
+        `math.log`, sequential summation) to keep results bit-identical.
+
+        Terms with no live document (only possible after `delete`) are absent
+        from a rebuilt corpus: they get IDF 0 and are left out of the average.
+
+        Args:
+          df: Document frequency per term id (over live documents).
+          n_docs: Number of live documents in the collection.
+
+        Returns:
+          float64 array of IDF values indexed by term id.
+        """
+        idf = np.zeros(len(df), dtype=np.float64)
+        idf_sum = 0.0
+        n_terms = 0
+        negative: List[int] = []
+        for tid, freq in enumerate(df.tolist()):
+            if not freq:
+                continue
+            val = math.log(n_docs - freq + 0.5) - math.log(freq + 0.5)
+            idf[tid] = val
+            idf_sum += val
+            n_terms += 1
+            if val < 0:
+                negative.append(tid)
+        self.average_idf = idf_sum / n_terms if n_terms else 0.0
+        idf[negative] = self.epsilon * self.average_idf
+        return idf
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+    @property
+    def num_docs(self) -> int:
+        """Number of indexed (live) documents."""
+        return self._n_live
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the postings (doc positions, term frequencies) of a term.
+
+        Args:
+          term: Token as produced by the indexing tokenizer.
+
+        Returns:
+          Tuple of (doc_ids, tfs) arrays; both empty if the term is unknown.
+        """
+        tid = self.vocab.get(term)
+        if tid is None:
+            return self.doc_ids[:0], self.tfs[:0]
+        return self._slice(tid)
+
+    def _term_scores(self, tid: int, docs: np.ndarray, tfs: np.ndarray) -> np.ndarray:
+        """BM25 contribution of term `tid` for the given postings."""
+        return self.idf[tid] * (tfs * (self.k1 + 1) / (tfs + self._norm[docs]))
+
+    def score_candidates(self, query: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Score every document containing at least one query term.
+
+        Repeated query tokens contribute once per occurrence, as in `BM25Okapi`.
+
+        Args:
+          query: Query tokens (tokenized like the corpus).
+
+        Returns:
+          Tuple (positions, scores): ascending unique doc positions and their
+          BM25 scores. Documents absent from `positions` score 0.0.
+        """
+        terms = [(self.vocab[q], *self.postings(q)) for q in query if q in self.vocab]
+        if not terms:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+        cand = _union([docs for _, docs, _ in terms])
+        acc = np.zeros(cand.shape[0], dtype=np.float64)
+        for tid, docs, tfs in terms:
+            # Postings are unique per term: a scatter-add is a plain element-wise add.
+            acc[np.searchsorted(cand, docs)] += self._term_scores(tid, docs, tfs)
+        return cand, acc
+
+    def get_scores(self, query: Sequence[str]) -> np.ndarray:
+        """Dense score vector over the whole corpus (`BM25Okapi` drop-in).
+
+        Args:
+          query: Query tokens.
+
+        Returns:
+          float64 array with one BM25 score per position (deleted positions,
+          if any, score 0.0).
+        """
+        scores = np.zeros(self.doc_len.shape[0], dtype=np.float64)
+        pos, acc = self.score_candidates(query)
+        scores[pos] = acc
+        return scores
+
+    def top_k(self, query: Sequence[str], k: int, prune: bool = False) -> List[ScoredDoc]:
+        """Return the k best documents for a query.
+
+        Ranking matches exhaustive scoring over the whole corpus: documents
+        without any query term take part with a score of 0.0. Ties are broken
+        by ascending document position so results are deterministic.
+
+        Args:
+          query: Query tokens.
+          k: Number of hits to return (clamped to corpus size).
+          prune: If True, use MaxScore dynamic pruning instead of scoring
+            every candidate. Results are identical either way.
+
+        Returns:
+          List of (doc_position, score) sorted by decreasing score.
+        """
+        k = max(1, min(k, self.num_docs))
+        if prune:
+            hits = self._top_k_pruned(query, k)
+            # Fewer than k positive scores means zero-score docs decide the tail;
+            # exhaustive scoring handles that (small result set) case exactly.
+            if hits is not None and len(hits) == k and hits[-1][1] > 0:
+                return hits
+        pos, acc = self.score_candidates(query)
+        if np.count_nonzero(acc > 0) < k:
+            # Not enough positive hits: unmatched (zero-score) docs may enter the top-k.
+            if self.num_deleted:
+                span = np.flatnonzero(self.live)[: k + pos.shape[0]]
+            else:
+                span = np.arange(min(self.num_docs, k + pos.shape[0]), dtype=pos.dtype)
+            fill = np.setdiff1d(span, pos, assume_unique=True)[:k]
+            pos = np.concatenate([pos, fill])
+            acc = np.concatenate([acc, np.zeros(fill.shape[0])])
+        order = top_k_indices(acc, k, pos)
+        return [(int(pos[i]), float(acc[i])) for i in order]
+
+    def _top_k_pruned(self, query: Sequence[str], k: int) -> List[ScoredDoc] | None:
+        """MaxScore top-k: skip documents that only contain low-impact terms.
+
+        1) A lower bound `theta` on the k-th best score is seeded from the
+           single-term contributions of the shortest postings list.
+        2) Terms are sorted by upper bound; the longest prefix whose bounds sum
+           below `theta` is "non-essential": a document containing only those
+           terms can never reach the top-k, so candidates come from the
+           essential postings only.
+        3) Candidates whose partial score plus the non-essential bounds cannot
+           reach the (refined) threshold are dropped before exact scoring;
+           non-essential term frequencies are looked up by binary search
+           instead of scanning their (long) postings.
+
+        Args:
+          query: Query tokens.
+          k: Number of hits to keep (already clamped).
+
+        Returns:
+          Exact top-k (doc_position, score) pairs sorted like `top_k`, or None
+          when pruning does not apply (no known term, or a query term with a
+          non-positive IDF, which breaks the upper-bound argument).
+        """
+        tokens = [self.vocab[q] for q in query if q in self.vocab]
+        if not tokens:
+            return None
+        mult: Dict[int, int] = {}
+        for tid in tokens:
+            mult[tid] = mult.get(tid, 0) + 1
+        if any(self.idf[tid] <= 0 for tid in mult):
+            return None
+        lists = {tid: self._slice(tid) for tid in mult}
+        ubs = {tid: float(self.upper_bounds[tid]) * m for tid, m in mult.items()}
+
+        # 1) Seed theta from the cheapest list (single contributions <= full scores).
+        seed = min(mult, key=lambda t: lists[t][0].shape[0])
+        theta = 0.0
+        if lists[seed][0].shape[0] >= k:
+            contrib = self._term_scores(seed, *lists[seed])
+            theta = float(np.partition(contrib, -k)[-k]) * (1 - _UB_SLACK)
+
+        # 2) Split terms into non-essential (low bounds) and essential.
+        by_ub = sorted(mult, key=lambda t: ubs[t])
+        ne_bound = 0.0
+        n_ne = 0
+        for tid in by_ub:
+            if (ne_bound + ubs[tid]) * (1 + _UB_SLACK) >= theta:
+                break
+            ne_bound += ubs[tid]
+            n_ne += 1
+        essential, non_essential = by_ub[n_ne:], by_ub[:n_ne]
+
+        cand = _union([lists[t][0] for t in essential])
+        if non_essential:
+            # 3) Refine theta with essential partial scores, then prune candidates.
+            partial = np.zeros(cand.shape[0], dtype=np.float64)
+            for tid in essential:
+                docs, tfs = lists[tid]
+                contrib = self._term_scores(tid, docs, tfs) * mult[tid]
+                partial[np.searchsorted(cand, docs)] += contrib
+            if partial.shape[0] >= k:
+                theta = max(theta, float(np.partition(partial, -k)[-k]) * (1 - _UB_SLACK))
+            cand = cand[(partial + ne_bound) * (1 + _UB_SLACK) >= theta]
+
+        # Exact scores, accumulated in query-token order (bit-identical to `top_k`).
+        contribs: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        for tid in mult:
+            docs, tfs = lists[tid]
+            idx = np.searchsorted(docs, cand)
+            idx[idx == docs.shape[0]] = 0
+            present = docs[idx] == cand if docs.shape[0] else np.zeros(cand.shape[0], bool)
+            contribs[tid] = (present, self._term_scores(tid, cand[present], tfs[idx[present]]))
+        acc = np.zeros(cand.shape[0], dtype=np.float64)
+        for tid in tokens:
+            present, values = contribs[tid]
+            acc[present] += values
+        order = top_k_indices(acc, k, cand)
+        return [(int(cand[i]), float(acc[i])) for i in order]
+
+    def _slice(self, tid: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Postings arrays (doc_ids, tfs) of a term id, tombstones filtered out."""
+        lo, hi = self.offsets[tid], self.offsets[tid + 1]
+        docs, tfs = self.doc_ids[lo:hi], self.tfs[lo:hi]
+        if self.num_deleted:
+            keep = self.live[docs]
+            return docs[keep], tfs[keep]
+        return docs, tfs
+
+
+def _union(arrays: List[np.ndarray]) -> np.ndarray:
+    """Sorted union of ascending, duplicate-free position arrays.
+
+    Cheaper than `np.unique` for postings: a single list is returned as-is and
+    several are merged with one sort plus an adjacent-duplicate mask.
+    """
+    if len(arrays) == 1:
+        return arrays[0]
+    merged = np.sort(np.concatenate(arrays))
+    if merged.shape[0] < 2:
+        return merged
+    keep = np.empty(merged.shape[0], dtype=bool)
+    keep[0] = True
+    np.not_equal(merged[1:], merged[:-1], out=keep[1:])
+    return merged[keep]
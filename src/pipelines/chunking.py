@@ -0,0 +1,196 @@
+"""Passage chunking for chunk-level retrieval.
+
+Overview:
+  Whole Markdown files make poor retrieval units: one vector or BM25 length
+  norm averages over every section, and the generator receives entire files.
+  This module splits documents into overlapping passages at index time and
+  keeps, for every passage, only (document, start, end) character offsets.
+
+Strategy:
+  - Tokens are whitespace-delimited words (a cheap, model-agnostic proxy for
+    subword tokens; keep `max_tokens` below the encoder's sequence limit).
+  - Heading-aware: with `headings=True` a Markdown heading line ("# ...")
+    starts a new section; consecutive sections are packed into one chunk while
+    they fit in `max_tokens`, so short sections are not indexed alone.
+  - Sections longer than `max_tokens` are split into windows of `max_tokens`
+    words sharing `overlap` words with the previous window.
+  - Chunk `n` of document `doc_id` gets the id "<doc_id>#<n>".
+
+Storage:
+  `ChunkStore` keeps offsets in flat int32 arrays (one entry per chunk) plus
+  the first chunk row and chunk count per document, so resolving a chunk id
+  is a dict lookup and two array reads. Re-chunked documents append new rows;
+  the rows of replaced or deleted documents are simply no longer referenced.
+
+Example:
+  store = ChunkStore(ChunkSpec(max_tokens=128, overlap=32))
+  texts, chunk_ids = store.add(docs, ids)
+  doc_id, start, end = store.locate(chunk_ids[0])
+"""
+
+from __future__ import annotations
+
+import re
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+# (document_id, start, end) character offsets of a passage in its document
+Span = Tuple[str, int, int]
+
+_WORD = re.compile(r"\S+")
+_HEADING = re.compile(r"^#{1,6}[ \t]", re.MULTILINE)
+_SEP = "#"
+
+
+@dataclass(frozen=True)
+class ChunkSpec:
+    """Declarative chunking configuration.
+
+    Attributes:
+      max_tokens: Max words per chunk.
+      overlap: Words shared by consecutive windows of one long section.
+      headings: Start sections at Markdown headings.
+    """
+
+    max_tokens: int = 128
+    overlap: int = 32
+    headings: bool = True
+
+    def validate(self) -> ChunkSpec:
+        """Catch invalid window sizes early.
+
+        Returns:
+          ChunkSpec: The same spec if validation succeeds.
+
+        Raises:
+          ValueError: If `max_tokens` < 1 or `overlap` is not in [0, max_tokens).
+        """
+        if self.max_tokens < 1 or not 0 <= self.overlap < self.max_tokens:
+            raise ValueError("max_tokens must be >= 1 and 0 <= overlap < max_tokens")
+        return self
+
+
+def chunk_spans(text: str, spec: ChunkSpec) -> List[Tuple[int, int]]:
+    """Split a document into (start, end) character spans.
+
+    Args:
+      text: Document text.
+      spec: Chunking configuration.
+
+    Returns:
+      Spans in document order, each starting and ending on a word; empty for
+      a text without words.
+    """
+    words = [(m.start(), m.end()) for m in _WORD.finditer(text)]
+    if not words:
+        return []
+    # Section boundaries as word indices (a heading opens a new section).
+    bounds = [0]
+    if spec.headings:
+        starts = [s for s, _ in words]
+        w = 0
+        for m in _HEADING.finditer(text):
+            while w < len(starts) and starts[w] < m.start():
+                w += 1
+            if 0 < w < len(words) and w != bounds[-1]:
+                bounds.append(w)
+    bounds.append(len(words))
+
+    spans: List[Tuple[int, int]] = []
+    lo = 0  # first word of the chunk being packed
+    for i in range(1, len(bounds)):
+        hi = bounds[i]
+        if hi - lo <= spec.max_tokens:
+            continue  # keep packing sections
+        cut = bounds[i - 1]
+        if cut > lo:  # flush the packed sections before the oversized one
+            spans.append((words[lo][0], words[cut - 1][1]))
+            lo = cut
+        if hi - lo > spec.max_tokens:  # window the oversized section
+            step = spec.max_tokens - spec.overlap
+            while hi - lo > spec.max_tokens:
+                spans.append((words[lo][0], words[lo + spec.max_tokens - 1][1]))
+                lo += step
+    spans.append((words[lo][0], words[-1][1]))
+    return spans
+
+
+class ChunkStore:
+    """Chunk id -> (document id, start, end), in compact int32 arrays.
+
+    Args:
+      spec: Chunking configuration used by `add`.
+    """
+
+    def __init__(self, spec: ChunkSpec | None = None) -> None:
+        self.spec = (spec or ChunkSpec()).validate()
+        self.starts = array("i")
+        self.ends = array("i")
+        self._docs: Dict[str, Tuple[int, int]] = {}  # doc_id -> (first row, count)
+
+    def __len__(self) -> int:
+        """Number of indexed documents."""
+        return len(self._docs)
+
+    def __contains__(self, doc_id: object) -> bool:
+        """Whether `doc_id` is indexed."""
+        return doc_id in self._docs
+
+    def add(self, docs: Sequence[str], ids: Sequence[str]) -> Tuple[List[str], List[str]]:
+        """Chunk documents and record their passage offsets.
+
+        A document without words still gets one (empty) chunk, so every
+        document stays addressable. Re-adding an indexed id replaces its chunks.
+
+        Args:
+          docs: Document texts.
+          ids: Document identifiers aligned with `docs`.
+
+        Returns:
+          A tuple (texts, chunk_ids): passage texts and ids, in document order.
+        """
+        texts: List[str] = []
+        chunk_ids: List[str] = []
+        for doc, doc_id in zip(docs, ids, strict=True):
+            spans = chunk_spans(doc, self.spec) or [(0, 0)]
+            self._docs[doc_id] = (len(self.starts), len(spans))
+            for n, (start, end) in enumerate(spans):
+                self.starts.append(start)
+                self.ends.append(end)
+                texts.append(doc[start:end])
+                chunk_ids.append(f"{doc_id}{_SEP}{n}")
+        return texts, chunk_ids
+
+    def chunk_ids(self, doc_id: str) -> List[str]:
+        """Ids of the chunks of an indexed document (empty if unknown)."""
+        _, count = self._docs.get(doc_id, (0, 0))
+        return [f"{doc_id}{_SEP}{n}" for n in range(count)]
+
+    def remove(self, ids: Sequence[str]) -> None:
+        """Forget documents (unknown ids are ignored)."""
+        for doc_id in ids:
+            self._docs.pop(doc_id, None)
+
+    def locate(self, chunk_id: str) -> Span:
+        """Resolve a chunk id to its document and character offsets.
+
+        Raises:
+          KeyError: If the chunk id is unknown.
+        """
+        doc_id, _, n = chunk_id.rpartition(_SEP)
+        first, count = self._docs[doc_id]
+        if not n.isdigit() or int(n) >= count:
+            raise KeyError(chunk_id)
+        row = first + int(n)
+        return doc_id, self.starts[row], self.ends[row]
+
+
+def chunk_corpus(
+    docs: Sequence[str], ids: Sequence[str], spec: ChunkSpec
+) -> Tuple[List[str], List[str]]:
+    """Passage texts and ids of a corpus, exactly as `Retriever` indexes them.
+
+    Used to fingerprint and prebuild chunk-level artifacts offline.
+    """
+    return ChunkStore(spec).add(docs, ids)
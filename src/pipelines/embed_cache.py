@@ -0,0 +1,224 @@
+"""Content-addressed embedding caches for documents and queries.
+
+Overview:
+  Encoding is the dominant cost of building the dense index, and most texts
+  are unchanged between restarts and rebuilds. `EmbeddingCache` persists
+  vectors keyed by the SHA-256 of each text, inside a namespace derived from
+  (model name, normalization), so only new or edited texts reach the model.
+  `QueryEmbeddingLRU` keeps recent query vectors in memory for repeated
+  questions.
+
+On-disk format:
+  <root>/<namespace>/shard-<hash>.npz with two arrays:
+    keys:    |S32 array of raw SHA-256 digests (N,)
+    vectors: float32 array (N, D)
+  Shards are append-only (one per flush), so writers never rewrite existing
+  data; `compact()` merges them into one. A shard is named after the hash of
+  its keys and written to a temporary file that is then renamed into place,
+  so processes flushing concurrently (API workers, a bootstrap run) never
+  share a file name, and a crash never leaves a partial shard. Unreadable
+  shards are skipped with a warning.
+
+Metrics:
+  Hits and misses are counted on `rag_embedding_cache_hits_total` /
+  `rag_embedding_cache_misses_total`, tagged with cache="docs" or "query".
+
+Example:
+  cache = EmbeddingCache("data/.emb_cache", model_name, normalize=False)
+  embs = cache.encode(docs, lambda xs: model.encode(xs, convert_to_numpy=True))
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+from src.obs.otel import embedding_cache_hits_total, embedding_cache_misses_total
+
+logger = logging.getLogger("graphrag-gov")
+
+# Batched text -> (N, D) float32 encoder, e.g. a bound `SentenceTransformer.encode`.
+EncodeFn = Callable[[List[str]], np.ndarray]
+
+
+def text_digest(text: str) -> bytes:
+    """Raw SHA-256 digest of a UTF-8 text (the cache key)."""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Persistent (model, normalization, sha256(text)) -> vector store.
+
+    Attributes:
+      namespace: Directory name derived from the model and normalization.
+      dim: Vector dimension (None until the first vector is known).
+
+    Args:
+      root: Cache root directory (created on first flush).
+      model_name: Encoder identifier; part of the namespace.
+      normalize: Whether cached vectors are L2-normalized; part of the namespace.
+    """
+
+    def __init__(self, root: str | Path, model_name: str, normalize: bool = False) -> None:
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name)
+        self.namespace = f"{slug}__{'l2' if normalize else 'raw'}"
+        self.dim: int | None = None
+        self._dir = Path(root) / self.namespace
+        self._rows: Dict[bytes, np.ndarray] = {}
+        self._pending: Dict[bytes, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        """Number of cached vectors (persisted and pending)."""
+        return len(self._rows)
+
+    def _load(self) -> None:
+        """Read every readable shard of the namespace into memory."""
+        for shard in sorted(self._dir.glob("shard-*.npz")):
+            self._read(shard)
+
+    def _read(self, shard: Path) -> bool:
+        """Merge one shard into memory; False (with a warning) if it cannot be read."""
+        try:
+            with np.load(shard) as data:
+                keys, vecs = data["keys"], data["vectors"]
+            if len(keys) != len(vecs):
+                raise ValueError(f"{len(keys)} keys for {len(vecs)} vectors")
+        except FileNotFoundError:
+            return False  # removed by a concurrent `compact()`
+        except Exception as exc:  # truncated/corrupt archive: the cache just misses
+            logger.warning("Skipping unreadable embedding cache shard %s: %s", shard, exc)
+            return False
+        self.dim = int(vecs.shape[1])
+        self._rows.update(zip(keys.tolist(), vecs, strict=True))
+        return True
+
+    def encode(self, texts: Sequence[str], encode_fn: EncodeFn, flush: bool = True) -> np.ndarray:
+        """Return embeddings for `texts`, encoding only cache misses.
+
+        Args:
+          texts: Texts to embed (duplicates are encoded once).
+          encode_fn: Batched encoder called once with the missing texts.
+          flush: Persist newly encoded vectors before returning.
+
+        Returns:
+          float32 array (len(texts), D), a fresh copy safe to modify in place.
+        """
+        keys = [text_digest(t) for t in texts]
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts, strict=True):
+            if key not in self._rows and key not in missing:
+                missing[key] = text
+        embedding_cache_hits_total.add(len(keys) - len(missing), {"cache": "docs"})
+        embedding_cache_misses_total.add(len(missing), {"cache": "docs"})
+        if missing:
+            vecs = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            if len(vecs) != len(missing):  # never persist misaligned rows
+                raise ValueError(f"Encoder returned {len(vecs)} vectors for {len(missing)} texts")
+            with self._lock:
+                self.dim = int(vecs.shape[1])
+                for key, vec in zip(missing, vecs, strict=True):
+                    self._rows[key] = self._pending[key] = vec
+            if flush:
+                self.flush()
+        if not keys:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.stack([self._rows[k] for k in keys]).astype(np.float32, copy=False)
+
+    def flush(self) -> None:
+        """Append pending vectors to a new shard (no-op if nothing is pending)."""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            self._write(pending)
+
+    def compact(self) -> None:
+        """Merge all shards into one.
+
+        Shards written by other processes since this cache was loaded are read
+        first, so their vectors survive the merge.
+        """
+        self.flush()
+        with self._lock:
+            shards = sorted(self._dir.glob("shard-*.npz"))
+            if len(shards) <= 1:
+                return
+            for shard in shards:
+                self._read(shard)
+            merged = self._write(self._rows)
+            for shard in shards:
+                if shard != merged:
+                    shard.unlink(missing_ok=True)
+
+    def _write(self, rows: Dict[bytes, np.ndarray]) -> Path:
+        """Write one shard (keys + vectors) atomically; returns its path."""
+        keys = np.array(list(rows), dtype="S32")
+        vecs = np.stack(list(rows.values())).astype(np.float32, copy=False)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        path = self._dir / f"shard-{hashlib.sha256(keys.tobytes()).hexdigest()[:32]}.npz"
+        fd, tmp = tempfile.mkstemp(dir=self._dir, prefix=".shard-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, keys=keys, vectors=vecs)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return path
+
+
+class QueryEmbeddingLRU:
+    """Thread-safe in-memory LRU of query vectors, in front of an encoder.
+
+    Args:
+      encode_fn: Batched encoder for cache misses.
+      max_size: Max number of cached queries (0 disables caching).
+    """
+
+    def __init__(self, encode_fn: EncodeFn, max_size: int = 1024) -> None:
+        self.max_size = max_size
+        self._encode = encode_fn
+        self._items: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, queries: Sequence[str]) -> np.ndarray:
+        """Embed queries, reusing vectors of recently seen query strings.
+
+        Args:
+          queries: Query strings.
+
+        Returns:
+          float32 array (len(queries), D), a fresh copy safe to modify in place.
+        """
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for q in queries:
+                vec = self._items.get(q)
+                if vec is not None:
+                    self._items.move_to_end(q)
+                    found[q] = vec
+        missing = list(dict.fromkeys(q for q in queries if q not in found))
+        embedding_cache_hits_total.add(len(queries) - len(missing), {"cache": "query"})
+        embedding_cache_misses_total.add(len(missing), {"cache": "query"})
+        if missing:
+            vecs = np.asarray(self._encode(missing), dtype=np.float32)
+            found.update(zip(missing, vecs, strict=True))
+            if self.max_size > 0:
+                with self._lock:
+                    for q, vec in zip(missing, vecs, strict=True):
+                        self._items[q] = vec
+                        self._items.move_to_end(q)
+                    while len(self._items) > self.max_size:
+                        self._items.popitem(last=False)
+        return np.stack([found[q] for q in queries]).astype(np.float32, copy=True)
@@ -0,0 +1,314 @@
+"""Text encoder backends for the dense retrieval variant ("B").
+
+Overview:
+  `Retriever` only needs "texts -> float32 matrix". This module puts the
+  Sentence-Transformers model behind a small `Encoder` protocol so the same
+  weights can run through PyTorch (reference) or ONNX Runtime (CPU-optimized,
+  optionally with dynamic int8 weight quantization).
+
+Backends:
+  - "torch": `SentenceTransformer.encode` (reference quality).
+  - "onnx":  transformer graph exported offline by `export_onnx`; tokenization,
+             pooling and normalization are reproduced in NumPy from the
+             exported manifest. `quantized=True` loads the int8 graph.
+
+Export layout (`export_onnx(model_name, out_dir, quantize=True)`):
+  <out_dir>/model.onnx       fp32 transformer (dynamic batch/sequence axes)
+  <out_dir>/model.int8.onnx  dynamically quantized weights (optional)
+  <out_dir>/tokenizer files  saved from the Sentence-Transformers tokenizer
+  <out_dir>/manifest.json    model, pooling, normalize, max_seq_length, inputs
+
+Identity:
+  `EncoderSpec.name` identifies the vector space ("<model>", "<model>#onnx",
+  "<model>#onnx-int8"). It keys the embedding cache and the FAISS manifest, so
+  vectors from different backends are never mixed silently. The torch name is
+  the bare model name, which keeps existing caches and artifacts valid.
+
+Example:
+  export_onnx(DEFAULT_ST_MODEL, "data/onnx/minilm", quantize=True)
+  enc = EncoderSpec(backend="onnx", onnx_dir="data/onnx/minilm", quantized=True).load()
+  vecs = enc.encode(["what is gdpr?"])
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Protocol, Sequence, cast
+
+import numpy as np
+
+from src.pipelines.artifacts import read_manifest, write_manifest
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Default dense model used for the demo backend.
+DEFAULT_ST_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+ENCODER_BACKENDS = ("torch", "onnx")
+
+_ONNX_FP32_FILE = "model.onnx"
+_ONNX_INT8_FILE = "model.int8.onnx"
+
+
+class Encoder(Protocol):
+    """Batched text encoder returning raw (model-native) float32 embeddings."""
+
+    name: str
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed `texts` into a float32 matrix (len(texts), D)."""
+        ...
+
+
+@dataclass(frozen=True)
+class EncoderSpec:
+    """Declarative encoder configuration.
+
+    Attributes:
+      backend: One of `ENCODER_BACKENDS`.
+      model_name: Sentence-Transformers model (for "onnx", the exported one).
+      onnx_dir: Directory written by `export_onnx` (required for "onnx").
+      quantized: Load the int8 graph instead of fp32 ("onnx" only).
+      batch_size: Max texts per forward pass.
+    """
+
+    backend: str = "torch"
+    model_name: str = DEFAULT_ST_MODEL
+    onnx_dir: str | None = None
+    quantized: bool = False
+    batch_size: int = 32
+
+    @property
+    def name(self) -> str:
+        """Identifier of the embedding space produced by this encoder."""
+        if self.backend == "torch":
+            return self.model_name
+        return f"{self.model_name}#onnx{'-int8' if self.quantized else ''}"
+
+    def validate(self) -> EncoderSpec:
+        """Catch unknown backends and missing ONNX exports early.
+
+        Returns:
+          EncoderSpec: The same spec if validation succeeds.
+
+        Raises:
+          ValueError: If `backend` is unknown or "onnx" has no `onnx_dir`.
+        """
+        if self.backend not in ENCODER_BACKENDS:
+            raise ValueError(f"Invalid encoder backend: {self.backend}")
+        if self.backend == "onnx" and not self.onnx_dir:
+            raise ValueError('Encoder backend "onnx" requires onnx_dir (see export_onnx)')
+        return self
+
+    def load(self) -> Encoder:
+        """Instantiate the encoder (loads model weights)."""
+        self.validate()
+        if self.backend == "onnx":
+            assert self.onnx_dir is not None  # checked by `validate`
+            return OnnxEncoder(self.onnx_dir, self.model_name, self.quantized, self.batch_size)
+        return TorchEncoder(self.model_name, self.batch_size)
+
+
+class TorchEncoder:
+    """Reference encoder: `SentenceTransformer.encode` on PyTorch.
+
+    Args:
+      model_name: Sentence-Transformers model identifier.
+      batch_size: Max texts per forward pass.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_ST_MODEL, batch_size: int = 32) -> None:
+        from sentence_transformers import SentenceTransformer
+
+        self.name = model_name
+        self.batch_size = batch_size
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed `texts` (raw model output, no extra normalization)."""
+        return self.model.encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=False,
+        ).astype(np.float32, copy=False)
+
+
+class OnnxEncoder:
+    """ONNX Runtime encoder over a graph exported by `export_onnx`.
+
+    Args:
+      model_dir: Export directory (graph, tokenizer, manifest).
+      model_name: Expected source model (checked against the manifest).
+      quantized: Use the int8 graph.
+      batch_size: Max texts per forward pass (texts are length-sorted so
+        batches pad little).
+      intra_op_threads: ONNX Runtime intra-op threads (0 = runtime default).
+
+    Raises:
+      ValueError: If the export is missing, was made from another model, or
+        has no int8 graph when `quantized` is set.
+    """
+
+    def __init__(
+        self,
+        model_dir: str | Path,
+        model_name: str = DEFAULT_ST_MODEL,
+        quantized: bool = False,
+        batch_size: int = 32,
+        intra_op_threads: int = 0,
+    ) -> None:
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        root = Path(model_dir)
+        manifest = read_manifest(root)
+        if manifest is None or manifest.get("model") != model_name:
+            raise ValueError(f"No ONNX export of {model_name} in {root} (run export_onnx)")
+        graph = root / (_ONNX_INT8_FILE if quantized else _ONNX_FP32_FILE)
+        if not graph.is_file():
+            raise ValueError(f"Missing ONNX graph: {graph}")
+        self.name = EncoderSpec("onnx", model_name, str(root), quantized).name
+        self.batch_size = batch_size
+        self.pooling: str = manifest["pooling"]
+        self.normalize: bool = manifest["normalize"]
+        self.max_seq_length: int = manifest["max_seq_length"]
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            opts.intra_op_num_threads = intra_op_threads
+        self._session = ort.InferenceSession(str(graph), opts, providers=["CPUExecutionProvider"])
+        self._inputs = [i.name for i in self._session.get_inputs()]
+        self.tokenizer = AutoTokenizer.from_pretrained(str(root))
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed `texts`; matches the Sentence-Transformers pipeline of the export."""
+        texts = list(texts)
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        out = np.empty((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            rows = order[start : start + self.batch_size]
+            emb = self._forward([texts[i] for i in rows])
+            if out.shape[1] == 0:
+                out = np.empty((len(texts), emb.shape[1]), dtype=np.float32)
+            out[rows] = emb
+        return out
+
+    def _forward(self, texts: List[str]) -> np.ndarray:
+        """Tokenize, run the graph, pool (and normalize) one batch."""
+        enc = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        feeds = {name: enc[name].astype(np.int64) for name in self._inputs}
+        hidden = self._session.run(None, feeds)[0]
+        if self.pooling == "cls":
+            emb = hidden[:, 0]
+        else:
+            mask = enc["attention_mask"][..., None].astype(np.float32)
+            emb = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            emb = emb / np.clip(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12, None)
+        return emb.astype(np.float32, copy=False)
+
+
+def export_onnx(
+    model_name: str,
+    out_dir: str | Path,
+    quantize: bool = False,
+    opset: int = 17,
+) -> Dict[str, Any]:
+    """Export a Sentence-Transformers model for `OnnxEncoder` (offline step).
+
+    Args:
+      model_name: Sentence-Transformers model identifier.
+      out_dir: Target directory (created if missing).
+      quantize: Also write a dynamically int8-quantized graph.
+      opset: ONNX opset version.
+
+    Returns:
+      The manifest written next to the graphs.
+
+    Raises:
+      ValueError: If the model's pooling is neither mean nor CLS.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    root = Path(out_dir)
+    root.mkdir(parents=True, exist_ok=True)
+    st = SentenceTransformer(model_name, device="cpu")
+    tokenizer = st.tokenizer
+    pooling = _pooling_mode(st)
+    normalize = any(type(m).__name__ == "Normalize" for m in st)
+    inputs = [
+        n
+        for n in ("input_ids", "attention_mask", "token_type_ids")
+        if n in tokenizer.model_input_names
+    ]
+
+    class _Hidden(torch.nn.Module):
+        """Token embeddings only (pooling runs in NumPy at inference)."""
+
+        def __init__(self, model: torch.nn.Module) -> None:
+            super().__init__()
+            self.model = model
+
+        def forward(self, *args: torch.Tensor) -> torch.Tensor:
+            return self.model(**dict(zip(inputs, args, strict=True)))[0]
+
+    transformer = cast(torch.nn.Module, st[0].auto_model)
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    axes = {0: "batch", 1: "sequence"}
+    torch.onnx.export(
+        _Hidden(transformer).eval(),
+        tuple(sample[n] for n in inputs),
+        str(root / _ONNX_FP32_FILE),
+        input_names=inputs,
+        output_names=["last_hidden_state"],
+        dynamic_axes=dict.fromkeys([*inputs, "last_hidden_state"], axes),
+        opset_version=opset,
+        dynamo=False,
+    )
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(
+            str(root / _ONNX_FP32_FILE), str(root / _ONNX_INT8_FILE), weight_type=QuantType.QInt8
+        )
+    tokenizer.save_pretrained(str(root))
+    manifest = {
+        "model": model_name,
+        "pooling": pooling,
+        "normalize": normalize,
+        "max_seq_length": int(st.max_seq_length or tokenizer.model_max_length),
+        "inputs": inputs,
+        "quantized": quantize,
+        "opset": opset,
+    }
+    write_manifest(root, manifest)
+    return manifest
+
+
+def _pooling_mode(st: SentenceTransformer) -> str:
+    """Pooling of a Sentence-Transformers pipeline ("mean" or "cls")."""
+    pooling: Any = next((m for m in st if type(m).__name__ == "Pooling"), None)
+    cfg = pooling.get_config_dict() if pooling is not None else {}
+    modes = cfg.get("pooling_mode")
+    if modes is None:  # older releases: one boolean flag per mode
+        modes = [
+            k[len("pooling_mode_") :]
+            for k, v in cfg.items()
+            if k.startswith("pooling_mode_") and v is True
+        ]
+    modes = [modes] if isinstance(modes, str) else list(modes)
+    mode = {"mean_tokens": "mean", "cls_token": "cls"}.get(modes[0], modes[0]) if modes else ""
+    if len(modes) != 1 or mode not in ("mean", "cls"):
+        raise ValueError(f"Unsupported pooling for ONNX export: {cfg}")
+    return mode
@@ -0,0 +1,97 @@
+"""Rank fusion for the hybrid retrieval variant ("H").
+
+Overview:
+  BM25 and dense scores live on different scales, so they cannot be summed
+  directly. Hybrid retrieval takes the top `depth` hits of each branch and
+  fuses them into one ranking:
+
+  - "rrf":      Reciprocal Rank Fusion, score(d) = sum_b w_b / (rrf_k + rank_b(d)),
+                rank starting at 1. Scale-free and robust; the default.
+  - "weighted": min-max normalize each branch's scores to [0, 1] over its own
+                candidates, then take the weighted sum. Keeps score margins.
+
+  A document missing from a branch contributes nothing for that branch.
+  Both methods make a single pass over the candidate lists; the fused top k
+  is selected with `top_k_indices`, ties broken by ascending document id.
+
+Example:
+  spec = FusionSpec(method="rrf", depth=50)
+  fused = fuse([bm25_hits, dense_hits], spec, k=6)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from src.pipelines.topk import top_k_indices
+
+# (document_id, score), same as `src.pipelines.rag.Hit`
+Hit = Tuple[str, float]
+
+FUSION_METHODS = ("rrf", "weighted")
+
+
+@dataclass(frozen=True)
+class FusionSpec:
+    """Declarative hybrid-fusion configuration.
+
+    Attributes:
+      method: One of `FUSION_METHODS`.
+      rrf_k: RRF rank offset (larger values flatten the rank discount).
+      weights: Per-branch weights, in (lexical, dense) order.
+      depth: Candidates fetched from each branch before fusion (>= k).
+    """
+
+    method: str = "rrf"
+    rrf_k: int = 60
+    weights: Tuple[float, float] = (1.0, 1.0)
+    depth: int = 50
+
+    def validate(self) -> FusionSpec:
+        """Catch unknown methods and invalid parameters early.
+
+        Returns:
+          FusionSpec: The same spec if validation succeeds.
+
+        Raises:
+          ValueError: If `method` is unknown, `rrf_k` < 0, `depth` < 1 or a weight is < 0.
+        """
+        if self.method not in FUSION_METHODS:
+            raise ValueError(f"Invalid fusion method: {self.method}")
+        if self.rrf_k < 0 or self.depth < 1 or min(self.weights) < 0:
+            raise ValueError("rrf_k and weights must be >= 0 and depth >= 1")
+        return self
+
+
+def fuse(rankings: Sequence[List[Hit]], spec: FusionSpec, k: int) -> List[Hit]:
+    """Fuse per-branch rankings into one top-k list.
+
+    Args:
+      rankings: One hit list per branch, each sorted by descending score.
+      spec: Fusion configuration (`weights` aligned with `rankings`).
+      k: Number of fused hits to return.
+
+    Returns:
+      Up to `k` (doc_id, fused_score) pairs in descending fused score
+      (ties by ascending doc_id).
+    """
+    fused: Dict[str, float] = {}
+    for hits, weight in zip(rankings, spec.weights, strict=True):
+        if not hits or weight == 0:
+            continue
+        if spec.method == "rrf":
+            for rank, (doc_id, _) in enumerate(hits, start=1):
+                fused[doc_id] = fused.get(doc_id, 0.0) + weight / (spec.rrf_k + rank)
+        else:
+            top, bottom = hits[0][1], hits[-1][1]
+            span = top - bottom
+            for doc_id, score in hits:
+                norm = (score - bottom) / span if span > 0 else 1.0
+                fused[doc_id] = fused.get(doc_id, 0.0) + weight * norm
+    doc_ids = list(fused)
+    scores = np.fromiter(fused.values(), dtype=np.float64, count=len(doc_ids))
+    order = top_k_indices(scores, k, keys=np.array(doc_ids))
+    return [(doc_ids[i], float(scores[i])) for i in order]
@@ -7,63 +7,291 @@ Overview:
 
 Strategy:
   - A/B retrieval variants:
-      A) BM25 (lexical)
-      B) Dense vectors (Sentence-Transformers + FAISS IP)
+      A) BM25 (lexical, inverted index; see `src.pipelines.bm25`), tokenized by
+         a shared `src.pipelines.analysis.Analyzer`
+      B) Dense vectors (Sentence-Transformers on PyTorch or ONNX Runtime, see
+         `src.pipelines.encoders`; FAISS IP, exact or ANN, see `src.pipelines.ann`)
+      H) Hybrid: A and B run concurrently and their rankings are fused
+         (RRF or normalized weighted sum, see `src.pipelines.fusion`)
+  - Optional chunk-level indexing: documents are split into overlapping
+    passages at index time and hits resolve to (doc_id, start, end) offsets
+    (see `src.pipelines.chunking`).
+  - Optional cross-encoder re-ranking of a larger candidate set, under a
+    latency budget (see `src.pipelines.rerank`).
   - Generation is a stub; swap in a real LLM call for production.
+  - `RAGPipeline.arun` is the async entry point: CPU-bound stages run on a
+    bounded thread pool while generation is awaited on the event loop.
   - Observability: OTel spans for key stages + request count/latency metrics.
 
-Limitations:
-  - No re-ranking step (add a cross-encoder if needed).
-  - No cite-span tracking yet (IDs are returned for hits, not offsets).
-
 Example:
   pipeline = RAGPipeline(Retriever(docs, ids))
   result = pipeline.run("What is the privacy policy?", variant="B", k=6)
 """
+
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+from dataclasses import asdict
+from functools import partial
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Tuple,
+    TypeVar,
+)
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import faiss
 import numpy as np
-from rank_bm25 import BM25Okapi
-from sentence_transformers import SentenceTransformer
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.trace import Span as OtelSpan
 
 from src.guardrails.policy import PolicyEngine
-from src.obs.otel import rag_latency_ms, rag_requests_total, tracer
+from src.pipelines.analysis import Analyzer
+from src.pipelines.ann import IndexSpec, build_index, supports_removal
+from src.pipelines.artifacts import corpus_fingerprint, read_manifest, write_manifest
+from src.pipelines.batching import MicroBatcher
+from src.pipelines.bm25 import BM25Index
+from src.pipelines.chunking import ChunkSpec, ChunkStore, Span
+from src.pipelines.embed_cache import EmbeddingCache, QueryEmbeddingLRU
+from src.pipelines.encoders import DEFAULT_ST_MODEL, Encoder, EncoderSpec  # noqa: F401
+from src.pipelines.fusion import FusionSpec, fuse
+from src.pipelines.rerank import Reranker
+from src.pipelines.response_cache import ResponseCache, response_key
+from src.pipelines.singleflight import AsyncSingleFlight, SingleFlight
+from src.obs.otel import rag_latency_ms, rag_requests_total, stream_time_to_hits_ms, tracer
 
 # Type alias for readability: (document_id, score)
 Hit = Tuple[str, float]
 
-# Default dense model used for the demo backend.
-DEFAULT_ST_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+T = TypeVar("T")
+
+# Persisted vector store layout (see `VectorStore.save`).
+_VS_FORMAT_VERSION = 1
+_VS_INDEX_FILE = "index.faiss"
+_VS_IDS_FILE = "labels.json"
+
+
+class BackendNotReadyError(RuntimeError):
+    """Raised when a retrieval variant is requested before its backend is loaded."""
 
 
 class VectorStore:
-    """Simple FAISS inner-product index with L2-normalized embeddings.
+    """FAISS inner-product index with L2-normalized embeddings.
 
     The store assumes cosine-like scoring via L2-normalization + inner product.
+    Vectors are stored under int64 labels in a `faiss.IndexIDMap2`, so
+    documents can be added and removed without rebuilding the index. The
+    underlying index is exact (Flat) by default or approximate (HNSW, IVF,
+    IVF-PQ) per `spec`; see `src.pipelines.ann`.
+
+    Indexes without deletion (HNSW) keep removed vectors as tombstones that
+    searches over-fetch and filter; once they exceed `compact_ratio` of the
+    stored vectors, the index is rebuilt from the live vectors.
 
     Attributes:
       index: FAISS index initialized for inner-product search.
-      ids: Parallel list of document IDs aligned with the embeddings matrix.
+      ids: Document ID per label (None once the vector has been removed).
+      spec: Index configuration in use.
+      compact_ratio: Fraction of tombstoned vectors that triggers a rebuild.
 
     Args:
       embeddings: 2D NumPy array of shape (N, D); will be L2-normalized in place.
       ids: List of length N with stable string identifiers for each embedding.
+      spec: Optional index configuration; defaults to exact `IndexSpec()`.
+      compact_ratio: Tombstone fraction that triggers a rebuild (HNSW only).
 
     Raises:
       ValueError: If `embeddings` is not 2D or `len(ids)` != `embeddings.shape[0]`.
     """
 
-    def __init__(self, embeddings: np.ndarray, ids: List[str]) -> None:
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        ids: List[str],
+        spec: IndexSpec | None = None,
+        compact_ratio: float = 0.25,
+    ) -> None:
+        if embeddings.ndim != 2 or len(ids) != embeddings.shape[0]:
+            raise ValueError("Embeddings shape and ids length must match")
+        self.spec = (spec or IndexSpec()).validate()
+        self.compact_ratio = compact_ratio
+        faiss.normalize_L2(embeddings)  # in-place normalization
+        base = build_index(self.spec, embeddings)
+        # Indexes without `remove_ids` (HNSW) keep removed vectors as tombstones.
+        self._removable = supports_removal(base)
+        self._n_tombstones = 0
+        self.index = faiss.IndexIDMap2(base)
+        self.ids: List[str | None] = []
+        self._labels: Dict[str, int] = {}
+        self._insert(embeddings, ids)
+
+    def add(self, embeddings: np.ndarray, ids: List[str]) -> None:
+        """Add vectors for new document IDs.
+
+        Args:
+          embeddings: 2D array of shape (M, D); L2-normalized in place.
+          ids: M document IDs not already present in the store.
+
+        Raises:
+          ValueError: On shape mismatch or if an ID is already present.
+        """
         if embeddings.ndim != 2 or len(ids) != embeddings.shape[0]:
             raise ValueError("Embeddings shape and ids length must match")
-        self.index = faiss.IndexFlatIP(embeddings.shape[1])
         faiss.normalize_L2(embeddings)  # in-place normalization
-        self.index.add(embeddings)
-        self.ids = ids
+        self._insert(embeddings, ids)
+
+    def _insert(self, embeddings: np.ndarray, ids: List[str]) -> None:
+        """Add already-normalized vectors under fresh labels."""
+        if any(d_id in self._labels for d_id in ids) or len(set(ids)) != len(ids):
+            raise ValueError("Duplicate document IDs in vector store")
+        labels = np.arange(len(self.ids), len(self.ids) + len(ids), dtype=np.int64)
+        self.index.add_with_ids(embeddings, labels)
+        self.ids.extend(ids)
+        self._labels.update(zip(ids, labels.tolist(), strict=True))
+
+    def remove(self, ids: List[str]) -> int:
+        """Remove the vectors of the given document IDs (unknown IDs are ignored).
+
+        Args:
+          ids: Document IDs to remove.
+
+        Returns:
+          Number of vectors removed.
+        """
+        labels = [self._labels.pop(d_id) for d_id in ids if d_id in self._labels]
+        for label in labels:
+            self.ids[label] = None
+        if labels and self._removable:
+            self.index.remove_ids(faiss.IDSelectorBatch(np.asarray(labels, dtype="int64")))
+        elif labels:
+            self._n_tombstones += len(labels)
+            if self._n_tombstones > self.compact_ratio * self.index.ntotal:
+                self._rebuild()
+        return len(labels)
+
+    def compact(self) -> None:
+        """Renumber live vectors densely and drop the slots of removed ones from `ids`.
+
+        Only the label table of the ID map is rewritten; stored vectors are
+        not touched. Tombstoned stores (HNSW) are rebuilt instead, since the
+        removed vectors are still part of the graph.
+        """
+        if len(self._labels) == len(self.ids):
+            return
+        if not self._removable:
+            self._rebuild()
+            return
+        live = [label for label, d_id in enumerate(self.ids) if d_id is not None]
+        remap = np.full(len(self.ids), -1, dtype=np.int64)
+        remap[live] = np.arange(len(live), dtype=np.int64)
+        labels = faiss.vector_to_array(self.index.id_map)
+        faiss.copy_array_to_vector(remap[labels], self.index.id_map)
+        self.index.construct_rev_map()
+        self.ids = [self.ids[label] for label in live]
+        self._labels = {d_id: label for label, d_id in enumerate(self.ids) if d_id is not None}
+
+    def _rebuild(self) -> None:
+        """Build a fresh index from the live vectors (drops tombstones, renumbers labels)."""
+        base = faiss.downcast_index(self.index.index)
+        vectors = base.reconstruct_n(0, base.ntotal)
+        labels = faiss.vector_to_array(self.index.id_map)
+        keep = np.fromiter((self.ids[label] is not None for label in labels), bool, len(labels))
+        vectors = np.ascontiguousarray(vectors[keep], dtype=np.float32)
+        ids = [self.ids[label] for label in labels[keep]]
+        self.index = faiss.IndexIDMap2(build_index(self.spec, vectors))
+        self.ids, self._labels, self._n_tombstones = [], {}, 0
+        self._insert(vectors, [d_id for d_id in ids if d_id is not None])
+
+    def __len__(self) -> int:
+        """Number of live (searchable) vectors."""
+        return len(self._labels)
+
+    def save(self, path: str | Path, manifest: Mapping[str, Any] | None = None) -> None:
+        """Serialize the index, its label -> ID table and a manifest.
+
+        Args:
+          path: Target directory (created if missing).
+          manifest: Extra provenance (e.g. model name, corpus hash) merged into
+            `manifest.json` next to the store's own format/dimension/spec keys.
+        """
+        root = Path(path)
+        root.mkdir(parents=True, exist_ok=True)
+        faiss.write_index(self.index, str(root / _VS_INDEX_FILE))
+        with (root / _VS_IDS_FILE).open("w", encoding="utf-8") as f:
+            json.dump(self.ids, f, ensure_ascii=False)
+        write_manifest(
+            root,
+            {
+                "format_version": _VS_FORMAT_VERSION,
+                "dim": self.index.d,
+                "count": len(self._labels),
+                "normalization": "l2",
+                "index_spec": asdict(self.spec),
+                **(manifest or {}),
+            },
+        )
+
+    @classmethod
+    def load(
+        cls,
+        path: str | Path,
+        spec: IndexSpec | None = None,
+        mmap: bool = False,
+        compact_ratio: float = 0.25,
+    ) -> VectorStore:
+        """Open a store written by `save` without re-encoding anything.
+
+        Args:
+          path: Directory written by `save`.
+          spec: Spec to report as `self.spec` (defaults to the saved one).
+          mmap: Map the index file read-only instead of reading it into memory
+            (`faiss.IO_FLAG_MMAP`); pages are shared between processes, but the
+            store must then not be modified.
+          compact_ratio: Tombstone fraction that triggers a rebuild (HNSW only).
+
+        Returns:
+          A `VectorStore` returning the same hits as the saved one.
+
+        Raises:
+          ValueError: If the index file does not hold an ID-mapped index.
+        """
+        root = Path(path)
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+        raw = faiss.read_index(str(root / _VS_INDEX_FILE), flags)
+        index = faiss.downcast_index(raw)
+        if not isinstance(index, faiss.IndexIDMap2):
+            raise ValueError(f"Not a vector store index: {type(index).__name__} in {root}")
+        # The downcast wrapper must own the C++ object, or it is freed with `raw`.
+        raw.this.disown()  # type: ignore[attr-defined]  # SWIG handle, not in the stubs
+        index.this.own(True)  # type: ignore[attr-defined]
+        self = cls.__new__(cls)
+        self.index = index
+        with (root / _VS_IDS_FILE).open("r", encoding="utf-8") as f:
+            self.ids = json.load(f)
+        saved_spec = (read_manifest(root) or {}).get("index_spec") or {}
+        self.spec = spec or IndexSpec(**saved_spec)
+        self.compact_ratio = compact_ratio
+        self._labels = {d_id: i for i, d_id in enumerate(self.ids) if d_id is not None}
+        base = faiss.downcast_index(self.index.index)
+        self._removable = supports_removal(base)
+        self._n_tombstones = 0 if self._removable else len(self.ids) - len(self._labels)
+        return self
 
     def search(self, qvec: np.ndarray, k: int = 5) -> List[Hit]:
         """Search top-k nearest neighbors for a single query vector.
@@ -80,86 +308,509 @@ class VectorStore:
         """
         if qvec.ndim == 1:
             qvec = qvec[None, :]
-        faiss.normalize_L2(qvec)
-        k = max(1, min(k, len(self.ids)))
-        D, I = self.index.search(qvec, k)
-        return [(self.ids[i], float(D[0][j])) for j, i in enumerate(I[0])]
+        return self.search_batch(qvec[:1], k=k)[0]
+
+    def search_batch(self, qvecs: np.ndarray, k: int = 5) -> List[List[Hit]]:
+        """Search top-k nearest neighbors for many query vectors in one FAISS call.
+
+        Args:
+          qvecs: Query matrix of shape (Q, D); L2-normalized in place.
+          k: Number of hits per query (clamped to index size).
+
+        Returns:
+          One list of (doc_id, score) per query row, each sorted by decreasing score.
+        """
+        if not qvecs.shape[0]:
+            return []
+        faiss.normalize_L2(qvecs)
+        k = max(1, min(k, len(self._labels)))
+        # Over-fetch by the tombstone count so k live hits survive filtering.
+        D, I = self.index.search(qvecs, min(k + self._n_tombstones, self.index.ntotal))
+        out: List[List[Hit]] = []
+        for dists, labels in zip(D.tolist(), I.tolist(), strict=True):
+            hits = [(self.ids[i], d) for d, i in zip(dists, labels, strict=True) if i >= 0]
+            out.append([(d_id, score) for d_id, score in hits if d_id is not None][:k])
+        return out
+
+
+# Deferred dense build inputs: (index spec, batch max size, batch max wait ms, prebuilt store).
+_DenseArgs = Tuple[IndexSpec | None, int, float, VectorStore | None]
 
 
 class Retriever:
     """Composable retriever exposing BM25 and dense-vector backends.
 
     The retriever owns:
-      - A BM25Okapi instance for lexical matching (variant "A").
-      - A Sentence-Transformers encoder + FAISS index for dense search (variant "B").
+      - A postings-based BM25 index for lexical matching (variant "A").
+      - A text encoder (`EncoderSpec`) + FAISS index for dense search (variant "B").
+      - A small thread pool running the dense branch of hybrid queries
+        (variant "H") while BM25 scores in the calling thread.
+
+    With a `chunk_spec` the retrieval units are passages: every document is
+    chunked at index time, hits carry chunk ids ("<doc_id>#<n>") and
+    `spans_for()` resolves them to character offsets in the source document.
+    Document-level mutations then add/replace/remove all chunks of a document.
+
+    Documents can be added, updated and deleted incrementally: only the delta
+    is tokenized and encoded. Deleted positions are tombstoned in BM25 and
+    removed from FAISS; positions are renumbered by `compact()`, which runs
+    automatically once tombstones exceed `compact_ratio` of the positions.
+
+    With `defer_dense=True` only the BM25 backend is built in the constructor,
+    so variant "A" can serve while `load_dense()` (model + vectors) runs in the
+    background; variant "B" raises `BackendNotReadyError` until then, and document
+    mutations wait for the dense backend.
 
     Attributes:
-      docs: Corpus texts aligned with `ids`.
-      ids: Stable document identifiers.
-      id2pos: Fast lookup mapping from id -> position in `docs`.
+      docs: Retrieval-unit texts by position (documents, or passages with a
+        `chunk_spec`; tombstoned positions hold "").
+      ids: Unit identifier by position (aligned with `docs`).
+      id2pos: Fast lookup mapping from live unit id -> position in `docs`.
+      analyzer: Tokenizer shared by BM25 index build and query analysis.
+      chunks: Passage offsets (None without a `chunk_spec`).
+      corpus_version: Fingerprint of the indexed units, advanced by every
+        add/update/delete (keys cached responses, see `src.pipelines.response_cache`).
 
     Args:
       docs: List of corpus documents (non-empty).
       ids: List of unique IDs, same length/order as `docs`.
+      bm25: Optional prebuilt lexical index (e.g. `BM25Index.load(path)`)
+        covering the units in order and built with `analyzer`; built from
+        them when omitted.
+      analyzer: Text analyzer for variant "A"; defaults to `Analyzer()`
+        (lowercase + punctuation stripping).
+      compact_ratio: Fraction of tombstoned positions that triggers compaction.
+      index_spec: Dense index configuration (exact Flat by default).
+      batch_max_size: If > 1, concurrent variant "B" queries are micro-batched
+        (one encode + one FAISS search per batch) up to this size.
+      batch_max_wait_ms: Max time a query waits for a batch to fill.
+      vector_store: Optional prebuilt dense store (e.g. `VectorStore.load(path)`)
+        holding exactly the unit ids; the corpus is then not re-encoded.
+      embedding_cache: Optional persistent document-embedding cache for the
+        encoder's vector space (namespace `encoder_spec.name`); only texts
+        missing from it are encoded, at build time and on add/update.
+      query_cache_size: Capacity of the in-memory query-embedding LRU (0 disables).
+      defer_dense: Skip loading the encoder and dense index until `load_dense()`.
+      encoder_spec: Dense encoder backend (PyTorch `DEFAULT_ST_MODEL` by default).
+      fusion_spec: Hybrid (variant "H") fusion configuration (RRF by default).
+      hybrid_workers: Threads available to dense branches of hybrid queries.
+      chunk_spec: Index passages instead of whole documents (prebuilt `bm25` /
+        `vector_store` must then cover `chunk_corpus(docs, ids, chunk_spec)`).
 
     Raises:
-      ValueError: If `docs` is empty.
+      ValueError: If `docs` is empty or `bm25`/`vector_store` does not match its size.
     """
 
-    def __init__(self, docs: List[str], ids: List[str]) -> None:
+    def __init__(
+        self,
+        docs: List[str],
+        ids: List[str],
+        bm25: BM25Index | None = None,
+        analyzer: Analyzer | None = None,
+        compact_ratio: float = 0.25,
+        index_spec: IndexSpec | None = None,
+        batch_max_size: int = 1,
+        batch_max_wait_ms: float = 2.0,
+        vector_store: VectorStore | None = None,
+        embedding_cache: EmbeddingCache | None = None,
+        query_cache_size: int = 0,
+        defer_dense: bool = False,
+        encoder_spec: EncoderSpec | None = None,
+        fusion_spec: FusionSpec | None = None,
+        hybrid_workers: int = 4,
+        chunk_spec: ChunkSpec | None = None,
+    ) -> None:
         if not docs:
             raise ValueError("Empty corpus: provide at least 1 document")
-        self.docs = docs
-        self.ids = ids
+        self.chunks = ChunkStore(chunk_spec) if chunk_spec is not None else None
+        if self.chunks is not None:
+            docs, ids = self.chunks.add(docs, ids)
+        if bm25 is not None and bm25.num_docs != len(docs):
+            raise ValueError("Prebuilt BM25 index does not match the corpus size")
+        if vector_store is not None and len(vector_store) != len(docs):
+            raise ValueError("Prebuilt vector store does not match the corpus size")
+        self.docs = list(docs)
+        self.ids = list(ids)
         self.id2pos = {d_id: i for i, d_id in enumerate(ids)}
+        self.compact_ratio = compact_ratio
+        self.corpus_version = corpus_fingerprint(self.docs, self.ids)
 
         # Lexical backend
-        self.bm25 = BM25Okapi([d.split() for d in docs])
+        self.analyzer = analyzer or Analyzer()
+        self.bm25 = bm25 if bm25 is not None else BM25Index([self.analyzer(d) for d in docs])
+
+        # Dense backend (built now, or by `load_dense()` when deferred)
+        self.embedding_cache = embedding_cache
+        self.query_cache = QueryEmbeddingLRU(self._encode, max_size=query_cache_size)
+        self.encoder_spec = (encoder_spec or EncoderSpec()).validate()
+        self.encoder: Encoder | None = None
+        self.vs: VectorStore | None = None
+        self._dense_batcher: MicroBatcher[Tuple[str, int], List[Hit]] | None = None
+        # Arguments of the deferred dense build; cleared once `load_dense()` ran.
+        self._dense_args: _DenseArgs | None = (
+            index_spec,
+            batch_max_size,
+            batch_max_wait_ms,
+            vector_store,
+        )
+        self._dense_lock = threading.Lock()
+        self._dense_ready = threading.Event()
+
+        # Hybrid: executor created lazily per process (threads do not survive fork)
+        self.fusion_spec = (fusion_spec or FusionSpec()).validate()
+        self.hybrid_workers = hybrid_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_pid: int | None = None
+        self._executor_lock = threading.Lock()
+        if not defer_dense:
+            self.load_dense()
+
+    @property
+    def dense_ready(self) -> bool:
+        """Whether variant "B" can be served."""
+        return self._dense_ready.is_set()
+
+    def load_dense(self) -> None:
+        """Load the encoder and build (or adopt) the dense index; idempotent.
+
+        Safe to call from a background thread while variant "A" serves;
+        concurrent callers block until the first load finishes.
+        """
+        with self._dense_lock:
+            if self._dense_ready.is_set() or self._dense_args is None:
+                return
+            index_spec, batch_max_size, batch_max_wait_ms, vector_store = self._dense_args
+            self.encoder = self.encoder_spec.load()
+            if vector_store is not None:
+                self.vs = vector_store
+            else:
+                self.vs = VectorStore(
+                    self._encode_docs(self.docs),
+                    list(self.ids),
+                    spec=index_spec,
+                    compact_ratio=self.compact_ratio,
+                )
+            if batch_max_size > 1:
+                self._dense_batcher = MicroBatcher(
+                    self._dense_batch, batch_max_size, batch_max_wait_ms, name="dense"
+                )
+            self._dense_args = None
+            self._dense_ready.set()
+
+    def _require_dense(self) -> VectorStore:
+        """Return the dense store or raise `BackendNotReadyError` if still loading."""
+        if not self._dense_ready.is_set():
+            raise BackendNotReadyError('Dense backend (variant "B") is still loading')
+        assert self.vs is not None  # set before `_dense_ready`
+        return self.vs
 
-        # Dense backend
-        self.model = SentenceTransformer(DEFAULT_ST_MODEL)
-        embs = self.model.encode(docs, convert_to_numpy=True, normalize_embeddings=False)
-        self.vs = VectorStore(embs, ids)
+    def _hybrid_executor(self) -> ThreadPoolExecutor:
+        """Thread pool for hybrid dense branches, (re)created in each process."""
+        with self._executor_lock:  # concurrent first calls must not each build a pool
+            executor = self._executor
+            if executor is None or self._executor_pid != os.getpid():
+                executor = ThreadPoolExecutor(self.hybrid_workers, thread_name_prefix="hybrid")
+                self._executor, self._executor_pid = executor, os.getpid()
+            return executor
 
-    def retrieve(self, query: str, k: int = 6, variant: str = "A") -> List[Hit]:
+    def retrieve(
+        self, query: str, k: int = 6, variant: str = "A", prune: bool = False
+    ) -> List[Hit]:
         """Retrieve top-k hits for a query using the selected variant.
 
         Args:
           query: User query string.
           k: Number of hits to return; clamped to corpus size.
-          variant: "A" for BM25 (lexical) or "B" for dense vectors.
+          variant: "A" for BM25 (lexical), "B" for dense vectors or "H" for
+            hybrid (both, fused by `fusion_spec`).
+          prune: BM25 only; use MaxScore dynamic pruning (same hits, fewer
+            documents scored for multi-term queries).
 
         Returns:
           List of (doc_id, score) pairs in descending score order.
 
+        Raises:
+          BackendNotReadyError: Variant "B" or "H" before the dense backend is loaded.
+
         Notes:
-          - BM25 scores are not comparable with dense scores; use per-variant A/B.
+          - BM25 scores are not comparable with dense scores; "H" fuses ranks
+            (or per-branch normalized scores) instead of raw scores.
+          - BM25 only scores documents sharing a term with the query; ties are
+            broken by corpus order.
+        """
+        k = max(1, min(k, len(self.id2pos)))
+        if variant == "A":
+            tokens = self.analyzer.query_tokens(query)
+            return [(self.ids[i], score) for i, score in self.bm25.top_k(tokens, k, prune)]
+        if variant == "H":
+            return self.retrieve_batch([query], k=k, variant="H", prune=prune)[0]
+
+        # Variant B: dense vectors (micro-batched with concurrent queries if enabled)
+        vs = self._require_dense()
+        if self._dense_batcher is not None:
+            return self._dense_batcher((query, k))
+        q = self.query_cache.encode([query])
+        return vs.search(q, k=k)
+
+    def retrieve_batch(
+        self, queries: List[str], k: int = 6, variant: str = "A", prune: bool = False
+    ) -> List[List[Hit]]:
+        """Retrieve top-k hits for many queries at once.
+
+        Variant "B" encodes all queries in one batched forward pass and runs a
+        single FAISS search; variant "A" scores each query on the shared BM25
+        index (postings traversal is per query anyway). Variant "H" runs the
+        batched dense branch on the hybrid pool while BM25 scores here, then
+        fuses each query's two rankings; each branch gets its own span.
+
+        Args:
+          queries: User query strings.
+          k: Number of hits per query; clamped to corpus size.
+          variant: "A" for BM25 (lexical), "B" for dense vectors or "H" for hybrid.
+          prune: BM25 only; see `retrieve`.
+
+        Returns:
+          One hit list per query, aligned with `queries`, each identical to
+          what `retrieve` returns for that query.
+
+        Raises:
+          BackendNotReadyError: Variant "B" or "H" before the dense backend is loaded.
         """
-        k = max(1, min(k, len(self.ids)))
+        if not queries:
+            return []
+        k = max(1, min(k, len(self.id2pos)))
         if variant == "A":
-            scores = self.bm25.get_scores(query.split())
-            topk = np.argsort(scores)[-k:][::-1]
-            return [(self.ids[i], float(scores[i])) for i in topk]
+            return [self.retrieve(q, k=k, variant="A", prune=prune) for q in queries]
+        if variant == "H":
+            return self._hybrid(queries, k, prune)
+        vs = self._require_dense()
+        qs = self.query_cache.encode(queries)
+        return vs.search_batch(qs, k=k)
+
+    def _hybrid(self, queries: List[str], k: int, prune: bool) -> List[List[Hit]]:
+        """Variant H: dense branch on the pool overlapping BM25 here, then fuse."""
+        self._require_dense()
+        depth = min(max(k, self.fusion_spec.depth), len(self.id2pos))
+        ctx = otel_context.get_current()
+        dense = self._hybrid_executor().submit(
+            self._branch, "retrieve_dense", ctx, queries, depth, "B", prune
+        )
+        lexical = self._branch("retrieve_lexical", ctx, queries, depth, "A", prune)
+        with tracer.start_as_current_span("fuse") as span:
+            span.set_attribute("fusion", self.fusion_spec.method)
+            pairs = zip(lexical, dense.result(), strict=True)
+            return [fuse(pair, self.fusion_spec, k) for pair in pairs]
+
+    def _branch(
+        self,
+        name: str,
+        ctx: otel_context.Context,
+        queries: List[str],
+        k: int,
+        variant: str,
+        prune: bool,
+    ) -> List[List[Hit]]:
+        """One hybrid branch under its own span (parented to `ctx` across threads)."""
+        with tracer.start_as_current_span(name, context=ctx) as span:
+            t0 = time.perf_counter()
+            if len(queries) == 1:  # single query: keeps the dense micro-batcher in play
+                hits = [self.retrieve(queries[0], k=k, variant=variant, prune=prune)]
+            else:
+                hits = self.retrieve_batch(queries, k=k, variant=variant, prune=prune)
+            span.set_attribute("latency_ms", round((time.perf_counter() - t0) * 1000.0, 2))
+            return hits
+
+    def _dense_batch(self, items: List[Tuple[str, int]]) -> List[List[Hit]]:
+        """Micro-batch body: one encode + one search at the largest k, then truncate."""
+        k_max = max(k for _, k in items)
+        qs = self.query_cache.encode([q for q, _ in items])
+        hits_per_query = self._require_dense().search_batch(qs, k=k_max)
+        return [hits[:k] for hits, (_, k) in zip(hits_per_query, items, strict=True)]
+
+    def add_documents(self, docs: List[str], ids: List[str]) -> None:
+        """Index new documents; cost is proportional to `docs` only.
+
+        Args:
+          docs: New document texts.
+          ids: Their unique IDs (same length/order as `docs`).
+
+        Raises:
+          ValueError: On length mismatch or if an ID is already indexed.
+        """
+        if len(docs) != len(ids):
+            raise ValueError("docs and ids must have the same length")
+        if any(self._has_doc(d_id) for d_id in ids) or len(set(ids)) != len(ids):
+            raise ValueError("Document IDs must be unique and not already indexed")
+        if not docs:
+            return
+        self.load_dense()
+        self._append(docs, ids)
+        self._advance_version("add", ids)
+
+    def update_documents(self, docs: List[str], ids: List[str]) -> None:
+        """Replace the content of already-indexed documents.
+
+        The new versions are appended and the old positions tombstoned, so the
+        corpus never becomes empty mid-update.
+
+        Args:
+          docs: New document texts.
+          ids: IDs of existing documents (same length/order as `docs`).
+
+        Raises:
+          ValueError: On length mismatch, duplicate IDs or unknown IDs.
+        """
+        if len(docs) != len(ids) or len(set(ids)) != len(ids):
+            raise ValueError("docs and ids must have the same length and unique IDs")
+        missing = [d_id for d_id in ids if not self._has_doc(d_id)]
+        if missing:
+            raise ValueError(f"Unknown document IDs: {missing[:5]}")
+        if not docs:
+            return
+        self.load_dense()
+        units = self._units(ids)
+        old = [self.id2pos.pop(u) for u in units]
+        self._require_dense().remove(units)
+        self._append(docs, ids)
+        self._tombstone(old)
+        self._advance_version("update", ids)
+
+    def delete_documents(self, ids: List[str]) -> int:
+        """Remove documents from both backends (unknown IDs are ignored).
+
+        Args:
+          ids: IDs of documents to delete.
+
+        Returns:
+          Number of documents deleted.
+
+        Raises:
+          ValueError: If the deletion would leave the corpus empty.
+        """
+        known = [d_id for d_id in dict.fromkeys(ids) if self._has_doc(d_id)]
+        if not known:
+            return 0
+        n_docs = len(self.chunks) if self.chunks is not None else len(self.id2pos)
+        if len(known) == n_docs:
+            raise ValueError("Empty corpus: cannot delete every document")
+        self.load_dense()
+        units = self._units(known)
+        positions = [self.id2pos.pop(u) for u in units]
+        self._require_dense().remove(units)
+        if self.chunks is not None:
+            self.chunks.remove(known)
+        self._tombstone(positions)
+        self._advance_version("delete", known)
+        return len(known)
+
+    def compact(self) -> None:
+        """Drop tombstoned positions and renumber documents densely (both backends)."""
+        kept = self.bm25.compact().tolist()
+        self.docs = [self.docs[i] for i in kept]
+        self.ids = [self.ids[i] for i in kept]
+        self.id2pos = {d_id: i for i, d_id in enumerate(self.ids)}
+        if self.vs is not None:
+            self.vs.compact()
+
+    def _advance_version(self, op: str, ids: List[str]) -> None:
+        """Derive the next `corpus_version` from the current one and a mutation."""
+        h = hashlib.sha256(f"{self.corpus_version}\0{op}".encode())
+        for d_id in ids:
+            h.update(f"\0{d_id}".encode())
+        self.corpus_version = h.hexdigest()
+
+    def _has_doc(self, doc_id: str) -> bool:
+        """Whether a document (not a chunk) is indexed."""
+        return doc_id in self.chunks if self.chunks is not None else doc_id in self.id2pos
+
+    def _units(self, doc_ids: List[str]) -> List[str]:
+        """Retrieval-unit ids of indexed documents (their chunk ids when chunking)."""
+        if self.chunks is None:
+            return list(doc_ids)
+        return [c for d_id in doc_ids for c in self.chunks.chunk_ids(d_id)]
+
+    def _append(self, docs: List[str], ids: List[str]) -> None:
+        """Index validated new documents at trailing positions (both backends)."""
+        if self.chunks is not None:
+            docs, ids = self.chunks.add(docs, ids)
+        positions = self.bm25.add([self.analyzer(d) for d in docs])
+        self.docs.extend(docs)
+        self.ids.extend(ids)
+        self.id2pos.update(zip(ids, positions.tolist(), strict=True))
+        self._require_dense().add(self._encode_docs(docs), list(ids))
 
-        # Variant B: dense vectors
-        q = self.model.encode([query], convert_to_numpy=True)
-        return self.vs.search(q, k=k)
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Raw encoder embeddings; the store L2-normalizes its copies."""
+        if self.encoder is None:
+            raise BackendNotReadyError("Encoder is still loading")
+        return self.encoder.encode(texts)
+
+    def _encode_docs(self, docs: List[str]) -> np.ndarray:
+        """Embed documents through the persistent cache when one is configured."""
+        if self.embedding_cache is None:
+            return self._encode(docs)
+        return self.embedding_cache.encode(docs, self._encode)
+
+    def _tombstone(self, positions: List[int]) -> None:
+        """Tombstone BM25 positions, release their text, compact when due."""
+        self.bm25.delete(positions)
+        for pos in positions:
+            self.docs[pos] = ""
+        if self.bm25.num_deleted > self.compact_ratio * len(self.docs):
+            self.compact()
 
     def contexts_for(self, hit_ids: List[str]) -> List[str]:
-        """Resolve contexts (raw docs) for a list of hit IDs.
+        """Resolve contexts (raw docs or passages) for a list of hit IDs.
+
+        Args:
+          hit_ids: Unit identifiers returned by `retrieve()`.
+
+        Returns:
+          Texts of the hit IDs still indexed, in order (missing IDs are
+          skipped; `resolve()` keeps positions).
+        """
+        return [found[0] for found in self.resolve(hit_ids) if found is not None]
+
+    def spans_for(self, hit_ids: List[str]) -> List[Span]:
+        """Resolve hit IDs to (doc_id, start, end) offsets in their source documents.
 
         Args:
-          hit_ids: Document identifiers returned by `retrieve()`.
+          hit_ids: Unit identifiers returned by `retrieve()`.
 
         Returns:
-          List of document texts aligned with `hit_ids`. Missing IDs are ignored.
+          Spans of the hit IDs still indexed, in order (a whole document spans
+          its full text without chunking; missing IDs are skipped, `resolve()`
+          keeps positions).
         """
-        ctxs: List[str] = []
-        for d_id in hit_ids:
-            pos = self.id2pos.get(d_id)
-            if pos is not None:
-                ctxs.append(self.docs[pos])
-        return ctxs
+        return [found[1] for found in self.resolve(hit_ids) if found is not None]
+
+    def resolve(self, hit_ids: List[str]) -> List[Tuple[str, Span] | None]:
+        """Resolve hit IDs to (unit text, source span) in one pass.
+
+        Args:
+          hit_ids: Unit identifiers returned by `retrieve()`.
+
+        Returns:
+          One entry per hit ID, None where the unit is no longer indexed (e.g.
+          deleted or updated since it was retrieved), so callers can keep hits,
+          texts and spans aligned.
+        """
+        out: List[Tuple[str, Span] | None] = []
+        for u_id in hit_ids:
+            pos = self.id2pos.get(u_id)
+            if pos is None:
+                out.append(None)
+            elif self.chunks is None:
+                text = self.docs[pos]
+                out.append((text, (u_id, 0, len(text))))
+            else:
+                try:
+                    span = self.chunks.locate(u_id)
+                except KeyError:  # its document was removed since the lookup
+                    out.append(None)
+                else:
+                    out.append((self.docs[pos], span))
+        return out
 
 
 class Generator:
@@ -167,7 +818,9 @@ class Generator:
 
     Replace `generate()` with a real LLM call (LiteLLM/OpenAI/Azure/HF) to
     move beyond the demo. Keep the interface unchanged to avoid breaking
-    the pipeline or observability.
+    the pipeline or observability. `agenerate()` is the async entry point
+    used by `RAGPipeline.arun`; a network-backed generator should await its
+    provider there (e.g. with `httpx.AsyncClient`) instead of blocking.
     """
 
     def generate(self, question: str, contexts: List[str]) -> str:
@@ -183,84 +836,581 @@ class Generator:
         ctx = "\n---\n".join(contexts)
         return f"Demo answer (from {len(contexts)} passages):\n{ctx[:800]}\n..."
 
+    async def agenerate(self, question: str, contexts: List[str]) -> str:
+        """Async `generate()`; the demo answer needs no I/O, so it runs inline."""
+        return self.generate(question, contexts)
+
+    async def astream(self, question: str, contexts: List[str]) -> AsyncIterator[str]:
+        """Stream the answer as text chunks that concatenate to the full answer.
+
+        A streaming LLM client should yield its deltas here. The demo splits the
+        `agenerate()` answer into words (each with its trailing whitespace).
+
+        Args:
+          question: The sanitized user question.
+          contexts: Retrieved passages used to ground the answer.
+
+        Yields:
+          Answer text chunks, in order.
+        """
+        for piece in re.findall(r"\S+\s*|\s+", await self.agenerate(question, contexts)):
+            yield piece
+
+    def generate_batch(self, questions: List[str], contexts: List[List[str]]) -> List[str]:
+        """Answer many questions; used by `RAGPipeline.run_batch`.
+
+        A provider with a batch API should override this with a single request.
+
+        Args:
+          questions: Sanitized questions.
+          contexts: Retrieved passages per question, aligned with `questions`.
+
+        Returns:
+          One answer per question.
+        """
+        return [self.generate(q, c) for q, c in zip(questions, contexts, strict=True)]
+
 
 class RAGPipeline:
     """End-to-end RAG runner with observability and guardrails.
 
     Responsibilities:
       - Apply pre-enforcement guardrails (e.g., PII masking).
-      - Retrieve top-k contexts (BM25 or Dense).
+      - Serve repeated questions from an optional response cache, and run
+        concurrent identical requests once (single-flight).
+      - Retrieve top-k contexts (BM25, Dense or Hybrid), optionally re-ranking
+        a larger candidate set with a cross-encoder.
       - Generate an answer (placeholder).
       - Apply post-enforcement guardrails.
       - Emit OTel spans/metrics for each stage.
 
+    `run()` executes every stage in the calling thread. `arun()` is the
+    async-native flow: CPU-bound stages (query encoding, index search,
+    re-ranking) run on a bounded per-process thread pool of `cpu_workers`
+    threads, generation is awaited, and the event loop stays free meanwhile.
+    `run_batch()` answers many questions with each stage run once for the
+    whole batch (one encode and one index search per retrieval variant).
+    `astream()` yields the hits as soon as retrieval completes, then the
+    answer chunk by chunk, masked incrementally by the policy.
+
     Args:
       retriever: Configured `Retriever` instance.
       policy: Optional policy engine; defaults to `PolicyEngine()`.
+      reranker: Optional cross-encoder re-ranker (required for `rerank=True`).
+      cache: Optional full-response cache, looked up after pre-enforcement.
+      config_version: Hash of the settings that shape responses (part of cache keys).
+      coalesce: Share one execution between concurrent identical requests
+        (same key as the response cache).
+      cpu_workers: Threads of the executor running CPU-bound stages for `arun()`.
 
     Example:
-      pipeline = RAGPipeline(Retriever(docs, ids))
-      res = pipeline.run("What is privacy?", variant="A", k=5)
+      pipeline = RAGPipeline(Retriever(docs, ids), reranker=Reranker())
+      res = pipeline.run("What is privacy?", variant="A", k=5, rerank=True)
+      res = await pipeline.arun("What is privacy?", variant="H", k=5)
+      results = pipeline.run_batch([("What is privacy?", "A", 5), ("Who audits?", "B", 3)])
     """
 
-    def __init__(self, retriever: Retriever, policy: PolicyEngine | None = None) -> None:
+    def __init__(
+        self,
+        retriever: Retriever,
+        policy: PolicyEngine | None = None,
+        reranker: Reranker | None = None,
+        cache: ResponseCache | None = None,
+        config_version: str = "",
+        coalesce: bool = True,
+        cpu_workers: int = 4,
+    ) -> None:
         self.retriever = retriever
         self.generator = Generator()
         self.policy = policy or PolicyEngine()
+        self.reranker = reranker
+        self.cache = cache
+        self.config_version = config_version
+        self.cpu_workers = cpu_workers
+        self._flight: SingleFlight[Dict] | None = SingleFlight("query") if coalesce else None
+        self._aflight: AsyncSingleFlight[Dict] | None = (
+            AsyncSingleFlight("query") if coalesce else None
+        )
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_pid: int | None = None
+        self._executor_lock = threading.Lock()
 
-    def run(self, question: str, variant: str = "A", k: int = 6) -> Dict:
+    def run(
+        self,
+        question: str,
+        variant: str = "A",
+        k: int = 6,
+        rerank: bool = False,
+        rerank_budget_ms: float | None = None,
+    ) -> Dict:
         """Execute the RAG flow for a single query.
 
         Args:
           question: Raw user question.
-          variant: Retrieval variant ("A"=BM25, "B"=Dense).
+          variant: Retrieval variant ("A"=BM25, "B"=Dense, "H"=Hybrid).
           k: Number of contexts to retrieve (clamped to corpus size).
+          rerank: Re-rank `reranker.spec.candidates` first-stage hits with the
+            cross-encoder and keep the best `k`.
+          rerank_budget_ms: Latency budget of the re-rank stage (None = the
+            reranker default, 0 = unbounded).
 
         Returns:
           Dict with keys:
             - answer (str): Final, post-enforced answer text.
-            - variant (str): The retrieval variant used ("A" or "B").
+            - variant (str): The retrieval variant used ("A", "B" or "H").
             - k (int): Number of retrieved contexts considered.
-            - hits (List[Hit]): (doc_id, score) pairs.
+            - hits (List[Hit]): (unit_id, score) pairs (chunk ids when chunking).
+            - spans (List[Span]): (doc_id, start, end) source offsets aligned with `hits`.
+            - reranked (int): Candidates re-scored by the cross-encoder (0 without re-ranking).
+            - cached (bool): Served from the response cache (keyed by the sanitized
+              question, variant, k, re-rank options, corpus and config versions).
             - latency_ms (float): End-to-end latency in milliseconds.
 
-        Notes:
-          - For production, attach cite-spans and re-ranking for higher quality.
+        Raises:
+          ValueError: If `rerank` is set but no reranker is configured.
         """
+        if rerank and self.reranker is None:
+            raise ValueError("Re-ranking requested but no reranker is configured")
         with tracer.start_as_current_span("rag_query") as span:
-            rag_requests_total.add(1)
             t0 = time.time()
+            q_clean, key = self._begin(span, question, variant, k, rerank, rerank_budget_ms)
+            result = self._lookup(key)
+            span.set_attribute("cache_hit", result is not None)
+            if result is None:
 
-            q_clean = self.policy.pre_enforce(question)
-            span.set_attribute("variant", variant)
-            span.set_attribute("k", k)
+                def compute() -> Dict:
+                    return self._answer(q_clean, variant, k, rerank, rerank_budget_ms, key)
 
-            # Retrieval stage
-            with tracer.start_as_current_span("retrieve"):
-                hits = self.retriever.retrieve(q_clean, k=k, variant=variant)
+                if self._flight is not None:
+                    result, coalesced = self._flight.do(key, compute)
+                    span.set_attribute("coalesced", coalesced)
+                else:
+                    result = compute()
+            return self._finish(span, t0, result)
 
-            # Context assembly stage
-            with tracer.start_as_current_span("gather_contexts"):
-                hit_ids = [doc_id for doc_id, _ in hits]
-                contexts = self.retriever.contexts_for(hit_ids)
+    async def arun(
+        self,
+        question: str,
+        variant: str = "A",
+        k: int = 6,
+        rerank: bool = False,
+        rerank_budget_ms: float | None = None,
+    ) -> Dict:
+        """Async `run()`: CPU-bound stages and cache I/O are offloaded, generation awaited.
 
-            # Generation stage
-            with tracer.start_as_current_span("generate"):
-                answer = self.generator.generate(q_clean, contexts)
+        Takes the same arguments and returns the same dict as `run()`.
 
-            # Post-enforcement stage
-            answer = self.policy.post_enforce(answer)
+        Raises:
+          ValueError: If `rerank` is set but no reranker is configured.
+          BackendNotReadyError: Variant "B" or "H" before the dense backend is loaded.
+        """
+        if rerank and self.reranker is None:
+            raise ValueError("Re-ranking requested but no reranker is configured")
+        with tracer.start_as_current_span("rag_query") as span:
+            t0 = time.time()
+            q_clean, key = self._begin(span, question, variant, k, rerank, rerank_budget_ms)
+            result = await self._offload(self._lookup, key)
+            span.set_attribute("cache_hit", result is not None)
+            if result is None:
 
-            # Metrics
-            latency = (time.time() - t0) * 1000.0
-            rag_latency_ms.record(latency)
-            span.set_attribute("latency_ms", round(latency, 1))
+                def compute() -> Awaitable[Dict]:
+                    return self._aanswer(q_clean, variant, k, rerank, rerank_budget_ms, key)
 
-            return {
-                "answer": answer,
+                if self._aflight is not None:
+                    result, coalesced = await self._aflight.do(key, compute)
+                    span.set_attribute("coalesced", coalesced)
+                else:
+                    result = await compute()
+            return self._finish(span, t0, result)
+
+    async def astream(
+        self,
+        question: str,
+        variant: str = "A",
+        k: int = 6,
+        rerank: bool = False,
+        rerank_budget_ms: float | None = None,
+    ) -> AsyncGenerator[Dict, None]:
+        """Streaming `arun()`: hits first, then post-enforced answer chunks.
+
+        Retrieval (and re-ranking) run as in `arun()`; the hits are yielded
+        before generation starts, so time to first byte is the retrieval time.
+        Answer chunks from `Generator.astream` pass through the policy's
+        `post_enforcer()`, which releases text as soon as no PII match can
+        still cover it. Cache hits replay the stored answer as one chunk; the
+        streamed answer is cached once complete. Streams are not coalesced.
+
+        Args:
+          question: Raw user question.
+          variant: Retrieval variant ("A", "B" or "H").
+          k: Number of contexts to retrieve (clamped to corpus size).
+          rerank: Re-rank first-stage candidates (see `run`).
+          rerank_budget_ms: Re-rank latency budget (see `run`).
+
+        Yields:
+          Event dicts, tagged by "event":
+            - "hits": variant, k, hits, spans, reranked and cached, as in `run()`.
+            - "token": text, the next masked chunk of the answer.
+            - "done": cached and latency_ms (end to end).
+
+        Raises:
+          ValueError: If `rerank` is set but no reranker is configured.
+          BackendNotReadyError: Variant "B" or "H" before the dense backend is loaded
+            (raised before the first event).
+        """
+        if rerank and self.reranker is None:
+            raise ValueError("Re-ranking requested but no reranker is configured")
+        # The span outlives single steps of the generator (which may resume in
+        # other tasks), so it is activated per step instead of via a `with`.
+        span = tracer.start_span("rag_stream")
+        try:
+            t0 = time.time()
+            with trace.use_span(span):
+                q_clean, key = self._begin(span, question, variant, k, rerank, rerank_budget_ms)
+                result = await self._offload(self._lookup, key)
+                span.set_attribute("cache_hit", result is not None)
+                if result is None:
+                    hits = await self._offload(self._retrieve, q_clean, variant, k, rerank)
+                    reranked = 0
+                    if rerank:
+                        hits, reranked = await self._offload(
+                            self._rerank, q_clean, hits, k, rerank, rerank_budget_ms
+                        )
+                    hits, contexts, spans = self._gather(hits)
+                else:
+                    hits, spans, reranked = result["hits"], result["spans"], result["reranked"]
+            cached = result is not None
+            stream_time_to_hits_ms.record((time.time() - t0) * 1000.0)
+            yield {
+                "event": "hits",
                 "variant": variant,
                 "k": k,
                 "hits": hits,
-                "latency_ms": round(latency, 1),
+                "spans": spans,
+                "reranked": reranked,
+                "cached": cached,
             }
+            if result is not None:
+                yield {"event": "token", "text": result["answer"]}
+            else:
+                parts: List[str] = []
+                masker = self.policy.post_enforcer()
+                with trace.use_span(span):
+                    gen = tracer.start_span("generate")
+                try:
+                    async for chunk in self.generator.astream(q_clean, contexts):
+                        safe = masker.feed(chunk)
+                        if safe:
+                            parts.append(safe)
+                            yield {"event": "token", "text": safe}
+                    tail = masker.flush()
+                    if tail:
+                        parts.append(tail)
+                        yield {"event": "token", "text": tail}
+                finally:
+                    gen.end()
+                answer = "".join(parts)
+                await self._offload(
+                    self._store, key, q_clean, variant, k, hits, spans, reranked, answer, True
+                )
+            latency = (time.time() - t0) * 1000.0
+            rag_latency_ms.record(latency)
+            span.set_attribute("latency_ms", round(latency, 1))
+            yield {"event": "done", "cached": cached, "latency_ms": round(latency, 1)}
+        finally:
+            span.end()
+
+    def run_batch(
+        self,
+        queries: List[Tuple[str, str, int]],
+        rerank: bool = False,
+        rerank_budget_ms: float | None = None,
+    ) -> List[Dict]:
+        """Execute the RAG flow for many queries with batched stages.
+
+        Questions are pre-enforced and looked up in the response cache first;
+        duplicates within the batch are answered once. The remaining questions
+        are retrieved with one `Retriever.retrieve_batch` call per variant (at
+        the largest depth of the group, truncated per item; hybrid items per
+        variant and depth, since fusion depends on it), then re-ranked,
+        generated (`Generator.generate_batch`) and post-enforced together.
+
+        Args:
+          queries: (question, variant, k) per item.
+          rerank: Re-rank every item (see `run`).
+          rerank_budget_ms: Re-rank latency budget per item (see `run`).
+
+        Returns:
+          One dict per query, aligned with `queries`, with the keys of `run()`.
+          `latency_ms` is the time from the start of the batch until the item
+          was ready: cache hits return early, computed items when the batch
+          completes.
+
+        Raises:
+          ValueError: If `rerank` is set but no reranker is configured.
+          BackendNotReadyError: A variant "B" or "H" item before the dense backend is loaded.
+        """
+        if rerank and self.reranker is None:
+            raise ValueError("Re-ranking requested but no reranker is configured")
+        with tracer.start_as_current_span("rag_batch") as span:
+            t0 = time.time()
+            span.set_attribute("size", len(queries))
+            rag_requests_total.add(len(queries))
+            cleaned = [self.policy.pre_enforce(q) for q, _, _ in queries]
+            keys = [
+                self._key(q_clean, variant, k, rerank, rerank_budget_ms)
+                for q_clean, (_, variant, k) in zip(cleaned, queries, strict=True)
+            ]
+            done: Dict[str, Tuple[Dict, float]] = {}
+            todo: Dict[str, int] = {}  # key -> first item with it
+            for i, key in enumerate(keys):
+                if key in done or key in todo:
+                    continue
+                cached = self._lookup(key)
+                if cached is None:
+                    todo[key] = i
+                else:
+                    done[key] = (cached, (time.time() - t0) * 1000.0)
+            span.set_attribute("cache_hits", len(done))
+            span.set_attribute("computed", len(todo))
+            if todo:
+                items = [(cleaned[i], queries[i][1], queries[i][2], key) for key, i in todo.items()]
+                answered = self._answer_batch(items, rerank, rerank_budget_ms)
+                latency = (time.time() - t0) * 1000.0
+                for key, result in zip(todo, answered, strict=True):
+                    done[key] = (result, latency)
+            out = []
+            for key in keys:
+                result, latency = done[key]
+                rag_latency_ms.record(latency)
+                out.append({"cached": False, **result, "latency_ms": round(latency, 1)})
+            span.set_attribute("latency_ms", round((time.time() - t0) * 1000.0, 1))
+            return out
 
+    def _begin(
+        self,
+        span: OtelSpan,
+        question: str,
+        variant: str,
+        k: int,
+        rerank: bool,
+        rerank_budget_ms: float | None,
+    ) -> Tuple[str, str]:
+        """Pre-enforce and build the cache key: (q_clean, key)."""
+        rag_requests_total.add(1)
+        q_clean = self.policy.pre_enforce(question)
+        span.set_attribute("variant", variant)
+        span.set_attribute("k", k)
+        return q_clean, self._key(q_clean, variant, k, rerank, rerank_budget_ms)
+
+    def _key(
+        self, q_clean: str, variant: str, k: int, rerank: bool, rerank_budget_ms: float | None
+    ) -> str:
+        """Response-cache (and single-flight) key of a sanitized request."""
+        return response_key(
+            q_clean,
+            variant,
+            k,
+            corpus_version=self.retriever.corpus_version,
+            config_version=self.config_version,
+            rerank=rerank,
+            rerank_budget_ms=rerank_budget_ms,
+        )
+
+    def _lookup(self, key: str) -> Dict | None:
+        """Cached response for `key`, marked `cached`, or None.
+
+        May block on the cache backend (SQLite): the async paths offload it.
+        """
+        result = self.cache.get(key) if self.cache is not None else None
+        if result is not None:  # JSON round trip: restore tuples
+            result["hits"] = [tuple(h) for h in result["hits"]]
+            result["spans"] = [tuple(sp) for sp in result["spans"]]
+            result["cached"] = True
+        return result
+
+    def _finish(self, span: OtelSpan, t0: float, result: Dict) -> Dict:
+        """Record latency metrics and stamp the response."""
+        latency = (time.time() - t0) * 1000.0
+        rag_latency_ms.record(latency)
+        span.set_attribute("latency_ms", round(latency, 1))
+        return {"cached": False, **result, "latency_ms": round(latency, 1)}
+
+    def _answer(
+        self,
+        q_clean: str,
+        variant: str,
+        k: int,
+        rerank: bool,
+        rerank_budget_ms: float | None,
+        key: str,
+    ) -> Dict:
+        """Retrieve, (re-rank,) generate and post-enforce for a sanitized question."""
+        hits = self._retrieve(q_clean, variant, k, rerank)
+        hits, reranked = self._rerank(q_clean, hits, k, rerank, rerank_budget_ms)
+        hits, contexts, spans = self._gather(hits)
+        with tracer.start_as_current_span("generate"):
+            answer = self.generator.generate(q_clean, contexts)
+        return self._store(key, q_clean, variant, k, hits, spans, reranked, answer)
+
+    def _answer_batch(
+        self,
+        items: List[Tuple[str, str, int, str]],
+        rerank: bool,
+        rerank_budget_ms: float | None,
+    ) -> List[Dict]:
+        """`_answer()` for (q_clean, variant, k, key) items, one call per stage."""
+        hits = self._retrieve_batch([(q, v, k) for q, v, k, _ in items], rerank)
+        reranked = [0] * len(items)
+        for i, (q_clean, _, k, _) in enumerate(items):
+            hits[i], reranked[i] = self._rerank(q_clean, hits[i], k, rerank, rerank_budget_ms)
+        contexts: List[List[str]] = []
+        spans: List[List[Span]] = []
+        with tracer.start_as_current_span("gather_contexts"):
+            for i, item_hits in enumerate(hits):
+                hits[i], item_contexts, item_spans = self._live(item_hits)
+                contexts.append(item_contexts)
+                spans.append(item_spans)
+        with tracer.start_as_current_span("generate"):
+            answers = self.generator.generate_batch([q for q, _, _, _ in items], contexts)
+        return [
+            self._store(key, q_clean, variant, k, hits[i], spans[i], reranked[i], answers[i])
+            for i, (q_clean, variant, k, key) in enumerate(items)
+        ]
+
+    async def _aanswer(
+        self,
+        q_clean: str,
+        variant: str,
+        k: int,
+        rerank: bool,
+        rerank_budget_ms: float | None,
+        key: str,
+    ) -> Dict:
+        """`_answer()` with CPU-bound and cache stages on the executor, generation awaited."""
+        hits = await self._offload(self._retrieve, q_clean, variant, k, rerank)
+        if rerank:
+            hits, reranked = await self._offload(
+                self._rerank, q_clean, hits, k, rerank, rerank_budget_ms
+            )
+        else:
+            reranked = 0
+        hits, contexts, spans = self._gather(hits)
+        with tracer.start_as_current_span("generate"):
+            answer = await self.generator.agenerate(q_clean, contexts)
+        return await self._offload(
+            self._store, key, q_clean, variant, k, hits, spans, reranked, answer
+        )
+
+    def _cpu_executor(self) -> ThreadPoolExecutor:
+        """Bounded pool for CPU-bound and cache stages of `arun()`, (re)created per process."""
+        with self._executor_lock:  # concurrent first calls must not each build a pool
+            executor = self._executor
+            if executor is None or self._executor_pid != os.getpid():
+                executor = ThreadPoolExecutor(self.cpu_workers, thread_name_prefix="rag-cpu")
+                self._executor, self._executor_pid = executor, os.getpid()
+            return executor
+
+    async def _offload(self, fn: Callable[..., T], *args: object) -> T:
+        """Run `fn(*args)` on the CPU executor, keeping the trace context."""
+        ctx = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._cpu_executor(), partial(ctx.run, fn, *args))
+
+    def _retrieve(self, q_clean: str, variant: str, k: int, rerank: bool) -> List[Hit]:
+        """Retrieval stage (a deeper candidate list when re-ranking)."""
+        with tracer.start_as_current_span("retrieve"):
+            return self.retriever.retrieve(q_clean, k=self._depth(k, rerank), variant=variant)
+
+    def _retrieve_batch(self, queries: List[Tuple[str, str, int]], rerank: bool) -> List[List[Hit]]:
+        """Retrieval stage for a batch: one `retrieve_batch` per variant, at the largest depth.
+
+        Hybrid items are also grouped by fusion depth (`max(depth, fusion_spec.depth)`):
+        a deeper search would fuse, and rank, differently than `run()`.
+        """
+        fusion_depth = self.retriever.fusion_spec.depth
+        groups: Dict[Tuple[str, int], List[int]] = {}
+        for i, (_, variant, k) in enumerate(queries):
+            depth = max(self._depth(k, rerank), fusion_depth) if variant == "H" else 0
+            groups.setdefault((variant, depth), []).append(i)
+        out: List[List[Hit]] = [[] for _ in queries]
+        with tracer.start_as_current_span("retrieve") as span:
+            span.set_attribute("variants", len(groups))
+            for (variant, _), idx in groups.items():
+                depths = [self._depth(queries[i][2], rerank) for i in idx]
+                batch = self.retriever.retrieve_batch(
+                    [queries[i][0] for i in idx], k=max(depths), variant=variant
+                )
+                for i, depth, hits in zip(idx, depths, batch, strict=True):
+                    out[i] = hits[:depth]
+        return out
+
+    def _depth(self, k: int, rerank: bool) -> int:
+        """First-stage depth: `k`, or the re-rank candidate count if larger."""
+        if not rerank:
+            return k
+        assert self.reranker is not None  # checked on entry to run/arun/astream/run_batch
+        return max(k, self.reranker.spec.candidates)
+
+    def _rerank(
+        self,
+        q_clean: str,
+        hits: List[Hit],
+        k: int,
+        rerank: bool,
+        rerank_budget_ms: float | None,
+    ) -> Tuple[List[Hit], int]:
+        """Re-ranking stage (optional): (hits, number of re-ranked candidates)."""
+        if not rerank:
+            return hits, 0
+        assert self.reranker is not None  # checked on entry to run/arun/astream/run_batch
+        with tracer.start_as_current_span("rerank") as span:
+            hits, texts, _ = self._live(hits)
+            hits, reranked = self.reranker.rerank(
+                q_clean, hits, texts, k=k, budget_ms=rerank_budget_ms
+            )
+            span.set_attribute("candidates", reranked)
+            return hits, reranked
+
+    def _gather(self, hits: List[Hit]) -> Tuple[List[Hit], List[str], List[Span]]:
+        """Context assembly stage: live hits, their passage texts and source offsets."""
+        with tracer.start_as_current_span("gather_contexts"):
+            return self._live(hits)
+
+    def _live(self, hits: List[Hit]) -> Tuple[List[Hit], List[str], List[Span]]:
+        """Hits still indexed, with aligned texts and spans.
+
+        A document deleted or updated between retrieval and this lookup drops
+        its hits here, so responses (and cached entries) never pair a hit with
+        another hit's span.
+        """
+        found = self.retriever.resolve([unit_id for unit_id, _ in hits])
+        live = [(hit, f) for hit, f in zip(hits, found, strict=True) if f is not None]
+        return [hit for hit, _ in live], [f[0] for _, f in live], [f[1] for _, f in live]
+
+    def _store(
+        self,
+        key: str,
+        q_clean: str,
+        variant: str,
+        k: int,
+        hits: List[Hit],
+        spans: List[Span],
+        reranked: int,
+        answer: str,
+        enforced: bool = False,
+    ) -> Dict:
+        """Post-enforce the answer (unless `enforced`), assemble the response, fill the cache."""
+        if not enforced:
+            answer = self.policy.post_enforce(answer)
+        out = {
+            "answer": answer,
+            "variant": variant,
+            "k": k,
+            "hits": hits,
+            "spans": spans,
+            "reranked": reranked,
+        }
+        if self.cache is not None:
+            self.cache.put(key, out)
+        return out
@@ -0,0 +1,204 @@
+"""Cross-encoder re-ranking of first-stage retrieval candidates.
+
+Overview:
+  BM25, dense and hybrid retrieval score the query and each passage
+  independently. A cross-encoder reads every (query, passage) pair jointly,
+  which ranks better but costs one transformer pass per pair. `Reranker`
+  therefore re-scores only the top `candidates` first-stage hits and returns
+  the best `k` of them.
+
+Strategy:
+  - Pairs are scored in batches of `batch_size`, best first-stage hit first.
+  - Pair scores are cached in memory, keyed by (sha256(query), sha256(passage)),
+    so repeated questions over the same passages skip the model.
+  - Latency budget: with `budget_ms > 0` the candidate list is truncated to
+    the pairs the budget affords, using a running estimate of the per-pair
+    cost (cached pairs are free). Scoring also stops between batches once the
+    deadline has passed. Candidates that were not re-scored keep their
+    first-stage order after the re-ranked ones and only fill up to `k`.
+
+Metrics:
+  Pairs are counted on `rag_rerank_pairs_total`, tagged source="cache" or
+  "model"; `rag_rerank_candidates` records how many candidates were re-ranked.
+
+Example:
+  reranker = Reranker(RerankSpec(candidates=30))
+  hits = reranker.rerank(question, candidates, passages, k=6, budget_ms=50)
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from src.obs.otel import rerank_candidates, rerank_pairs_total
+from src.pipelines.embed_cache import text_digest
+from src.pipelines.topk import top_k_indices
+
+# (document_id, score), same as `src.pipelines.rag.Hit`
+Hit = Tuple[str, float]
+
+# Batched (query, passage) pairs -> (N,) relevance scores, e.g. `CrossEncoder.predict`.
+ScoreFn = Callable[[List[Tuple[str, str]]], np.ndarray]
+
+DEFAULT_CROSS_ENCODER = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+@dataclass(frozen=True)
+class RerankSpec:
+    """Declarative re-ranking configuration.
+
+    Attributes:
+      model_name: Sentence-Transformers cross-encoder identifier.
+      candidates: First-stage hits fetched for re-ranking (>= k at query time).
+      batch_size: Pairs per cross-encoder forward pass.
+      cache_size: Max cached pair scores (0 disables caching).
+      budget_ms: Default latency budget of the re-rank stage (0 = unbounded).
+    """
+
+    model_name: str = DEFAULT_CROSS_ENCODER
+    candidates: int = 30
+    batch_size: int = 16
+    cache_size: int = 8192
+    budget_ms: float = 0.0
+
+    def validate(self) -> RerankSpec:
+        """Catch invalid sizes early.
+
+        Returns:
+          RerankSpec: The same spec if validation succeeds.
+
+        Raises:
+          ValueError: If `candidates` or `batch_size` < 1, or `cache_size` / `budget_ms` < 0.
+        """
+        if self.candidates < 1 or self.batch_size < 1:
+            raise ValueError("candidates and batch_size must be >= 1")
+        if self.cache_size < 0 or self.budget_ms < 0:
+            raise ValueError("cache_size and budget_ms must be >= 0")
+        return self
+
+
+class Reranker:
+    """Cross-encoder re-ranker with a pair-score cache and a latency budget.
+
+    Args:
+      spec: Re-ranking configuration.
+      score_fn: Pair scorer; defaults to a `CrossEncoder(spec.model_name)`
+        loaded on first use.
+
+    Attributes:
+      ms_per_pair: Running estimate of the model cost per pair (None until
+        the first batch is scored).
+    """
+
+    def __init__(self, spec: RerankSpec | None = None, score_fn: ScoreFn | None = None) -> None:
+        self.spec = (spec or RerankSpec()).validate()
+        self.ms_per_pair: float | None = None
+        self._score_fn = score_fn
+        self._cache: OrderedDict[bytes, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _scorer(self) -> ScoreFn:
+        """Return the pair scorer, loading the cross-encoder once."""
+        with self._lock:
+            if self._score_fn is None:
+                from sentence_transformers import CrossEncoder
+
+                model = CrossEncoder(self.spec.model_name)
+                self._score_fn = lambda pairs: model.predict(
+                    pairs, batch_size=len(pairs), convert_to_numpy=True
+                )
+            return self._score_fn
+
+    def rerank(
+        self,
+        query: str,
+        hits: Sequence[Hit],
+        texts: Sequence[str],
+        k: int,
+        budget_ms: float | None = None,
+    ) -> Tuple[List[Hit], int]:
+        """Re-score first-stage candidates with the cross-encoder.
+
+        Args:
+          query: The (sanitized) question.
+          hits: First-stage candidates, best first.
+          texts: Passage texts aligned with `hits`.
+          k: Number of hits to return.
+          budget_ms: Latency budget for this call (None = `spec.budget_ms`, 0 = unbounded).
+
+        Returns:
+          A tuple (hits, reranked): up to `k` hits, the re-ranked ones first
+          with cross-encoder scores, then unscored candidates in first-stage
+          order with their original scores; `reranked` counts the re-ranked
+          candidates.
+
+        Raises:
+          ValueError: If `hits` and `texts` differ in length.
+        """
+        if len(hits) != len(texts):
+            raise ValueError("hits and texts must be aligned")
+        score_fn = self._scorer()  # load outside the budget
+        budget = self.spec.budget_ms if budget_ms is None else budget_ms
+        t0 = time.perf_counter()
+        deadline = t0 + budget / 1000.0 if budget > 0 else math.inf
+
+        qkey = text_digest(query)
+        keys = [qkey + text_digest(t) for t in texts]
+        scores: Dict[int, float] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+                    scores[i] = score
+        rerank_pairs_total.add(len(scores), {"source": "cache"})
+
+        # Truncate to the prefix whose uncached pairs fit the budget.
+        affordable = len(hits)
+        if budget > 0:
+            if self.ms_per_pair is None:
+                affordable = self.spec.batch_size  # first call: one probing batch
+            else:
+                affordable = int(budget / self.ms_per_pair)
+        todo: List[int] = []
+        n = len(hits)
+        for i in range(len(hits)):
+            if i not in scores:
+                if len(todo) == affordable:
+                    n = i
+                    break
+                todo.append(i)
+
+        for start in range(0, len(todo), self.spec.batch_size):
+            if time.perf_counter() >= deadline:
+                n = todo[start]  # stop at the first unscored candidate
+                break
+            rows = todo[start : start + self.spec.batch_size]
+            t_batch = time.perf_counter()
+            out = np.asarray(score_fn([(query, texts[i]) for i in rows]), dtype=np.float32)
+            cost = (time.perf_counter() - t_batch) * 1000.0 / len(rows)
+            self.ms_per_pair = (
+                cost if self.ms_per_pair is None else (0.8 * self.ms_per_pair + 0.2 * cost)
+            )
+            rerank_pairs_total.add(len(rows), {"source": "model"})
+            with self._lock:
+                for i, score in zip(rows, out.tolist(), strict=True):
+                    scores[i] = score
+                    if self.spec.cache_size > 0:
+                        self._cache[keys[i]] = score
+                        self._cache.move_to_end(keys[i])
+                while len(self._cache) > self.spec.cache_size:
+                    self._cache.popitem(last=False)
+
+        # tie key = first-stage rank: equal cross-encoder scores keep first-stage order
+        head = top_k_indices(np.array([scores[i] for i in range(n)]), k, keys=np.arange(n))
+        ranked = [(hits[i][0], scores[i]) for i in head.tolist()] + list(hits[n:])
+        rerank_candidates.record(n)
+        return ranked[:k], n
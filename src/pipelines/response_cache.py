@@ -0,0 +1,316 @@
+"""Full-response cache for repeated questions.
+
+Overview:
+  Traffic repeats the same questions, and a cached answer skips retrieval,
+  re-ranking and generation entirely. `RAGPipeline.run` looks responses up
+  after pre-enforcement, so the key is built from the *sanitized* question
+  plus everything else that shapes the answer:
+
+    (sanitized question, variant, k, re-rank options,
+     corpus version, config version)
+
+  The corpus version (`Retriever.corpus_version`) changes with every document
+  add/update/delete, and the config version hashes the retrieval settings, so
+  entries made against an older index are simply never looked up again and
+  age out through eviction or TTL.
+
+Backends:
+  - "memory": per-process LRU bounded by bytes, with a TinyLFU admission
+              filter (a small count-min sketch of key frequencies) so one-off
+              questions do not evict frequently asked ones.
+  - "sqlite": local SQLite file (WAL mode) shared by every worker on the
+              host; bounded by bytes with least-recently-used eviction.
+  Both store JSON-encoded responses (sizes are the encoded byte lengths) and
+  expire entries after `ttl_s` seconds (0 = no TTL).
+
+Metrics:
+  Lookups are counted on `rag_response_cache_hits_total` /
+  `rag_response_cache_misses_total`, tagged with the backend name.
+
+Example:
+  cache = make_response_cache("memory", max_bytes=64 << 20, ttl_s=300)
+  key = response_key(q_clean, "A", 6, corpus_version=r.corpus_version)
+  cache.put(key, result); cache.get(key)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Protocol, Tuple
+
+import numpy as np
+
+from src.obs.otel import response_cache_hits_total, response_cache_misses_total
+
+RESPONSE_CACHE_BACKENDS = ("off", "memory", "sqlite")
+
+
+def response_key(
+    question: str,
+    variant: str,
+    k: int,
+    corpus_version: str = "",
+    config_version: str = "",
+    **options: object,
+) -> str:
+    """Cache key of a response (hex SHA-256 over the canonical JSON of its inputs).
+
+    Args:
+      question: Sanitized question.
+      variant: Retrieval variant.
+      k: Number of hits.
+      corpus_version: Index version (see `Retriever.corpus_version`).
+      config_version: Hash of the settings that shape responses.
+      **options: Further per-request options (e.g. re-ranking), JSON-serializable.
+
+    Returns:
+      64-character hex digest.
+    """
+    payload = [question, variant, k, corpus_version, config_version, sorted(options.items())]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class ResponseCache(Protocol):
+    """Key -> response store with TTL and a byte bound."""
+
+    name: str
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        """Cached response, or None when absent or expired."""
+        ...
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a JSON-serializable response (may be declined by admission)."""
+        ...
+
+
+class _FrequencySketch:
+    """TinyLFU count-min sketch (4 rows, saturating uint8 counters, periodic halving)."""
+
+    def __init__(self, width: int = 1 << 14) -> None:
+        self.width = width
+        self.table = np.zeros((4, width), dtype=np.uint8)
+        self.additions = 0
+        self.sample = 10 * width
+
+    def _cols(self, key: str) -> np.ndarray:
+        """One counter column per row, from a 128-bit hash of `key`."""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        return np.frombuffer(digest, dtype=np.uint32) % self.width
+
+    def increment(self, key: str) -> None:
+        """Record one access to `key`."""
+        cols = self._cols(key)
+        rows = np.arange(4)
+        cells = self.table[rows, cols]
+        self.table[rows, cols] = np.where(cells < 255, cells + 1, cells)
+        self.additions += 1
+        if self.additions >= self.sample:  # aging: recent popularity wins
+            self.table >>= 1
+            self.additions //= 2
+
+    def estimate(self, key: str) -> int:
+        """Approximate recent access count of `key` (never underestimates)."""
+        return int(self.table[np.arange(4), self._cols(key)].min())
+
+
+class MemoryResponseCache:
+    """In-process LRU bounded by bytes, with TTL and TinyLFU admission.
+
+    Args:
+      max_bytes: Upper bound on the encoded size of all entries.
+      ttl_s: Entry lifetime in seconds (0 = no expiry).
+      admission: Use the TinyLFU filter; a new entry that would evict a more
+        frequently requested one is declined.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int, ttl_s: float = 0.0, admission: bool = True) -> None:
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.nbytes = 0
+        self._items: OrderedDict[str, Tuple[bytes, float]] = OrderedDict()
+        self._sketch = _FrequencySketch() if admission else None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of cached responses (including not yet purged expired ones)."""
+        return len(self._items)
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        """Cached response (a fresh copy), or None when absent or expired."""
+        with self._lock:
+            if self._sketch is not None:
+                self._sketch.increment(key)
+            item = self._items.get(key)
+            if item is not None and item[1] < time.monotonic():
+                self._drop(key)
+                item = None
+            if item is not None:
+                self._items.move_to_end(key)
+        if item is None:
+            response_cache_misses_total.add(1, {"backend": self.name})
+            return None
+        response_cache_hits_total.add(1, {"backend": self.name})
+        return json.loads(item[0])
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response, evicting least-recently-used entries to fit."""
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl_s if self.ttl_s > 0 else float("inf")
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+            # Admission is decided against every victim before any is dropped,
+            # so a declined entry never costs a resident one.
+            victims: List[str] = []
+            freed = 0
+            lru = iter(self._items)
+            while self.nbytes - freed + len(data) > self.max_bytes:
+                victim = next(lru)
+                if self._sketch is not None and (
+                    self._sketch.estimate(key) < self._sketch.estimate(victim)
+                ):
+                    return  # TinyLFU: keep the more popular resident entries
+                victims.append(victim)
+                freed += len(self._items[victim][0])
+            for victim in victims:
+                self._drop(victim)
+            self._items[key] = (data, expires)
+            self.nbytes += len(data)
+
+    def _drop(self, key: str) -> None:
+        """Remove an entry (caller holds the lock)."""
+        data, _ = self._items.pop(key)
+        self.nbytes -= len(data)
+
+
+class SqliteResponseCache:
+    """Response cache in a local SQLite file, shared by processes on one host.
+
+    Each process (and fork) opens its own connection; WAL mode lets readers
+    proceed while a writer holds the lock.
+
+    Args:
+      path: Database file (parent directories are created).
+      max_bytes: Upper bound on the encoded size of all entries.
+      ttl_s: Entry lifetime in seconds (0 = no expiry).
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str | Path, max_bytes: int, ttl_s: float = 0.0) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._conn: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db().execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+                " size INTEGER NOT NULL, expires REAL NOT NULL, atime REAL NOT NULL)"
+            )
+            self._db().execute("CREATE INDEX IF NOT EXISTS responses_atime ON responses (atime)")
+
+    def _db(self) -> sqlite3.Connection:
+        """Connection of the current process (connections must not cross fork)."""
+        conn = self._conn
+        if conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path, timeout=5.0, isolation_level=None, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn, self._pid = conn, os.getpid()
+        return conn
+
+    def __len__(self) -> int:
+        """Number of stored responses."""
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        """Cached response, or None when absent or expired."""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT value FROM responses WHERE key = ? AND expires > ?", (key, now)
+            ).fetchone()
+            if row is not None:
+                db.execute("UPDATE responses SET atime = ? WHERE key = ?", (now, key))
+        if row is None:
+            response_cache_misses_total.add(1, {"backend": self.name})
+            return None
+        response_cache_hits_total.add(1, {"backend": self.name})
+        return json.loads(row[0])
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a response, then purge expired and least-recently-used entries."""
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        if len(data) > self.max_bytes:
+            return
+        now = time.time()
+        expires = now + self.ttl_s if self.ttl_s > 0 else float("inf")
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                    (key, data, len(data), expires, now),
+                )
+                db.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+                total = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+                if total > self.max_bytes:
+                    # Oldest entries first, until the running total fits again.
+                    db.execute(
+                        "DELETE FROM responses WHERE key IN (SELECT key FROM ("
+                        " SELECT key, size, SUM(size) OVER (ORDER BY atime, key) AS run"
+                        " FROM responses) WHERE run - size < ?)",
+                        (total - self.max_bytes,),
+                    )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+
+def make_response_cache(
+    backend: str, max_bytes: int, ttl_s: float = 0.0, path: str | Path | None = None
+) -> ResponseCache | None:
+    """Build the configured response cache.
+
+    Args:
+      backend: One of `RESPONSE_CACHE_BACKENDS`.
+      max_bytes: Size bound in bytes.
+      ttl_s: Entry lifetime in seconds (0 = no expiry).
+      path: Database file for "sqlite".
+
+    Returns:
+      The cache, or None for "off".
+
+    Raises:
+      ValueError: If `backend` is unknown or "sqlite" has no `path`.
+    """
+    if backend not in RESPONSE_CACHE_BACKENDS:
+        raise ValueError(f"Invalid response cache backend: {backend}")
+    if backend == "off":
+        return None
+    if backend == "sqlite":
+        if not path:
+            raise ValueError('Response cache backend "sqlite" requires a path')
+        return SqliteResponseCache(path, max_bytes, ttl_s)
+    return MemoryResponseCache(max_bytes, ttl_s)
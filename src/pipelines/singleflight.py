@@ -0,0 +1,150 @@
+"""Single-flight deduplication of identical in-flight work.
+
+Overview:
+  When a popular question spikes, many identical `/query` calls arrive before
+  the first one has produced (and cached) its response. `SingleFlight` lets
+  the first caller for a key run the work while concurrent callers with the
+  same key block and receive the same result (or the same exception) instead
+  of repeating retrieval and generation.
+
+  Only *concurrent* calls are merged: the key is released as soon as the
+  leader finishes, so later calls are served by the response cache (if any)
+  or run again. `AsyncSingleFlight` does the same for coroutines on one
+  event loop; if its leader is cancelled (e.g. the client disconnected),
+  the waiters run the work again instead of failing with it.
+
+Metrics:
+  Callers that waited on another call are counted on
+  `rag_coalesced_requests_total`, tagged with the flight name.
+
+Example:
+  flight = SingleFlight("query")
+  result, shared = flight.do(key, lambda: expensive(question))
+  result, shared = await AsyncSingleFlight("query").do(key, lambda: aexpensive(question))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Generic, Tuple, TypeVar, cast
+
+from src.obs.otel import coalesced_requests_total
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    """One in-flight execution and its outcome."""
+
+    __slots__ = ("done", "error", "result")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: T | None = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight(Generic[T]):
+    """Merge concurrent calls that share a key into one execution.
+
+    Args:
+      name: Label for metrics.
+    """
+
+    def __init__(self, name: str = "default") -> None:
+        self.name = name
+        self._calls: Dict[str, _Call[T]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """Run `fn` once for all concurrent callers with the same `key`.
+
+        Args:
+          key: Identity of the work (e.g. a response-cache key).
+          fn: The work; runs in the first caller's thread.
+
+        Returns:
+          A tuple (result, shared): `shared` is True for callers that received
+          another caller's result. All callers get the same object.
+
+        Raises:
+          BaseException: Whatever `fn` raised, re-raised in every waiting caller.
+        """
+        with self._lock:
+            running = self._calls.get(key)
+            if running is None:
+                call: _Call[T] = _Call()
+                self._calls[key] = call
+        if running is not None:
+            coalesced_requests_total.add(1, {"flight": self.name})
+            running.done.wait()
+            if running.error is not None:
+                raise running.error
+            return cast(T, running.result), True
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class AsyncSingleFlight(Generic[T]):
+    """`SingleFlight` for coroutines sharing one event loop.
+
+    Waiters await the leader's future instead of blocking a thread, so the
+    event loop keeps serving other requests meanwhile.
+
+    Args:
+      name: Label for metrics.
+    """
+
+    def __init__(self, name: str = "default") -> None:
+        self.name = name
+        self._calls: Dict[str, asyncio.Future[T]] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Await `fn()` once for all concurrent callers with the same `key`.
+
+        Args:
+          key: Identity of the work.
+          fn: Coroutine factory; awaited by the first caller.
+
+        Returns:
+          A tuple (result, shared), as for `SingleFlight.do`.
+
+        Raises:
+          BaseException: Whatever `fn()` raised, re-raised in every waiting caller
+            (a cancelled leader is not an error: its waiters run `fn` again).
+        """
+        while (running := self._calls.get(key)) is not None:
+            coalesced_requests_total.add(1, {"flight": self.name})
+            try:
+                # shield: a cancelled waiter must not cancel the shared execution
+                return await asyncio.shield(running), True
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not running.cancelled() or (task is not None and task.cancelling()):
+                    raise  # this caller was cancelled
+                # Only the leader was cancelled: retry (the first waiter leads).
+        fut: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        self._calls[key] = fut
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as exc:
+            fut.set_exception(exc)
+            fut.exception()  # mark retrieved: no "never retrieved" warning without waiters
+            raise
+        else:
+            fut.set_result(result)
+            return result, False
+        finally:
+            del self._calls[key]
@@ -0,0 +1,59 @@
+"""Shared top-k selection over dense score vectors.
+
+Overview:
+  Retrieval backends (BM25, fusion, re-ranking) all end with "give me the k
+  best of N scores". A full `np.argsort` is O(N log N) even though k is small
+  (the API caps it at 100); this module selects in O(N) with `np.argpartition`
+  and only sorts the k survivors.
+
+Strategy:
+  1) Find the k-th largest score with a single partition pass.
+  2) Keep every score strictly above it, then fill the remaining slots from the
+     scores equal to it, preferring the smallest tie-break keys.
+  3) Sort the k selected entries by (score desc, key asc).
+
+Determinism:
+  Ties are always broken by ascending key (document position by default), so
+  the result is identical to `np.lexsort((keys, -scores))[:k]` regardless of
+  how `argpartition` orders equal values internally.
+
+Example:
+  order = top_k_indices(scores, k=6)
+  hits = [(ids[i], float(scores[i])) for i in order]
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def top_k_indices(scores: np.ndarray, k: int, keys: np.ndarray | None = None) -> np.ndarray:
+    """Return indices of the k best scores, sorted by (score desc, key asc).
+
+    Args:
+      scores: 1D array of scores (higher is better; NaNs are not supported).
+      k: Number of indices to return (clamped to `[0, len(scores)]`).
+      keys: Optional 1D tie-break keys aligned with `scores` (e.g. document
+        positions of a candidate subset). Defaults to the index itself.
+
+    Returns:
+      intp array of at most k indices into `scores`.
+    """
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if keys is None:
+        keys = np.arange(n)
+    if k < n:
+        kth = np.partition(scores, n - k)[n - k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)
+        need = k - above.shape[0]
+        if ties.shape[0] > need:
+            # Large tie groups (e.g. many zero scores) keep only the lowest keys.
+            ties = ties[np.argpartition(keys[ties], need - 1)[:need]]
+        cand = np.concatenate([above, ties])
+    else:
+        cand = np.arange(n)
+    return cand[np.lexsort((keys[cand], -scores[cand]))]
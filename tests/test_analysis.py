@@ -0,0 +1,52 @@
+"""Unit tests for the lexical text analyzer.
+
+These tests exercise:
+  - Case folding, punctuation stripping, stopwords and stemming.
+  - Query-token caching and the whitespace (historical) analyzer.
+
+Run:
+  pytest -q tests/test_analysis.py
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from src.pipelines.analysis import ENGLISH_STOPWORDS, Analyzer, s_stem
+
+
+def test_default_folds_case_and_strips_punctuation() -> None:
+    """Punctuation (ASCII and Unicode) separates tokens; case is folded."""
+    analyzer = Analyzer()
+    assert analyzer("GDPR-compliant, (privacy) “by design”—yes!") == [
+        "gdpr",
+        "compliant",
+        "privacy",
+        "by",
+        "design",
+        "yes",
+    ]
+
+
+def test_stopwords_and_stemming() -> None:
+    """Stopwords are dropped before the light plural stemmer runs."""
+    analyzer = Analyzer(stopwords=ENGLISH_STOPWORDS, stemmer="s")
+    assert analyzer("What are the policies for users?") == ["policy", "user"]
+    assert [s_stem(t) for t in ("status", "class", "shoes", "bies")] == [
+        "status",
+        "class",
+        "shoe",
+        "by",
+    ]
+    with pytest.raises(ValueError):
+        Analyzer(stemmer="porter")
+
+
+def test_query_tokens_are_cached_and_consistent() -> None:
+    """Cached query analysis equals document analysis and counts hits."""
+    analyzer = Analyzer()
+    text = "Privacy policy?"
+    assert list(analyzer.query_tokens(text)) == analyzer(text)
+    analyzer.query_tokens(text)
+    assert analyzer.cache_info().hits == 1
+    assert Analyzer.whitespace()("Privacy policy?") == ["Privacy", "policy?"]
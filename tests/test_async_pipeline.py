@@ -0,0 +1,125 @@
+"""Unit tests for the async-native query path.
+
+These tests exercise:
+  - `RAGPipeline.arun` returning the same response as `run`.
+  - CPU-bound stages and response-cache I/O running on the pipeline
+    executor, off the event loop.
+  - Identical concurrent `arun` calls coalescing on one event loop, while
+    errors reach every waiter.
+
+Run:
+  pytest -q tests/test_async_pipeline.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Dict, List
+
+import pytest
+
+from src.pipelines.rag import Generator, RAGPipeline, Retriever
+from src.pipelines.response_cache import MemoryResponseCache
+from src.pipelines.singleflight import AsyncSingleFlight
+
+DOCS = ["alpha beta", "gdpr retention policy", "other text"]
+
+
+def _retriever() -> Retriever:
+    return Retriever(DOCS, ["a", "b", "c"], defer_dense=True)
+
+
+def test_arun_matches_run() -> None:
+    """Both entry points produce the same answer, hits and spans."""
+    pipeline = RAGPipeline(_retriever(), cpu_workers=2)
+    sync = pipeline.run("gdpr retention", variant="A", k=2)
+    out = asyncio.run(pipeline.arun("gdpr retention", variant="A", k=2))
+    for key in ("answer", "variant", "k", "hits", "spans", "reranked", "cached"):
+        assert out[key] == sync[key]
+
+
+def test_cpu_stages_leave_the_event_loop() -> None:
+    """Retrieval runs on the pipeline executor, not the event-loop thread."""
+    retriever = _retriever()
+    threads: List[str] = []
+    retrieve = retriever.retrieve
+
+    def spy(*args: object, **kwargs: object) -> object:
+        threads.append(threading.current_thread().name)
+        return retrieve(*args, **kwargs)
+
+    retriever.retrieve = spy  # type: ignore[method-assign]
+    asyncio.run(RAGPipeline(retriever).arun("gdpr", k=1))
+    assert threads and threads[0].startswith("rag-cpu")
+
+
+def test_cache_io_leaves_the_event_loop() -> None:
+    """Response-cache lookups and fills (blocking with SQLite) run on the executor."""
+    threads: List[str] = []
+
+    class SpyCache(MemoryResponseCache):
+        def get(self, key: str) -> Dict[str, Any] | None:
+            """Record the calling thread."""
+            threads.append(threading.current_thread().name)
+            return super().get(key)
+
+        def put(self, key: str, value: Dict[str, Any]) -> None:
+            """Record the calling thread."""
+            threads.append(threading.current_thread().name)
+            super().put(key, value)
+
+    pipeline = RAGPipeline(_retriever(), cache=SpyCache(max_bytes=1 << 20))
+    assert not asyncio.run(pipeline.arun("gdpr", k=1))["cached"]
+    assert asyncio.run(pipeline.arun("gdpr", k=1))["cached"]
+    assert len(threads) == 3  # miss, fill, hit
+    assert all(name.startswith("rag-cpu") for name in threads)
+
+
+def test_concurrent_arun_calls_coalesce() -> None:
+    """A burst of one question generates once; the loop serves other work meanwhile."""
+    calls: List[str] = []
+
+    class SlowGenerator(Generator):
+        async def agenerate(self, question: str, contexts: List[str]) -> str:
+            """Record the call and await 50 ms."""
+            calls.append(question)
+            await asyncio.sleep(0.05)
+            return self.generate(question, contexts)
+
+    pipeline = RAGPipeline(_retriever())
+    pipeline.generator = SlowGenerator()
+
+    async def burst() -> List[dict]:
+        return await asyncio.gather(*(pipeline.arun("gdpr", k=1) for _ in range(5)))
+
+    outcomes = asyncio.run(burst())
+    assert calls == ["gdpr"]
+    assert all(o["answer"] == outcomes[0]["answer"] for o in outcomes)
+
+
+def test_async_flight_propagates_errors() -> None:
+    """Waiters see the leader's exception; the key is released afterwards."""
+    flight: AsyncSingleFlight[int] = AsyncSingleFlight("test")
+
+    async def boom() -> int:
+        await asyncio.sleep(0.02)
+        raise RuntimeError("backend down")
+
+    async def ok() -> int:
+        return 1
+
+    async def scenario() -> None:
+        outcomes = await asyncio.gather(
+            *(flight.do("k", boom) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(o, RuntimeError) for o in outcomes)
+        assert await flight.do("k", ok) == (1, False)
+
+    asyncio.run(scenario())
+
+
+def test_arun_requires_a_reranker() -> None:
+    """`rerank=True` without a configured reranker is rejected."""
+    with pytest.raises(ValueError):
+        asyncio.run(RAGPipeline(_retriever()).arun("gdpr", rerank=True))
@@ -0,0 +1,87 @@
+"""Unit tests for batched query execution.
+
+These tests exercise:
+  - `RAGPipeline.run_batch` returning, per item, what `run` returns.
+  - One retrieval call per variant for the whole batch, at the largest depth
+    (hybrid items per depth, as fusion depends on it).
+  - Duplicate questions answered once, and cache hits skipping the stages.
+
+Run:
+  pytest -q tests/test_batch_pipeline.py
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+from src.pipelines.rag import Generator, RAGPipeline, Retriever
+from src.pipelines.response_cache import MemoryResponseCache
+
+DOCS = ["alpha beta", "gdpr retention policy", "other text", "beta gamma gdpr"]
+
+
+def _retriever() -> Retriever:
+    return Retriever(DOCS, ["a", "b", "c", "d"], defer_dense=True)
+
+
+def test_batch_matches_single_runs() -> None:
+    """Each item gets the answer, hits and spans of an individual `run`."""
+    pipeline = RAGPipeline(_retriever())
+    queries = [("gdpr retention", "A", 2), ("beta", "A", 1), ("other", "A", 4)]
+    batch = pipeline.run_batch(queries)
+    for (question, variant, k), result in zip(queries, batch, strict=True):
+        single = pipeline.run(question, variant=variant, k=k)
+        for key in ("answer", "variant", "k", "hits", "spans", "reranked"):
+            assert result[key] == single[key]
+    assert pipeline.run_batch([]) == []
+
+
+def test_one_retrieval_call_per_variant() -> None:
+    """Items of a variant share a `retrieve_batch` call at the group's largest k."""
+    retriever = _retriever()
+    calls: List[tuple] = []
+    retrieve_batch = retriever.retrieve_batch
+
+    def spy(queries: List[str], k: int = 6, variant: str = "A", prune: bool = False) -> list:
+        calls.append((len(queries), k, variant))
+        return retrieve_batch(queries, k=k, variant=variant, prune=prune)
+
+    retriever.retrieve_batch = spy  # type: ignore[method-assign]
+    results = RAGPipeline(retriever).run_batch([("gdpr", "A", 1), ("beta", "A", 3)])
+    assert calls == [(2, 3, "A")]
+    assert [len(r["hits"]) for r in results] == [1, 3]
+
+
+def test_hybrid_items_group_by_depth() -> None:
+    """Hybrid items share a fused search only below the fusion depth."""
+    retriever = _retriever()
+    calls: List[tuple] = []
+
+    def spy(queries: List[str], k: int = 6, variant: str = "A", prune: bool = False) -> list:
+        calls.append((len(queries), k, variant))
+        return [[("a", 1.0)] for _ in queries]
+
+    retriever.retrieve_batch = spy  # type: ignore[method-assign]
+    items = [("gdpr", "H", 2), ("beta", "H", 80), ("other", "H", 6), ("gdpr", "A", 80)]
+    RAGPipeline(retriever)._retrieve_batch(items, rerank=False)
+    assert sorted(calls) == [(1, 80, "A"), (1, 80, "H"), (2, 6, "H")]
+
+
+def test_duplicates_and_cache_hits_skip_generation() -> None:
+    """Identical items generate once; a repeated batch is served from the cache."""
+    calls: List[int] = []
+
+    class CountingGenerator(Generator):
+        def generate_batch(self, questions: List[str], contexts: List[List[str]]) -> List[str]:
+            """Record the batch size."""
+            calls.append(len(questions))
+            return super().generate_batch(questions, contexts)
+
+    pipeline = RAGPipeline(_retriever(), cache=MemoryResponseCache(max_bytes=1 << 20))
+    pipeline.generator = CountingGenerator()
+    queries = [("gdpr", "A", 2), ("gdpr", "A", 2), ("beta", "A", 2)]
+    first = pipeline.run_batch(queries)
+    assert calls == [2] and first[0]["answer"] == first[1]["answer"]
+    second = pipeline.run_batch(queries)
+    assert calls == [2] and all(r["cached"] for r in second)
+    assert [r["hits"] for r in second] == [r["hits"] for r in first]
@@ -0,0 +1,94 @@
+"""Unit tests for the micro-batching scheduler.
+
+These tests exercise:
+  - Concurrent submissions are grouped and each caller gets its own result.
+  - Failures of the batched function reach every caller of the batch, as does
+    a result list of the wrong length.
+  - A batcher used before `fork()` keeps working in the child process.
+
+Run:
+  pytest -q tests/test_batching.py
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+
+from src.pipelines.batching import MicroBatcher
+
+
+def test_concurrent_items_are_batched() -> None:
+    """32 concurrent callers are served by far fewer batched calls."""
+    sizes: List[int] = []
+    gate = threading.Event()
+
+    def square(xs: List[int]) -> List[int]:
+        gate.wait(1.0)  # hold the first batch so the rest queue up
+        sizes.append(len(xs))
+        return [x * x for x in xs]
+
+    batcher: MicroBatcher[int, int] = MicroBatcher(square, max_batch_size=8, max_wait_ms=20)
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        futures = [pool.submit(batcher, i) for i in range(32)]
+        gate.set()
+        results = [f.result(timeout=5) for f in futures]
+    batcher.close()
+    assert results == [i * i for i in range(32)]
+    assert sum(sizes) == 32 and max(sizes) <= 8 and len(sizes) < 32
+
+
+def test_batch_errors_propagate() -> None:
+    """An exception in the batched call fails the caller's future."""
+
+    def boom(xs: List[int]) -> List[int]:
+        raise ValueError("encoder failure")
+
+    batcher: MicroBatcher[int, int] = MicroBatcher(boom, max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(ValueError, match="encoder failure"):
+        batcher(1)
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(2)
+
+
+def test_short_results_fail_every_caller() -> None:
+    """A batched function dropping a result fails the whole batch; no caller hangs."""
+    gate = threading.Event()
+
+    def short(xs: List[int]) -> List[int]:
+        gate.wait(1.0)
+        return xs[:-1]
+
+    batcher: MicroBatcher[int, int] = MicroBatcher(short, max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(3)]
+    gate.set()
+    for fut in futures:
+        with pytest.raises(RuntimeError, match="one result per item"):
+            fut.result(timeout=5)
+    batcher.close()
+
+
+def _double_in_child(batcher: MicroBatcher[int, int], out: multiprocessing.Queue[int]) -> None:
+    out.put(batcher(21))
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="fork start method is POSIX-only")
+def test_batcher_survives_fork() -> None:
+    """The worker thread is restarted lazily in a forked child (preload mode)."""
+    batcher: MicroBatcher[int, int] = MicroBatcher(lambda xs: [2 * x for x in xs], max_wait_ms=1)
+    assert batcher(1) == 2  # parent worker running at fork time
+    ctx = multiprocessing.get_context("fork")
+    out: multiprocessing.Queue[int] = ctx.Queue()
+    child = ctx.Process(target=_double_in_child, args=(batcher, out))
+    child.start()
+    assert out.get(timeout=10) == 42
+    child.join(timeout=10)
+    assert child.exitcode == 0
+    assert batcher(2) == 4
+    batcher.close()
@@ -0,0 +1,142 @@
+"""Unit tests for the inverted-index BM25 engine.
+
+These tests exercise:
+  - Bit-for-bit score parity with `rank_bm25.BM25Okapi` (A/B history stays valid).
+  - Top-k ranking equivalence with exhaustive scoring, including zero-score docs.
+
+Run:
+  pytest -q tests/test_bm25.py
+"""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+import pytest
+from rank_bm25 import BM25Okapi
+
+from src.pipelines.bm25 import BM25Index
+
+SAMPLE_DIR = Path(__file__).resolve().parents[1] / "data" / "sample_docs"
+
+
+def _sample_corpus() -> List[List[str]]:
+    """Tokenize the shipped sample docs the same way the retriever does."""
+    docs = [p.read_text(encoding="utf-8") for p in sorted(SAMPLE_DIR.glob("*.md"))]
+    return [d.split() for d in docs]
+
+
+def _synthetic_corpus(n_docs: int = 300, vocab: int = 60, seed: int = 7) -> List[List[str]]:
+    """Zipf-ish random corpus with frequent terms (exercises the IDF floor)."""
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(vocab)]
+    weights = [1.0 / (i + 1) for i in range(vocab)]
+    return [rng.choices(words, weights, k=rng.randint(1, 40)) for _ in range(n_docs)]
+
+
+def _expected_top_k(scores: np.ndarray, k: int) -> List[int]:
+    """Exhaustive reference ranking: score desc, then position asc."""
+    return sorted(range(len(scores)), key=lambda i: (-scores[i], i))[:k]
+
+
+@pytest.mark.parametrize("corpus_fn", [_sample_corpus, _synthetic_corpus])
+def test_scores_match_bm25okapi_bitwise(corpus_fn: Callable[[], List[List[str]]]) -> None:
+    """Every query yields exactly the same float64 scores as BM25Okapi."""
+    corpus = corpus_fn()
+    ref = BM25Okapi(corpus)
+    index = BM25Index(corpus)
+    vocab = sorted({t for doc in corpus for t in doc})
+    rng = random.Random(0)
+    queries = [rng.sample(vocab, rng.randint(1, 5)) for _ in range(50)]
+    queries += [["unknown-term"], vocab[:2] * 2, []]
+
+    for q in queries:
+        assert np.array_equal(index.get_scores(q), ref.get_scores(q)), q
+
+
+def test_top_k_matches_exhaustive_ranking() -> None:
+    """Top-k equals a full sort of the dense scores, zero-score docs included."""
+    corpus = _synthetic_corpus()
+    index = BM25Index(corpus)
+    rng = random.Random(1)
+    for _ in range(50):
+        q = [f"w{rng.randrange(80)}" for _ in range(rng.randint(1, 4))]
+        scores = index.get_scores(q)
+        for k in (1, 6, 50, len(corpus)):
+            hits = index.top_k(q, k)
+            assert [pos for pos, _ in hits] == _expected_top_k(scores, k)
+            assert [s for _, s in hits] == [scores[i] for i, _ in hits]
+
+
+def test_empty_corpus_is_rejected() -> None:
+    """Building an index over no documents is a configuration error."""
+    with pytest.raises(ValueError):
+        BM25Index([])
+
+
+def test_pruned_top_k_matches_exhaustive() -> None:
+    """Dynamic pruning returns exactly the exhaustive top-k (ids, scores, order)."""
+    corpus = _synthetic_corpus(n_docs=2000, vocab=400, seed=3)
+    index = BM25Index(corpus)
+    rng = random.Random(2)
+    for _ in range(100):
+        q = [f"w{rng.randrange(420)}" for _ in range(rng.randint(1, 5))]
+        for k in (1, 6, 20):
+            assert index.top_k(q, k, prune=True) == index.top_k(q, k), (q, k)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_load_roundtrip(tmp_path: Path, mmap: bool) -> None:
+    """A reloaded (optionally memory-mapped) index scores and ranks identically."""
+    corpus = _synthetic_corpus(seed=11)
+    index = BM25Index(corpus)
+    index.save(tmp_path / "bm25", manifest={"corpus_sha256": "abc"})
+    loaded = BM25Index.load(tmp_path / "bm25", mmap=mmap)
+    assert isinstance(loaded.doc_ids, np.memmap) is mmap
+    assert loaded.manifest == {"corpus_sha256": "abc"} and index.manifest == {}
+    rng = random.Random(4)
+    for _ in range(30):
+        q = [f"w{rng.randrange(70)}" for _ in range(rng.randint(1, 4))]
+        assert np.array_equal(loaded.get_scores(q), index.get_scores(q)), q
+        assert loaded.top_k(q, 6, prune=True) == index.top_k(q, 6), q
+
+
+def test_incremental_add_matches_rebuild_bitwise() -> None:
+    """Appending documents scores exactly like building over the full corpus."""
+    corpus = _synthetic_corpus(seed=5)
+    index = BM25Index(corpus[:120])
+    assert index.add(corpus[120:250]).tolist() == list(range(120, 250))
+    index.add(corpus[250:])
+    ref = BM25Index(corpus)
+    for q in (["w0", "w3"], ["w12", "w40", "w40"], ["w59"], ["unknown-term"]):
+        assert np.array_equal(index.get_scores(q), ref.get_scores(q)), q
+
+
+def test_delete_and_compact_match_rebuild() -> None:
+    """Tombstoned docs never match; statistics and ranking follow live docs."""
+    corpus = _synthetic_corpus(seed=9)
+    index = BM25Index(corpus)
+    rng = random.Random(3)
+    dead = sorted(rng.sample(range(len(corpus)), 90))
+    index.delete(dead)
+    kept = [i for i in range(len(corpus)) if i not in set(dead)]
+    ref = BM25Index([corpus[i] for i in kept])
+    assert index.num_docs == len(kept) and index.num_deleted == len(dead)
+
+    queries = [[f"w{rng.randrange(70)}" for _ in range(rng.randint(1, 4))] for _ in range(30)]
+    for q in queries:
+        scores = index.get_scores(q)
+        assert not scores[dead].any()
+        assert np.allclose(scores[kept], ref.get_scores(q), rtol=1e-12, atol=0), q
+        assert index.top_k(q, 6, prune=True) == index.top_k(q, 6), q
+        assert all(pos not in dead for pos, _ in index.top_k(q, len(kept)))
+
+    assert index.compact().tolist() == kept
+    assert index.num_deleted == 0
+    for q in queries:
+        assert np.allclose(index.get_scores(q), ref.get_scores(q), rtol=1e-12, atol=0), q
+    with pytest.raises(ValueError):
+        index.delete(range(len(kept)))
@@ -0,0 +1,80 @@
+"""Unit tests for passage chunking and chunk-level retrieval.
+
+These tests exercise:
+  - Word windows with overlap, and heading-aware section packing.
+  - `ChunkStore` offsets, replacement and removal.
+  - A chunked `Retriever` (BM25 only) returning passages and their offsets.
+
+Run:
+  pytest -q tests/test_chunking.py
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from src.pipelines.chunking import ChunkSpec, ChunkStore, chunk_corpus, chunk_spans
+from src.pipelines.rag import Retriever
+
+
+def _texts(text: str, spec: ChunkSpec) -> list[str]:
+    return [text[s:e] for s, e in chunk_spans(text, spec)]
+
+
+def test_windows_overlap_and_cover_the_text() -> None:
+    """Long sections are split into overlapping windows ending on word boundaries."""
+    text = "a b c d e f g"
+    assert _texts(text, ChunkSpec(max_tokens=3, overlap=1)) == ["a b c", "c d e", "e f g"]
+    assert _texts(text, ChunkSpec(max_tokens=7, overlap=0)) == [text]
+    assert chunk_spans("  \n ", ChunkSpec()) == []
+    with pytest.raises(ValueError):
+        ChunkSpec(max_tokens=4, overlap=4).validate()
+
+
+def test_headings_split_and_short_sections_pack() -> None:
+    """Headings start passages; sections that fit together share one."""
+    text = "# Intro\nhello world\n## Scope\nshort\n# Privacy\nmask emails and phones always here"
+    spec = ChunkSpec(max_tokens=6, overlap=1)
+    assert _texts(text, spec) == [
+        "# Intro\nhello world",
+        "## Scope\nshort",
+        "# Privacy\nmask emails and phones",
+        "phones always here",
+    ]
+    packed = _texts(text, ChunkSpec(max_tokens=8, overlap=1))
+    assert packed[0] == "# Intro\nhello world\n## Scope\nshort"
+    assert _texts(text, ChunkSpec(max_tokens=100, headings=False)) == [text]
+
+
+def test_chunk_store_offsets_replace_and_remove() -> None:
+    """Chunk ids resolve to offsets; re-adding a document replaces its chunks."""
+    store = ChunkStore(ChunkSpec(max_tokens=2, overlap=0))
+    texts, ids = store.add(["one two three", ""], ["d#x", "empty"])
+    assert ids == ["d#x#0", "d#x#1", "empty#0"] and texts == ["one two", "three", ""]
+    assert store.locate("d#x#1") == ("d#x", 8, 13)
+    assert store.chunk_ids("empty") == ["empty#0"]
+    store.add(["four"], ["d#x"])
+    assert store.chunk_ids("d#x") == ["d#x#0"] and store.locate("d#x#0") == ("d#x", 0, 4)
+    with pytest.raises(KeyError):
+        store.locate("d#x#1")
+    store.remove(["d#x"])
+    assert "d#x" not in store and len(store) == 1
+    assert chunk_corpus(["one two three"], ["d"], store.spec)[1] == ["d#0", "d#1"]
+
+
+def test_chunked_retriever_returns_passages_with_offsets() -> None:
+    """BM25 over passages: the hit is the matching section, not the whole file."""
+    docs = [
+        "# Intro\nwelcome to the demo\n# Privacy\nemails are masked before generation",
+        "# Ops\nrun the stack with docker compose",
+    ]
+    spec = ChunkSpec(max_tokens=8, overlap=1)
+    r = Retriever(docs, ["d0", "d1"], defer_dense=True, chunk_spec=spec)
+    assert r.ids == ["d0#0", "d0#1", "d1#0"]
+    hits = r.retrieve("masked emails", k=1)
+    assert hits[0][0] == "d0#1"
+    ((doc_id, start, end),) = r.spans_for([hits[0][0]])
+    assert doc_id == "d0" and docs[0][start:end] == "# Privacy\nemails are masked before generation"
+    assert r.contexts_for(["d0#1"]) == [docs[0][start:end]]
+    plain = Retriever(docs, ["d0", "d1"], defer_dense=True)
+    assert plain.spans_for(["d1", "missing"]) == [("d1", 0, len(docs[1]))]
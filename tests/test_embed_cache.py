@@ -0,0 +1,117 @@
+"""Unit tests for the content-hash embedding caches.
+
+These tests exercise:
+  - Only texts missing from the persistent cache reach the encoder, across reloads.
+  - Namespaces isolate models/normalization, and compaction keeps every vector.
+  - Concurrent writers never share a shard; unreadable shards are skipped.
+  - Short encoder batches fail instead of pairing vectors with the wrong text.
+  - The query LRU reuses recent vectors, evicts the oldest, and returns copies.
+
+Run:
+  pytest -q tests/test_embed_cache.py
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytest
+
+from src.pipelines.embed_cache import EmbeddingCache, QueryEmbeddingLRU
+
+
+class CountingEncoder:
+    """Deterministic fake encoder recording every text it is asked to embed."""
+
+    def __init__(self) -> None:
+        """Start with no recorded texts."""
+        self.seen: List[str] = []
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        """Record `texts` and return one 3-d vector per text."""
+        self.seen.extend(texts)
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+
+def test_only_changed_texts_are_encoded(tmp_path: Path) -> None:
+    """A reloaded cache serves known texts and encodes new/duplicate ones once."""
+    enc = CountingEncoder()
+    first = EmbeddingCache(tmp_path, "model/a").encode(["x", "yy", "x"], enc)
+    assert enc.seen == ["x", "yy"]
+    np.testing.assert_array_equal(first, enc(["x", "yy", "x"]))
+
+    enc.seen.clear()
+    cache = EmbeddingCache(tmp_path, "model/a")
+    again = cache.encode(["yy", "zzz", "x"], enc)
+    assert enc.seen == ["zzz"]
+    np.testing.assert_array_equal(again, enc(["yy", "zzz", "x"]))
+    assert len(cache) == 3
+
+
+def test_namespaces_and_compaction(tmp_path: Path) -> None:
+    """Different model/normalization keys never share entries; compact() merges shards."""
+    enc = CountingEncoder()
+    EmbeddingCache(tmp_path, "model/a").encode(["x"], enc)
+    EmbeddingCache(tmp_path, "model/a", normalize=True).encode(["x"], enc)
+    EmbeddingCache(tmp_path, "model/b").encode(["x"], enc)
+    assert enc.seen == ["x", "x", "x"]
+
+    cache = EmbeddingCache(tmp_path, "model/a")
+    cache.encode(["y"], enc)
+    cache.encode(["z"], enc)
+    ns = tmp_path / cache.namespace
+    assert len(list(ns.glob("shard-*.npz"))) == 3
+    cache.compact()
+    assert len(list(ns.glob("shard-*.npz"))) == 1
+    assert len(EmbeddingCache(tmp_path, "model/a")) == 3
+
+
+def test_concurrent_writers_and_truncated_shards(tmp_path: Path) -> None:
+    """Two instances flushing into one namespace keep both shards; corrupt files are skipped."""
+    enc = CountingEncoder()
+    a, b = EmbeddingCache(tmp_path, "m"), EmbeddingCache(tmp_path, "m")
+    a.encode(["from a"], enc)
+    b.encode(["from b"], enc)  # same shard count seen by both: names must still differ
+    ns = tmp_path / a.namespace
+    assert len(list(ns.glob("shard-*.npz"))) == 2
+    (ns / "shard-truncated.npz").write_bytes(b"PK\x03\x04 partial")
+    reloaded = EmbeddingCache(tmp_path, "m")
+    assert len(reloaded) == 2
+    enc.seen.clear()
+    reloaded.encode(["from a", "from b"], enc)
+    assert enc.seen == []
+    a.compact()  # merges b's shard too
+    assert len(EmbeddingCache(tmp_path, "m")) == 2
+    assert not list(ns.glob(".shard-*"))  # no temporary files left behind
+
+
+def test_short_encoder_batches_fail_without_caching(tmp_path: Path) -> None:
+    """Vectors are never paired with the wrong text when the encoder drops rows."""
+    enc = CountingEncoder()
+
+    def short(texts: List[str]) -> np.ndarray:
+        return enc(texts)[:-1]
+
+    cache = EmbeddingCache(tmp_path, "m")
+    with pytest.raises(ValueError):
+        cache.encode(["x", "yy"], short)
+    assert len(cache) == 0 and len(EmbeddingCache(tmp_path, "m")) == 0
+    with pytest.raises(ValueError):
+        QueryEmbeddingLRU(short, max_size=4).encode(["x", "yy"])
+
+
+def test_query_lru_hits_evicts_and_copies() -> None:
+    """Repeated queries skip the encoder; results are safe to normalize in place."""
+    enc = CountingEncoder()
+    lru = QueryEmbeddingLRU(enc, max_size=2)
+    out = lru.encode(["a", "b", "a"])
+    assert enc.seen == ["a", "b"]
+    out *= 0.0  # callers (FAISS normalize_L2) mutate the returned matrix
+    np.testing.assert_array_equal(lru.encode(["a"]), enc(["a"]))
+    enc.seen.clear()
+
+    lru.encode(["c"])  # evicts "b", the least recently used
+    lru.encode(["a", "b"])
+    assert enc.seen == ["c", "b"]
@@ -0,0 +1,62 @@
+"""Unit tests for the dense encoder backends.
+
+These tests exercise:
+  - `EncoderSpec` validation and vector-space names (cache / manifest keys).
+  - ONNX export parity: fp32 and int8 ONNX Runtime vectors vs. the PyTorch
+    encoder, by cosine similarity (skipped without `onnxruntime`/`onnx`).
+
+Run:
+  pytest -q tests/test_encoders.py
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.pipelines.encoders import DEFAULT_ST_MODEL, EncoderSpec, TorchEncoder, export_onnx
+
+SENTENCES = [
+    "What are the privacy guarantees?",
+    "GraphRAG-Governor exposes A/B retrieval variants.",
+    "Emails and phone numbers are masked before generation.",
+    "short",
+    "A much longer sentence about retention windows, audit logs, tenants and regions "
+    "that spans well beyond the other probes to exercise padding within a batch.",
+]
+
+
+def test_spec_validation_and_names() -> None:
+    """Unknown backends and ONNX without an export dir fail fast; names differ per space."""
+    with pytest.raises(ValueError):
+        EncoderSpec(backend="tensorrt").validate()
+    with pytest.raises(ValueError):
+        EncoderSpec(backend="onnx").validate()
+    assert EncoderSpec().name == DEFAULT_ST_MODEL
+    fp32 = EncoderSpec(backend="onnx", onnx_dir="x").name
+    int8 = EncoderSpec(backend="onnx", onnx_dir="x", quantized=True).name
+    assert len({DEFAULT_ST_MODEL, fp32, int8}) == 3
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def test_onnx_parity_with_torch(tmp_path: Path) -> None:
+    """ONNX fp32 matches PyTorch almost exactly; int8 stays close in cosine."""
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    export_onnx(DEFAULT_ST_MODEL, tmp_path, quantize=True)
+    ref = TorchEncoder().encode(SENTENCES)
+
+    fp32 = EncoderSpec(backend="onnx", onnx_dir=str(tmp_path)).load()
+    assert _cosine(ref, fp32.encode(SENTENCES)).min() > 0.9999
+
+    int8 = EncoderSpec(backend="onnx", onnx_dir=str(tmp_path), quantized=True, batch_size=2).load()
+    out = int8.encode(SENTENCES)
+    assert out.shape == ref.shape and out.dtype == np.float32
+    assert _cosine(ref, out).min() > 0.98
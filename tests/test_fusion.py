@@ -0,0 +1,57 @@
+"""Unit tests for hybrid rank fusion.
+
+These tests exercise:
+  - RRF scores, weights and doc-id tie-breaking.
+  - Min-max weighted fusion, including constant-score branches.
+  - Spec validation.
+
+Run:
+  pytest -q tests/test_fusion.py
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from src.pipelines.fusion import FusionSpec, fuse
+
+
+def test_rrf_rewards_agreement_and_breaks_ties_by_doc_id() -> None:
+    """A document ranked by both branches beats single-branch documents."""
+    lexical = [("a", 12.0), ("b", 7.5), ("c", 1.0)]
+    dense = [("b", 0.91), ("d", 0.90)]
+    fused = fuse([lexical, dense], FusionSpec(rrf_k=60), k=4)
+    assert [d for d, _ in fused] == ["b", "a", "d", "c"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+    # equal fused scores are ordered by doc id, whichever branch saw them first
+    tie = fuse([[("y", 1.0)], [("x", 1.0)]], FusionSpec(), k=2)
+    assert [d for d, _ in tie] == ["x", "y"]
+    assert fuse([[("y", 1.0)], [("x", 1.0)]], FusionSpec(), k=1)[0][0] == "x"
+
+
+def test_rrf_weights_and_truncation() -> None:
+    """Zero weight drops a branch; k truncates the fused list."""
+    lexical = [("a", 3.0), ("b", 2.0)]
+    dense = [("c", 0.9), ("d", 0.8)]
+    fused = fuse([lexical, dense], FusionSpec(weights=(0.0, 1.0)), k=1)
+    assert fused == [("c", pytest.approx(1 / 61))]
+
+
+def test_weighted_fusion_normalizes_each_branch() -> None:
+    """Scores are min-max normalized per branch before the weighted sum."""
+    lexical = [("a", 20.0), ("b", 10.0), ("c", 0.0)]
+    dense = [("c", 0.8), ("a", 0.2)]
+    fused = dict(fuse([lexical, dense], FusionSpec(method="weighted", weights=(1.0, 2.0)), k=3))
+    assert fused == pytest.approx({"a": 1.0, "b": 0.5, "c": 2.0})
+    flat = fuse([[("a", 5.0), ("b", 5.0)], []], FusionSpec(method="weighted"), k=2)
+    assert flat == [("a", 1.0), ("b", 1.0)]
+
+
+def test_spec_validation() -> None:
+    """Unknown methods and negative parameters are rejected."""
+    with pytest.raises(ValueError):
+        FusionSpec(method="max").validate()
+    with pytest.raises(ValueError):
+        FusionSpec(depth=0).validate()
+    with pytest.raises(ValueError):
+        FusionSpec(weights=(1.0, -1.0)).validate()
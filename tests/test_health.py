@@ -1,25 +1,95 @@
-"""Sanity tests for the FastAPI app: liveness, query flow, and basic schema.
+"""Sanity tests for the FastAPI app: liveness, readiness, query flow, and basic schema.
 
 These tests exercise:
   - /health liveness semantics and payload.
-  - /query happy paths for both retrieval variants (A/B).
+  - /ready and /query before warmup and while only BM25 is up (no model needed).
+  - /query happy paths for the retrieval variants (A/B/H).
   - Input validation (invalid variant) and top-k behavior.
+  - /query/batch per-item results with a BM25-only backend.
 
 Run:
   pytest -q
 """
+
 from __future__ import annotations
 
 from http import HTTPStatus
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
+import pytest
 from fastapi.testclient import TestClient
-from src.api.main import app
 
-client = TestClient(app)
+from src.api import main
+from src.api.main import ServiceState, app
+from src.pipelines.rag import RAGPipeline, Retriever
+
+
+@pytest.fixture(scope="module")
+def client() -> Iterator[TestClient]:
+    """App client with the lifespan running and warmup finished."""
+    with TestClient(app) as c:
+        assert main.STATE.wait(timeout=600)
+        assert main.STATE.error is None, main.STATE.error
+        yield c
+
+
+def test_not_ready_before_warmup(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Liveness is independent of the backends; readiness and /query are not."""
+    monkeypatch.setattr(main, "STATE", ServiceState())
+    c = TestClient(app)  # no lifespan: warmup never starts
+    assert c.get("/health").status_code == HTTPStatus.OK
+    r = c.get("/ready")
+    assert r.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert r.json()["status"] == "starting"
+    r = c.post("/query?variant=A", json={"question": "Hello?"})
+    assert r.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert "Retry-After" in r.headers
+
+
+def test_bm25_first_serves_variant_a(monkeypatch: pytest.MonkeyPatch) -> None:
+    """With a deferred dense backend, A answers and B is 503 until it loads."""
+    state = ServiceState()
+    state.retriever = Retriever(
+        ["alpha beta", "gamma delta", "epsilon zeta"], ["d0", "d1", "d2"], defer_dense=True
+    )
+    state.pipeline = RAGPipeline(state.retriever)
+    monkeypatch.setattr(main, "STATE", state)
+    c = TestClient(app)
+    r = c.get("/ready")
+    assert r.status_code == HTTPStatus.OK
+    assert r.json()["status"] == "partial"
+    assert r.json()["variants"] == {"A": True, "B": False, "H": False}
+    r = c.post("/query?variant=A&k=1", json={"question": "gamma"})
+    assert r.status_code == HTTPStatus.OK
+    hit = r.json()["hits"][0]
+    assert (hit["doc_id"], hit["chunk_id"], hit["start"], hit["end"]) == ("d1", None, 0, 11)
+    for variant in ("B", "H"):
+        r = c.post(f"/query?variant={variant}&k=1", json={"question": "gamma"})
+        assert r.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+
+def test_batch_query_with_bm25_only(monkeypatch: pytest.MonkeyPatch) -> None:
+    """/query/batch answers per item in order; dense items are 503 until loaded."""
+    state = ServiceState()
+    state.retriever = Retriever(
+        ["alpha beta", "gamma delta", "epsilon zeta"], ["d0", "d1", "d2"], defer_dense=True
+    )
+    state.pipeline = RAGPipeline(state.retriever)
+    monkeypatch.setattr(main, "STATE", state)
+    c = TestClient(app)
+    items = [{"question": "gamma", "k": 1}, {"question": "zeta", "variant": "A", "k": 50}]
+    r = c.post("/query/batch", json={"items": items})
+    assert r.status_code == HTTPStatus.OK
+    results = r.json()["results"]
+    assert [res["hits"][0]["doc_id"] for res in results] == ["d1", "d2"]
+    assert [res["k"] for res in results] == [1, 3]  # k clamped per item
+    assert all(res["latency_ms"] >= 0 for res in results)
+    r = c.post("/query/batch", json={"items": [{"question": "gamma", "variant": "B"}]})
+    assert r.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert c.post("/query/batch", json={"items": []}).status_code == HTTPStatus.UNPROCESSABLE_ENTITY
 
 
-def test_health_ok() -> None:
+def test_health_ok(client: TestClient) -> None:
     """Verify that /health returns 200 and a minimal status payload.
 
     Ensures:
@@ -33,6 +103,14 @@ def test_health_ok() -> None:
     assert body.get("status") == "ok"
 
 
+def test_ready_after_warmup(client: TestClient) -> None:
+    """Every variant is reported ready once warmup completes."""
+    r = client.get("/ready")
+    assert r.status_code == HTTPStatus.OK
+    variants = {"A": True, "B": True, "H": True}
+    assert r.json() == {"status": "ready", "variants": variants, "error": None}
+
+
 def _assert_query_response_schema(data: Dict[str, Any]) -> None:
     """Common assertions for /query response shape.
 
@@ -41,7 +119,7 @@ def _assert_query_response_schema(data: Dict[str, Any]) -> None:
 
     Ensures:
       - Required keys exist with expected types.
-      - `hits` is a list of {doc_id, score}.
+      - `hits` is a list of {doc_id, chunk_id, start, end, score}.
       - `k` matches the number of hits.
     """
     assert isinstance(data, dict)
@@ -49,7 +127,7 @@ def _assert_query_response_schema(data: Dict[str, Any]) -> None:
         assert key in data, f"Missing key in response: {key}"
 
     assert isinstance(data["answer"], str)
-    assert data["variant"] in {"A", "B"}
+    assert data["variant"] in {"A", "B", "H"}
     assert isinstance(data["k"], int) and data["k"] >= 1
     assert isinstance(data["latency_ms"], (int, float)) and data["latency_ms"] >= 0
 
@@ -60,9 +138,11 @@ def _assert_query_response_schema(data: Dict[str, Any]) -> None:
         assert isinstance(h, dict)
         assert "doc_id" in h and isinstance(h["doc_id"], str)
         assert "score" in h and isinstance(h["score"], (int, float))
+        assert 0 <= h["start"] <= h["end"]
+        assert h["chunk_id"] is None or h["chunk_id"].startswith(h["doc_id"] + "#")
 
 
-def test_query_variant_a() -> None:
+def test_query_variant_a(client: TestClient) -> None:
     """Happy path: variant A (BM25) returns a structured response."""
     r = client.post("/query?variant=A&k=3", json={"question": "What is this demo about?"})
     assert r.status_code == HTTPStatus.OK
@@ -70,7 +150,7 @@ def test_query_variant_a() -> None:
     _assert_query_response_schema(data)
 
 
-def test_query_variant_b() -> None:
+def test_query_variant_b(client: TestClient) -> None:
     """Happy path: variant B (dense) returns a structured response."""
     r = client.post("/query?variant=B&k=2", json={"question": "Tell me about privacy & GDPR."})
     assert r.status_code == HTTPStatus.OK
@@ -78,13 +158,23 @@ def test_query_variant_b() -> None:
     _assert_query_response_schema(data)
 
 
-def test_query_invalid_variant_is_rejected() -> None:
+def test_query_variant_h(client: TestClient) -> None:
+    """Happy path: variant H (hybrid) returns fused hits from both branches."""
+    r = client.post("/query?variant=H&k=3", json={"question": "How is personal data protected?"})
+    assert r.status_code == HTTPStatus.OK
+    data = r.json()
+    _assert_query_response_schema(data)
+    scores = [h["score"] for h in data["hits"]]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_query_invalid_variant_is_rejected(client: TestClient) -> None:
     """Input validation: invalid variant should raise 422 (FastAPI Query pattern)."""
     r = client.post("/query?variant=Z", json={"question": "Hello?"})
     assert r.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
 
 
-def test_query_topk_clamping_and_types() -> None:
+def test_query_topk_clamping_and_types(client: TestClient) -> None:
     """Top-k behavior: k is clamped to corpus size and reflected in hits length.
 
     Requests a large k; response should:
@@ -99,4 +189,3 @@ def test_query_topk_clamping_and_types() -> None:
     _assert_query_response_schema(data)
     assert 1 <= data["k"] <= requested_k
     assert len(data["hits"]) == data["k"]
-
@@ -0,0 +1,197 @@
+"""Unit tests for incremental document add/update/delete in `Retriever`.
+
+These tests exercise:
+  - Deleted documents never coming back, for every variant (single and batched).
+  - Updated documents found by their new text and no longer by their old text.
+  - `corpus_version` advancing on every mutation, and only on mutations.
+  - Compaction keeping the results of every variant unchanged.
+  - The same guarantees for a chunked `Retriever` (mutations act on all passages).
+  - Hits of documents deleted between retrieval and context assembly being
+    dropped with their spans by every `RAGPipeline` entry point.
+
+A hashed bag-of-words encoder stands in for the sentence-transformer, so the
+dense backend runs without downloading a model.
+
+Run:
+  pytest -q tests/test_incremental.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import zlib
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pytest
+
+from src.api.main import to_query_out
+from src.pipelines.chunking import ChunkSpec
+from src.pipelines.encoders import Encoder, EncoderSpec
+from src.pipelines.rag import Hit, RAGPipeline, Retriever
+
+DOCS = [
+    "gdpr retention policy for customer records",
+    "gdpr retention schedule for invoices",
+    "masking emails and phone numbers in logs",
+    "vector search with faiss indexes",
+    "bm25 ranking of lexical matches",
+]
+IDS = ["a", "b", "c", "d", "e"]
+VARIANTS = ("A", "B", "H")
+
+
+class HashEncoder:
+    """Deterministic bag-of-words encoder: each word hashes to one dimension."""
+
+    name = "hash-bow"
+    dim = 64
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Word-count vectors, one row per text."""
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                out[row, zlib.crc32(word.encode()) % self.dim] += 1.0
+        return out
+
+
+class HashEncoderSpec(EncoderSpec):
+    """Spec loading `HashEncoder` instead of a model."""
+
+    def load(self) -> Encoder:
+        """Return the stub encoder."""
+        return HashEncoder()
+
+
+def _retriever(chunk_spec: ChunkSpec | None = None) -> Retriever:
+    return Retriever(list(DOCS), list(IDS), encoder_spec=HashEncoderSpec(), chunk_spec=chunk_spec)
+
+
+def _ids(retriever: Retriever, query: str, variant: str) -> List[str]:
+    return [d_id for d_id, _ in retriever.retrieve(query, k=len(IDS), variant=variant)]
+
+
+@pytest.mark.parametrize("variant", VARIANTS)
+def test_deleted_documents_never_come_back(variant: str) -> None:
+    """A deleted id is absent from single and batched results, before and after compaction."""
+    retriever = _retriever()
+    assert _ids(retriever, "gdpr retention policy", variant)[0] == "a"
+    assert retriever.delete_documents(["a", "unknown"]) == 1
+    for _ in range(2):
+        assert "a" not in _ids(retriever, "gdpr retention policy", variant)
+        queries = ["gdpr retention policy", "customer records"]
+        batch = retriever.retrieve_batch(queries, k=5, variant=variant)
+        assert all("a" not in [d_id for d_id, _ in hits] for hits in batch)
+        retriever.compact()
+    with pytest.raises(ValueError):
+        retriever.update_documents(["back again"], ["a"])
+
+
+@pytest.mark.parametrize("variant", VARIANTS)
+def test_updated_document_is_found_by_its_new_text(variant: str) -> None:
+    """After an update, the new text ranks the document first and the old one does not."""
+    retriever = _retriever()
+    retriever.update_documents(["quantum zebra migration notes"], ["a"])
+    assert _ids(retriever, "quantum zebra migration", variant)[0] == "a"
+    assert _ids(retriever, "gdpr retention policy customer records", variant)[0] == "b"
+    assert retriever.contexts_for(["a"]) == ["quantum zebra migration notes"]
+    if variant == "A":  # no lexical overlap left with the old text
+        scores = dict(retriever.retrieve("policy customer records", k=5, variant="A"))
+        assert scores.get("a", 0.0) == 0.0
+
+
+def test_backends_agree_after_mutations() -> None:
+    """BM25 and the dense store index exactly the live documents."""
+    retriever = _retriever()
+    retriever.add_documents(["audit trail of data exports"], ["f"])
+    retriever.update_documents(["bm25 scoring with term saturation"], ["e"])
+    retriever.delete_documents(["c"])
+    live = {"a", "b", "d", "e", "f"}
+    assert set(retriever.id2pos) == live
+    assert retriever.vs is not None and len(retriever.vs) == len(live)
+    for variant in VARIANTS:
+        assert set(_ids(retriever, "data", variant)) <= live
+    assert _ids(retriever, "audit trail exports", "B")[0] == "f"
+
+
+def test_corpus_version_advances_on_every_mutation() -> None:
+    """Each add/update/delete yields a new version; no-ops and compaction keep it."""
+    retriever = _retriever()
+    seen = [retriever.corpus_version]
+    retriever.add_documents(["new text"], ["f"])
+    seen.append(retriever.corpus_version)
+    retriever.update_documents(["newer text"], ["f"])
+    seen.append(retriever.corpus_version)
+    retriever.delete_documents(["f"])
+    seen.append(retriever.corpus_version)
+    assert len(set(seen)) == 4
+    assert retriever.delete_documents(["missing"]) == 0
+    retriever.compact()
+    assert retriever.corpus_version == seen[-1]
+
+
+def test_compaction_keeps_results() -> None:
+    """Hits and scores of every variant are unchanged by compaction."""
+    retriever = _retriever()
+    retriever.update_documents(["gdpr retention policy, revised"], ["a"])
+    retriever.delete_documents(["d"])
+    queries = ["gdpr retention policy", "masking phone numbers", "bm25 lexical"]
+    before = {v: retriever.retrieve_batch(queries, k=4, variant=v) for v in VARIANTS}
+    retriever.compact()
+    assert len(retriever.docs) == len(retriever.id2pos) == 4
+    for variant in VARIANTS:
+        after = retriever.retrieve_batch(queries, k=4, variant=variant)
+        for old, new in zip(before[variant], after, strict=True):
+            assert [d_id for d_id, _ in new] == [d_id for d_id, _ in old]
+            assert [s for _, s in new] == pytest.approx([s for _, s in old], abs=1e-5)
+
+
+def test_chunked_mutations_act_on_every_passage() -> None:
+    """With a `chunk_spec`, updates and deletes replace or drop all chunks of a document."""
+    retriever = _retriever(ChunkSpec(max_tokens=3, overlap=0))
+    assert len(retriever.chunks or []) == len(IDS)
+    retriever.update_documents(["quantum zebra migration notes and more words"], ["a"])
+    retriever.delete_documents(["c"])
+    for variant in VARIANTS:
+        hits = _ids(retriever, "quantum zebra migration", variant)
+        assert hits[0].startswith("a#")
+        assert not any(h.startswith("c#") for h in _ids(retriever, "masking emails", variant))
+    assert retriever.spans_for([hits[0]])[0][0] == "a"
+    retriever.compact()
+    assert _ids(retriever, "quantum zebra migration", "B")[0].startswith("a#")
+    assert not any(h.startswith("c#") for h in retriever.id2pos)
+
+
+def test_hits_deleted_mid_request_are_dropped_with_their_spans() -> None:
+    """A document deleted right after retrieval leaves hits and spans aligned."""
+    retriever = _retriever()
+    pipeline = RAGPipeline(retriever, coalesce=False)
+    retrieve, retrieve_batch = pipeline._retrieve, pipeline._retrieve_batch
+
+    def delete_after(hits: List[Hit]) -> List[Hit]:
+        retriever.delete_documents(["a"])
+        return hits
+
+    # Delete once the retrieval stage has returned, before contexts are gathered.
+    pipeline._retrieve = lambda *a: delete_after(retrieve(*a))  # type: ignore[method-assign]
+    pipeline._retrieve_batch = lambda *a: [  # type: ignore[method-assign]
+        delete_after(hits) for hits in retrieve_batch(*a)
+    ]
+
+    async def stream_hits() -> Dict:
+        return await anext(pipeline.astream("gdpr retention policy", k=3))
+
+    results = [
+        lambda: pipeline.run("gdpr retention policy", k=3),
+        lambda: asyncio.run(pipeline.arun("gdpr retention policy", k=3, variant="H")),
+        lambda: pipeline.run_batch([("gdpr retention policy", "B", 3)])[0],
+        lambda: asyncio.run(stream_hits()),
+    ]
+    for get in results:
+        result = get()
+        assert [h[0] for h in result["hits"]] == [sp[0] for sp in result["spans"]]
+        assert "a" not in [h[0] for h in result["hits"]] and result["hits"]
+        retriever.add_documents([DOCS[0]], ["a"])
+    out = to_query_out({**result, "answer": "", "latency_ms": 0.0}, chunked=False)
+    assert [h.doc_id for h in out.hits] == [h[0] for h in result["hits"]]
@@ -0,0 +1,151 @@
+"""Unit tests for the PII guardrails.
+
+These tests exercise:
+  - `mask_pii` on cards and emails.
+  - Detector validators (Luhn, IBAN mod-97) rejecting checksum failures, and
+    prefilters that skip categories without changing the output.
+  - `PiiEngine`: categories reported by a single scan, per-category tokens,
+    priority between overlapping categories and whole-token matching.
+  - `StreamMasker` output equal to `mask_pii` for any chunking of the text,
+    releasing everything but the trailing run a match could still extend.
+
+Run:
+  pytest -q tests/test_policy.py
+"""
+
+from __future__ import annotations
+
+import random
+import re
+
+import pytest
+
+from src.guardrails.policy import (
+    PII_DETECTORS,
+    PII_PATTERNS,
+    Detector,
+    PiiEngine,
+    PiiMatch,
+    PolicyEngine,
+    StreamMasker,
+    iban_valid,
+    luhn_valid,
+    mask_pii,
+)
+
+TEXT = (
+    "Card 4111111111111111 and alice@example.com, again 5555555555554444.\n"
+    "Call ops@corp.io;ids 12345678901234567 stay. 4111111111111111@x.org ok\n"
+    "IBAN DE89370400440532013000, not DE89370400440532013001 nor 1234567890123456."
+)
+
+
+def _stream(text: str, cuts: list[int]) -> str:
+    masker = StreamMasker()
+    bounds = zip([0, *cuts], [*cuts, len(text)], strict=True)
+    return "".join(masker.feed(text[a:b]) for a, b in bounds) + masker.flush()
+
+
+def test_mask_pii() -> None:
+    """Luhn-valid cards and emails are replaced; other numbers are not."""
+    assert mask_pii("Card: 4111111111111111") == "Card: [REDACTED]"
+    assert mask_pii("mail bob@example.com.") == "mail [REDACTED]."
+    assert mask_pii("id 12345678901234567") == "id 12345678901234567"
+    assert PolicyEngine().post_enforce("x 5555555555554444") == "x [REDACTED]"
+
+
+def test_explicit_default_patterns_match_the_default() -> None:
+    """`PII_PATTERNS` and `PII_DETECTORS` mask exactly what the default call masks."""
+    for text in ("order 1234567890123 ok", "order 1234567890123456", TEXT):
+        assert mask_pii(text, PII_PATTERNS) == mask_pii(text)
+        assert mask_pii(text, PII_DETECTORS) == mask_pii(text)
+        assert mask_pii(text, list(PII_DETECTORS)) == mask_pii(text)
+    card = Detector("card", r"\b[0-9]{16}\b", validator=luhn_valid)
+    assert mask_pii("x 4111111111111112 4111111111111111", [card]) == (
+        "x 4111111111111112 [REDACTED]"
+    )
+
+
+def test_validators_reject_checksum_failures() -> None:
+    """Card candidates need a valid Luhn sum, IBAN candidates a valid mod-97."""
+    assert luhn_valid("4111111111111111") and luhn_valid("378282246310005")
+    assert not luhn_valid("4111111111111112")
+    assert iban_valid("DE89370400440532013000") and iban_valid("GB82WEST12345698765432")
+    assert not iban_valid("DE89370400440532013001")
+    assert mask_pii("order 1234567890123456") == "order 1234567890123456"
+    assert mask_pii("to GB82WEST12345698765432.") == "to [REDACTED]."
+    engine = PiiEngine()
+    text = "DE89370400440532013001 4111111111111112 4111111111111111"
+    assert engine.scan(text) == [PiiMatch("card", 40, 56)]
+    assert engine.mask_and_count(text) == (text[:40] + "[REDACTED]", {"card": 1})
+
+
+def test_prefilters_skip_categories_without_changing_output() -> None:
+    """Prefiltered and unfiltered detectors agree; PII-free text is returned as is."""
+    unfiltered = PiiEngine(
+        [Detector(d.category, d.pattern, validator=d.validator) for d in PII_DETECTORS]
+    )
+    engine = PiiEngine()
+    lines = [*TEXT.splitlines(), "kept 30 days (section 4.2)", "a@b", "AB12 only"]
+    for line in lines:
+        assert engine.mask(line) == unfiltered.mask(line)
+        assert engine.scan(line) == unfiltered.scan(line)
+    clean = "retention is kept for thirty days (see the policy section)."
+    assert engine.mask(clean) is clean and engine.scan(clean) == []
+    assert engine.mask_and_count(clean) == (clean, {})
+    with pytest.raises(ValueError):
+        Detector("bad name", r"\d+").validate()
+    with pytest.raises(ValueError):
+        PiiEngine([Detector("digits", r"\d+", prefilter="")])
+
+
+def test_engine_reports_categories_and_tokens() -> None:
+    """One scan finds every category; each category can have its own token."""
+    engine = PiiEngine(replacements={"email": "[EMAIL]"})
+    text = "mail bob@example.com, card 4111111111111111."
+    assert engine.scan(text) == [PiiMatch("email", 5, 20), PiiMatch("card", 27, 43)]
+    assert engine.mask(text) == "mail [EMAIL], card [REDACTED]."
+    assert engine.mask_and_count(text + " a@b.io") == (
+        "mail [EMAIL], card [REDACTED]. [EMAIL]",
+        {"email": 2, "card": 1},
+    )
+    assert engine.scan("4111111111111111") == [PiiMatch("card", 0, 16)]  # start of text
+
+
+def test_engine_priority_and_single_pass() -> None:
+    """Earlier categories win overlaps; replacements are never rescanned."""
+    assert mask_pii("4111111111111111@x.org") == "[REDACTED]"  # email before card
+    engine = PiiEngine({"card": r"\b\d{13,16}\b", "email": r"\b\w+@\w+\.[A-Za-z]{2,}\b"})
+    assert engine.mask("4111111111111111@x.org") == "[REDACTED]@x.org"
+    tokens = PiiEngine({"word": r"\bsecret\b"}, default_token="secret")
+    assert tokens.mask("a secret b") == "a secret b"
+
+
+def test_engine_matches_whole_tokens_only() -> None:
+    """Matches start at the text start or after a non-word character."""
+    engine = PiiEngine({"code": re.compile(r"abc\d", re.IGNORECASE), "tag": r"\+\d+"})
+    masked = engine.mask("ABC1 xabc2 (abc3) +49 x+1")
+    assert masked == "[REDACTED] xabc2 ([REDACTED]) [REDACTED] x+1"
+    assert mask_pii("a 4111111111111111", [re.compile(r"\b\d{16}\b")]) == "a [REDACTED]"
+    with pytest.raises(ValueError):
+        PiiEngine({})
+
+
+def test_stream_masker_matches_mask_pii_for_any_split() -> None:
+    """Every chunking, including splits inside matches, masks like the whole text."""
+    expected = mask_pii(TEXT)
+    rng = random.Random(7)
+    for _ in range(300):
+        cuts = sorted(rng.sample(range(1, len(TEXT)), rng.randint(1, 20)))
+        assert _stream(TEXT, cuts) == expected
+    assert _stream(TEXT, list(range(1, len(TEXT)))) == expected  # one char at a time
+
+
+def test_stream_masker_holds_only_the_open_run() -> None:
+    """Text is released up to the last character no match can contain."""
+    masker = StreamMasker()
+    assert masker.feed("Card: 4111") == "Card: " and masker.pending == 4
+    assert masker.feed("111111111111, mail bob@exa") == "[REDACTED], mail "
+    assert masker.pending == len("bob@exa")
+    assert masker.feed("mple.com") == ""
+    assert masker.flush() == "[REDACTED]" and masker.pending == 0
@@ -0,0 +1,97 @@
+"""Unit tests for cross-encoder re-ranking.
+
+These tests exercise:
+  - Re-ordering of first-stage candidates by pair score, truncated to k.
+  - The (query, passage) score cache (no model call for repeated pairs).
+  - Latency-budget truncation of the candidate list.
+  - `RAGPipeline.run(rerank=True)` over the BM25 variant.
+
+A deterministic pair scorer stands in for the cross-encoder.
+
+Run:
+  pytest -q tests/test_rerank.py
+"""
+
+from __future__ import annotations
+
+import time
+from typing import List, Tuple
+
+import numpy as np
+import pytest
+
+from src.pipelines.rag import RAGPipeline, Retriever
+from src.pipelines.rerank import Reranker, RerankSpec
+
+
+class FakeScorer:
+    """Scores a pair by the passage's count of query words; records calls."""
+
+    def __init__(self, delay_s: float = 0.0) -> None:
+        self.delay_s = delay_s
+        self.calls: List[List[Tuple[str, str]]] = []
+
+    def __call__(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        """Score `pairs` (sleeping `delay_s` per pair)."""
+        self.calls.append(pairs)
+        time.sleep(self.delay_s * len(pairs))
+        return np.array(
+            [sum(p.split().count(w) for w in q.split()) for q, p in pairs], dtype=np.float32
+        )
+
+
+HITS = [("d0", 9.0), ("d1", 8.0), ("d2", 7.0), ("d3", 6.0)]
+TEXTS = ["alpha", "gdpr retention", "gdpr gdpr retention", "nothing"]
+
+
+def test_rerank_reorders_and_truncates() -> None:
+    """Candidates are sorted by pair score; ties keep first-stage order."""
+    scorer = FakeScorer()
+    reranker = Reranker(RerankSpec(batch_size=3), score_fn=scorer)
+    hits, n = reranker.rerank("gdpr retention", HITS, TEXTS, k=3)
+    assert n == 4
+    assert hits == [("d2", 3.0), ("d1", 2.0), ("d0", 0.0)]
+    assert [len(c) for c in scorer.calls] == [3, 1]
+    with pytest.raises(ValueError):
+        reranker.rerank("q", HITS, TEXTS[:2], k=2)
+
+
+def test_pair_scores_are_cached() -> None:
+    """A repeated (query, passage) pair never reaches the model twice."""
+    scorer = FakeScorer()
+    reranker = Reranker(RerankSpec(), score_fn=scorer)
+    first, _ = reranker.rerank("gdpr", HITS, TEXTS, k=4)
+    second, _ = reranker.rerank("gdpr", HITS[1:], TEXTS[1:], k=3)
+    assert len(scorer.calls) == 1
+    assert second == first[:2] + [("d3", 0.0)] and first[0] == ("d2", 2.0)
+    reranker.rerank("retention", HITS, TEXTS, k=4)  # new query, new pairs
+    assert len(scorer.calls) == 2
+
+
+def test_budget_truncates_candidates() -> None:
+    """With a tight budget only the affordable prefix is re-ranked."""
+    scorer = FakeScorer(delay_s=0.01)
+    reranker = Reranker(RerankSpec(batch_size=1), score_fn=scorer)
+    reranker.rerank("warm", HITS[:1], TEXTS[:1], k=1, budget_ms=0)  # learn the pair cost
+    assert reranker.ms_per_pair is not None and reranker.ms_per_pair >= 10
+    hits, n = reranker.rerank("gdpr", HITS, TEXTS, k=4, budget_ms=25)
+    assert 1 <= n < 4
+    # unscored candidates follow in first-stage order with their original scores
+    assert hits[n:] == HITS[n:]
+    assert len(hits) == 4
+
+
+def test_pipeline_rerank_with_bm25() -> None:
+    """`run(rerank=True)` re-scores BM25 candidates and reports the count."""
+    docs = ["alpha beta", "gdpr retention policy", "gdpr gdpr retention retention", "other"]
+    ids = ["a", "b", "c", "d"]
+    pipeline = RAGPipeline(
+        Retriever(docs, ids, defer_dense=True),
+        reranker=Reranker(RerankSpec(candidates=4), score_fn=FakeScorer()),
+    )
+    res = pipeline.run("gdpr retention", variant="A", k=1, rerank=True)
+    assert res["reranked"] >= 2
+    assert res["hits"][0][0] == "c"
+    assert pipeline.run("gdpr", variant="A", k=1)["reranked"] == 0
+    with pytest.raises(ValueError):
+        RAGPipeline(pipeline.retriever).run("gdpr", rerank=True)
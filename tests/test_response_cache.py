@@ -0,0 +1,121 @@
+"""Unit tests for the full-response cache.
+
+These tests exercise:
+  - Key composition (question, variant, k, options, corpus/config versions).
+  - The in-memory backend: byte bound, LRU order, TTL and TinyLFU admission.
+  - The SQLite backend: persistence across instances, byte bound and TTL.
+  - `RAGPipeline.run` serving repeats from the cache and missing after an
+    index change (new corpus version).
+
+Run:
+  pytest -q tests/test_response_cache.py
+"""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+
+from src.pipelines.rag import RAGPipeline, Retriever
+from src.pipelines.response_cache import (
+    MemoryResponseCache,
+    SqliteResponseCache,
+    make_response_cache,
+    response_key,
+)
+
+
+def test_key_covers_every_input() -> None:
+    """Any input that shapes the answer changes the key."""
+    base = response_key("q", "A", 6, "c1", "v1", rerank=False)
+    assert base == response_key("q", "A", 6, "c1", "v1", rerank=False)
+    variants = [
+        response_key("q2", "A", 6, "c1", "v1", rerank=False),
+        response_key("q", "B", 6, "c1", "v1", rerank=False),
+        response_key("q", "A", 5, "c1", "v1", rerank=False),
+        response_key("q", "A", 6, "c2", "v1", rerank=False),
+        response_key("q", "A", 6, "c1", "v2", rerank=False),
+        response_key("q", "A", 6, "c1", "v1", rerank=True),
+    ]
+    assert base not in variants and len(set(variants)) == len(variants)
+
+
+def test_memory_lru_bytes_and_ttl() -> None:
+    """Entries are evicted least-recently-used first to respect the byte bound."""
+    value = {"answer": "x" * 20}  # 34 bytes encoded
+    cache = MemoryResponseCache(max_bytes=80, admission=False)
+    cache.put("a", value)
+    cache.put("b", value)
+    assert cache.get("a") == value  # "b" is now least recently used
+    cache.put("c", value)
+    assert cache.get("b") is None and cache.get("a") == value and cache.get("c") == value
+    assert cache.nbytes == 68
+    cache.put("huge", {"answer": "x" * 100})  # larger than the bound: ignored
+    assert cache.get("huge") is None
+
+    short = MemoryResponseCache(max_bytes=1000, ttl_s=0.01)
+    short.put("a", value)
+    time.sleep(0.02)
+    assert short.get("a") is None and len(short) == 0
+
+
+def test_tinylfu_keeps_popular_entries() -> None:
+    """A one-off key does not evict a key that is requested often."""
+    value = {"answer": "x" * 20}
+    cache = MemoryResponseCache(max_bytes=40)
+    for _ in range(5):
+        cache.get("hot")
+    cache.put("hot", value)
+    cache.get("cold")
+    cache.put("cold", value)  # declined: "cold" is rarer than the victim
+    assert cache.get("hot") == value and cache.get("cold") is None
+
+
+def test_tinylfu_declines_before_evicting_anything() -> None:
+    """An entry needing several victims is declined whole if any of them is hotter."""
+    value = {"answer": "x" * 20}  # 34 bytes encoded
+    cache = MemoryResponseCache(max_bytes=80)
+    cache.put("cold", value)
+    for _ in range(5):
+        cache.get("hot")
+    cache.put("hot", value)
+    cache.get("new")
+    cache.put("new", {"answer": "x" * 50})  # needs both slots; "hot" is more popular
+    assert cache.nbytes == 68 and cache.get("new") is None
+    assert cache.get("cold") == value and cache.get("hot") == value
+
+
+def test_sqlite_shared_bytes_and_ttl(tmp_path: Path) -> None:
+    """The SQLite store is visible to other instances and bounded by bytes."""
+    path = tmp_path / "responses.sqlite"
+    value = {"answer": "x" * 20, "hits": [["d0", 1.5]]}
+    writer = SqliteResponseCache(path, max_bytes=200)
+    for i in range(10):
+        writer.put(f"k{i}", value)
+    reader = SqliteResponseCache(path, max_bytes=200)
+    assert reader.get("k9") == value and reader.get("k0") is None
+    assert 0 < len(reader) < 10
+
+    expiring = make_response_cache("sqlite", max_bytes=1000, ttl_s=0.01, path=tmp_path / "t.db")
+    expiring.put("a", value)
+    time.sleep(0.02)
+    assert expiring.get("a") is None
+    assert make_response_cache("off", max_bytes=1) is None
+    with pytest.raises(ValueError):
+        make_response_cache("redis", max_bytes=1)
+
+
+def test_pipeline_serves_repeats_until_the_corpus_changes() -> None:
+    """A repeated question hits; a new corpus version misses."""
+    docs = ["alpha beta", "gdpr retention policy", "other text"]
+    retriever = Retriever(docs, ["a", "b", "c"], defer_dense=True)
+    pipeline = RAGPipeline(retriever, cache=MemoryResponseCache(max_bytes=1 << 20))
+    first = pipeline.run("gdpr retention", variant="A", k=2)
+    second = pipeline.run("gdpr retention", variant="A", k=2)
+    assert not first["cached"] and second["cached"]
+    assert second["hits"] == first["hits"] and second["spans"] == first["spans"]
+    assert not pipeline.run("gdpr retention", variant="A", k=1)["cached"]
+    retriever.corpus_version = "rebuilt"  # what add/update/delete do
+    assert not pipeline.run("gdpr retention", variant="A", k=2)["cached"]
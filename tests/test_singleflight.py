@@ -0,0 +1,117 @@
+"""Unit tests for single-flight request coalescing.
+
+These tests exercise:
+  - Concurrent calls with one key share a single execution and its result.
+  - Exceptions propagate to every waiting caller; the key is then released.
+  - A cancelled async leader does not fail its waiters: they run the work again.
+  - `RAGPipeline.run` generating once for a burst of identical questions.
+
+Run:
+  pytest -q tests/test_singleflight.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List
+
+from src.pipelines.rag import Generator, RAGPipeline, Retriever
+from src.pipelines.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def _burst(n: int, fn: Callable[[], object]) -> List[Any]:
+    """Start `fn` in `n` threads at once and return their outcomes."""
+    barrier = threading.Barrier(n)
+
+    def run() -> object:
+        barrier.wait()
+        return fn()
+
+    with ThreadPoolExecutor(n) as pool:
+        futures = [pool.submit(run) for _ in range(n)]
+    return [f.exception() or f.result() for f in futures]
+
+
+def test_concurrent_calls_share_one_execution() -> None:
+    """Eight identical calls run the work once; seven are marked shared."""
+    flight: SingleFlight[List[int]] = SingleFlight("test")
+    calls: List[int] = []
+
+    def work() -> List[int]:
+        calls.append(1)
+        time.sleep(0.1)
+        return [42]
+
+    outcomes = _burst(8, lambda: flight.do("k", work))
+    assert len(calls) == 1
+    assert all(result is outcomes[0][0] for result, _ in outcomes)
+    assert sorted(shared for _, shared in outcomes) == [False] + [True] * 7
+    assert flight.do("k", lambda: [7]) == ([7], False)  # released after completion
+
+
+def test_errors_reach_every_waiter() -> None:
+    """A failing leader fails its followers too, then the key is free again."""
+    flight: SingleFlight[int] = SingleFlight("test")
+
+    def boom() -> int:
+        time.sleep(0.1)
+        raise RuntimeError("backend down")
+
+    outcomes = _burst(4, lambda: flight.do("k", boom))
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    assert flight.do("k", lambda: 1) == (1, False)
+
+
+def test_cancelled_async_leader_does_not_fail_waiters() -> None:
+    """Waiters of a cancelled leader retry; one of them leads the second run."""
+    flight: AsyncSingleFlight[int] = AsyncSingleFlight("test")
+    runs: List[int] = []
+
+    async def work() -> int:
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def scenario() -> List[object]:
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(flight.do("k", work)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        outcomes = await asyncio.gather(*waiters, return_exceptions=True)
+        assert leader.cancelled()
+        return outcomes
+
+    outcomes = asyncio.run(scenario())
+    assert sorted(outcomes) == [(42, False), (42, True), (42, True)]
+    assert len(runs) == 2
+
+
+def test_pipeline_coalesces_identical_questions() -> None:
+    """A burst of the same question generates once (every time without coalescing)."""
+    calls: List[str] = []
+
+    class SlowGenerator(Generator):
+        def generate(self, question: str, contexts: List[str]) -> str:
+            """Record the call and take 100 ms."""
+            calls.append(question)
+            time.sleep(0.1)
+            return super().generate(question, contexts)
+
+    retriever = Retriever(
+        ["alpha beta", "gdpr retention", "other"], ["a", "b", "c"], defer_dense=True
+    )
+    pipeline = RAGPipeline(retriever)
+    pipeline.generator = SlowGenerator()
+    outcomes = _burst(6, lambda: pipeline.run("gdpr", variant="A", k=1))
+    assert calls == ["gdpr"]
+    assert all(o["hits"] == outcomes[0]["hits"] for o in outcomes)
+
+    uncoalesced = RAGPipeline(retriever, coalesce=False)
+    uncoalesced.generator = pipeline.generator
+    calls.clear()
+    _burst(3, lambda: uncoalesced.run("gdpr", variant="A", k=1))
+    assert len(calls) == 3
@@ -0,0 +1,74 @@
+"""Unit tests for streamed answers.
+
+These tests exercise:
+  - `RAGPipeline.astream`: hits first, chunks that concatenate to the `run`
+    answer, and cache replay.
+  - The `/query/stream` Server-Sent Events endpoint (BM25 only, no model).
+
+Run:
+  pytest -q tests/test_streaming.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from http import HTTPStatus
+from typing import Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import main
+from src.api.main import ServiceState, app
+from src.pipelines.rag import RAGPipeline, Retriever
+from src.pipelines.response_cache import MemoryResponseCache
+
+DOCS = ["alpha beta", "gamma delta: card 4111111111111111, mail bob@example.com", "other"]
+
+
+def _collect(pipeline: RAGPipeline, question: str, **kwargs: object) -> List[Dict]:
+    async def consume() -> List[Dict]:
+        return [event async for event in pipeline.astream(question, **kwargs)]
+
+    return asyncio.run(consume())
+
+
+def test_astream_yields_hits_then_the_masked_answer() -> None:
+    """Streamed chunks add up to the `run` answer; a repeat replays the cache."""
+    retriever = Retriever(DOCS, ["a", "b", "c"], defer_dense=True)
+    pipeline = RAGPipeline(retriever, cache=MemoryResponseCache(max_bytes=1 << 20))
+    events = _collect(pipeline, "gamma", k=1)
+    assert [e["event"] for e in events[:1] + events[-1:]] == ["hits", "done"]
+    assert events[0]["hits"][0][0] == "b" and not events[0]["cached"]
+    tokens = [e["text"] for e in events if e["event"] == "token"]
+    assert len(tokens) > 1
+    answer = "".join(tokens)
+    assert "[REDACTED]" in answer and "4111" not in answer
+    assert answer == RAGPipeline(retriever).run("gamma", k=1)["answer"]
+
+    replay = _collect(pipeline, "gamma", k=1)
+    assert replay[0]["cached"] and [e["text"] for e in replay if e["event"] == "token"] == [answer]
+    with pytest.raises(ValueError):
+        _collect(pipeline, "gamma", rerank=True)
+
+
+def test_sse_endpoint(monkeypatch: pytest.MonkeyPatch) -> None:
+    """/query/stream sends hits, tokens and done as SSE; dense is 503 while loading."""
+    state = ServiceState()
+    state.retriever = Retriever(DOCS, ["a", "b", "c"], defer_dense=True)
+    state.pipeline = RAGPipeline(state.retriever)
+    monkeypatch.setattr(main, "STATE", state)
+    c = TestClient(app)
+    r = c.post("/query/stream?variant=A&k=1", json={"question": "gamma"})
+    assert r.status_code == HTTPStatus.OK
+    assert r.headers["content-type"].startswith("text/event-stream")
+    frames = [f.split("\n", 1) for f in r.text.strip().split("\n\n")]
+    names = [name.removeprefix("event: ") for name, _ in frames]
+    data = [json.loads(payload.removeprefix("data: ")) for _, payload in frames]
+    assert names[0] == "hits" and names[-1] == "done" and set(names[1:-1]) == {"token"}
+    assert data[0]["hits"][0]["doc_id"] == "b" and "spans" not in data[0]
+    streamed = "".join(d["text"] for d in data[1:-1])
+    assert streamed == c.post("/query?variant=A&k=1", json={"question": "gamma"}).json()["answer"]
+    r = c.post("/query/stream?variant=B", json={"question": "gamma"})
+    assert r.status_code == HTTPStatus.SERVICE_UNAVAILABLE
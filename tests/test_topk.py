@@ -0,0 +1,34 @@
+"""Unit tests for the shared top-k selection utility.
+
+These tests exercise:
+  - Equivalence with a full (score desc, key asc) sort, ties included.
+  - Custom tie-break keys and k clamping.
+
+Run:
+  pytest -q tests/test_topk.py
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from src.pipelines.topk import top_k_indices
+
+
+def test_matches_full_sort_with_ties() -> None:
+    """Selection equals `lexsort` on heavily tied integer-valued scores."""
+    rng = np.random.default_rng(0)
+    for n in (1, 7, 100, 5000):
+        scores = rng.integers(0, 5, size=n).astype(np.float64)
+        for k in (1, 3, 6, n):
+            expected = np.lexsort((np.arange(n), -scores))[:k]
+            assert np.array_equal(top_k_indices(scores, k), expected), (n, k)
+
+
+def test_custom_keys_and_clamping() -> None:
+    """Ties follow the provided keys; k outside [0, n] is clamped."""
+    scores = np.array([1.0, 2.0, 2.0, 0.5])
+    keys = np.array([10, 30, 20, 40])
+    assert top_k_indices(scores, 2, keys).tolist() == [2, 1]
+    assert top_k_indices(scores, 99).tolist() == [1, 2, 0, 3]
+    assert top_k_indices(scores, 0).shape == (0,)
@@ -0,0 +1,147 @@
+"""Unit tests for the FAISS-backed vector store.
+
+These tests exercise:
+  - Exact inner-product ranking over L2-normalized vectors.
+  - Incremental add/remove without rebuilding the index, and label compaction.
+  - Batched search equivalence with single-query search.
+  - Approximate index kinds (HNSW, IVF, IVF-PQ): recall and removal, and
+    HNSW rebuilds once tombstones pass the compaction ratio.
+  - Save/load round-trips with provenance manifests; foreign index files.
+
+Run:
+  pytest -q tests/test_vector_store.py
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pytest
+
+from src.pipelines.ann import IndexSpec
+from src.pipelines.artifacts import corpus_fingerprint, manifest_matches, read_manifest
+from src.pipelines.rag import VectorStore
+
+
+def _vectors(n: int, d: int = 8, seed: int = 0) -> np.ndarray:
+    """Random float32 matrix of shape (n, d)."""
+    return np.random.default_rng(seed).standard_normal((n, d)).astype(np.float32)
+
+
+def test_add_and_remove_are_incremental() -> None:
+    """Added vectors become searchable; removed ones never come back."""
+    base = _vectors(20)
+    vs = VectorStore(base.copy(), [f"d{i}" for i in range(20)])
+    extra = _vectors(5, seed=1)
+    vs.add(extra.copy(), [f"n{i}" for i in range(5)])
+    assert vs.search(extra[2].copy(), k=1)[0][0] == "n2"
+
+    assert vs.remove(["d3", "n2", "missing"]) == 2
+    hits = vs.search(extra[2].copy(), k=50)
+    assert len(hits) == 23
+    assert {"d3", "n2"}.isdisjoint(doc_id for doc_id, _ in hits)
+    assert [s for _, s in hits] == sorted((s for _, s in hits), reverse=True)
+
+    with pytest.raises(ValueError):
+        vs.add(_vectors(1, seed=2), ["d0"])
+
+
+def test_compact_renumbers_labels_and_keeps_hits() -> None:
+    """Compaction drops removed slots from `ids` without changing search results."""
+    vs = VectorStore(_vectors(50), [f"d{i}" for i in range(50)])
+    vs.remove([f"d{i}" for i in range(0, 50, 3)])
+    queries = _vectors(5, seed=4)
+    before = [vs.search(q.copy(), k=10) for q in queries]
+    vs.compact()
+    assert len(vs.ids) == len(vs) == 33 and None not in vs.ids
+    assert [vs.search(q.copy(), k=10) for q in queries] == before
+    vs.add(_vectors(1, seed=6), ["new"])
+    assert vs.search(_vectors(1, seed=6)[0], k=1)[0][0] == "new"
+
+
+def test_search_batch_matches_single_queries() -> None:
+    """One batched FAISS call returns exactly the per-query hit lists."""
+    vs = VectorStore(_vectors(200), [f"d{i}" for i in range(200)])
+    vs.remove(["d0", "d1"])
+    queries = _vectors(7, seed=3)
+    batched = vs.search_batch(queries.copy(), k=6)
+    assert batched == [vs.search(q.copy(), k=6) for q in queries]
+    assert vs.search_batch(queries[:0], k=6) == []
+
+
+@pytest.mark.parametrize(
+    ("spec", "min_recall"),
+    [
+        (IndexSpec(kind="hnsw", ef_search=64), 0.9),
+        (IndexSpec(kind="ivf", nprobe=32), 0.8),
+        (IndexSpec(kind="ivfpq", nprobe=16, pq_m=8), 0.3),
+    ],
+)
+def test_ann_kinds_recall_and_removal(spec: IndexSpec, min_recall: float) -> None:
+    """ANN stores approximate Flat's top-10 and honor removals (incl. HNSW tombstones)."""
+    base = _vectors(3000, d=32)
+    ids = [f"d{i}" for i in range(3000)]
+    exact = VectorStore(base.copy(), ids)
+    approx = VectorStore(base.copy(), ids, spec=spec)
+    queries = _vectors(30, d=32, seed=5)
+    overlaps = [
+        {h for h, _ in exact.search(q.copy(), 10)} & {h for h, _ in approx.search(q.copy(), 10)}
+        for q in queries
+    ]
+    recall = np.mean([len(o) / 10 for o in overlaps])
+    assert recall >= min_recall
+
+    top = [h for h, _ in approx.search(queries[0].copy(), 5)]
+    assert approx.remove(top) == 5
+    hits = approx.search(queries[0].copy(), 5)
+    assert len(hits) == 5 and set(top).isdisjoint(h for h, _ in hits)
+
+
+def test_hnsw_rebuilds_past_the_tombstone_ratio() -> None:
+    """HNSW deletes are tombstones until they exceed `compact_ratio`, then the graph is rebuilt."""
+    base = _vectors(200, d=16)
+    vs = VectorStore(base.copy(), [f"d{i}" for i in range(200)], IndexSpec(kind="hnsw"))
+    vs.remove([f"d{i}" for i in range(40)])
+    assert vs.index.ntotal == 200  # 40 tombstones: below 25%
+    vs.remove([f"d{i}" for i in range(40, 60)])
+    assert vs.index.ntotal == len(vs.ids) == len(vs) == 140
+    hits = vs.search(base[100].copy(), k=5)
+    assert hits[0][0] == "d100" and all(int(h[1:]) >= 60 for h, _ in hits)
+    vs.remove(["d100"])
+    vs.compact()  # explicit compaction rebuilds as well
+    assert vs.index.ntotal == 139 and "d100" not in vs.ids
+
+
+def test_small_corpus_falls_back_to_flat() -> None:
+    """IVF-PQ on too few vectors to train degrades to an exact index."""
+    vs = VectorStore(_vectors(10, d=32), [f"d{i}" for i in range(10)], IndexSpec(kind="ivfpq"))
+    assert len(vs.search(_vectors(1, d=32)[0], 10)) == 10
+
+
+@pytest.mark.parametrize(("kind", "mmap"), [("flat", False), ("flat", True), ("hnsw", False)])
+def test_save_load_roundtrip(tmp_path: Path, kind: str, mmap: bool) -> None:
+    """A reloaded store (optionally mmapped) returns identical hits, removals included."""
+    vs = VectorStore(_vectors(300), [f"d{i}" for i in range(300)], IndexSpec(kind=kind))
+    vs.remove(["d5", "d7"])
+    fingerprint = corpus_fingerprint(["a", "b"], ["d0", "d1"])
+    vs.save(tmp_path / "vs", manifest={"model": "m", "corpus_sha256": fingerprint})
+
+    manifest = read_manifest(tmp_path / "vs")
+    assert manifest_matches(manifest, {"model": "m", "corpus_sha256": fingerprint, "count": 298})
+    assert not manifest_matches(manifest, {"model": "other"})
+    assert fingerprint != corpus_fingerprint(["a", "b"], ["d1", "d0"])
+
+    loaded = VectorStore.load(tmp_path / "vs", mmap=mmap)
+    assert len(loaded) == 298 and loaded.spec.kind == kind
+    for q in _vectors(5, seed=9):
+        assert loaded.search(q.copy(), k=8) == vs.search(q.copy(), k=8)
+
+
+def test_load_rejects_foreign_index_files(tmp_path: Path) -> None:
+    """An index file that is not an ID-mapped store fails with ValueError."""
+    VectorStore(_vectors(10), [f"d{i}" for i in range(10)]).save(tmp_path / "vs")
+    faiss.write_index(faiss.IndexFlatIP(8), str(tmp_path / "vs" / "index.faiss"))
+    with pytest.raises(ValueError):
+        VectorStore.load(tmp_path / "vs")